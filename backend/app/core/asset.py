@@ -20,8 +20,8 @@ from scipy import stats
 from typing import Optional, List
 from dotenv import load_dotenv
 import os
-from supabase import Client
 from app.database.insert import insert_new_ticker
+from app.database import price_store
 
 load_dotenv()
 
@@ -30,6 +30,36 @@ SUPABASE_URL = os.getenv('SUPABASE_URL')
 
 DateLike = str | datetime | date | pd.Timestamp
 
+
+def asof(df: DataFrame, dates: DateLike | list[DateLike] | np.ndarray | pd.Index, column: str) -> float | np.ndarray:
+    """Looks up the last value of a column on or before each date
+
+    Dates are matched by day, so a date with a time picks up that day's row.
+
+    Args:
+        df (pandas.core.frame.DataFrame): df with a sorted DatetimeIndex
+        dates (DateLike | array-like): one date or an array of dates
+        column (str): column to look up
+
+    Returns:
+        float | numpy.ndarray: value for a single date, or array of values in the order of dates
+    """
+    scalar = np.ndim(dates) == 0
+    when = pd.DatetimeIndex(pd.to_datetime([dates] if scalar else np.asarray(dates), format='mixed'))
+    if df.index.tz is not None and when.tz is None:
+        when = when.tz_localize(df.index.tz)
+    elif df.index.tz is None and when.tz is not None:
+        when = when.tz_localize(None)
+    when = when.normalize()
+
+    # position of the last row on or before each date
+    pos = df.index.searchsorted(when, side='right') - 1
+    if (pos < 0).any():
+        raise ValueError(f'No data on or before {when[pos < 0][0].date()}')
+
+    values = df[column].to_numpy()[pos]
+    return float(values[0]) if scalar else values
+
 class Asset():
     ''' Asset class handles all the data processing and plotting functions
     - Queries data from the database
@@ -60,35 +90,52 @@ class Asset():
     def __hash__(self) -> int:
         return hash(self.ticker)
 
+    @classmethod
+    def from_frames(cls, ticker: str, daily: DataFrame, five_minute: Optional[DataFrame] = None, *,
+                    asset_type: str, currency: str, sector: Optional[str] = None,
+                    timezone: Optional[str] = None) -> 'Asset':
+        '''Builds an asset from price frames that are already loaded, without touching the store
+
+        Args:
+            ticker (str): ticker string from yfinance
+            daily (pandas.core.frame.DataFrame): daily prices with return columns
+            five_minute (pandas.core.frame.DataFrame, optional): five minute prices, defaults to daily
+            asset_type (str): asset type from the metadata
+            currency (str): price currency
+            sector (str, optional): sector from the metadata
+            timezone (str, optional): exchange timezone
+
+        Returns:
+            Asset: asset backed by the given frames
+        '''
+        asset = cls.__new__(cls)
+        asset.ticker = ticker
+        asset.asset_type, asset.currency, asset.sector, asset.timezone = asset_type, currency, sector, timezone
+        asset.daily = daily
+        asset.five_minute = daily if five_minute is None else five_minute
+        return asset
+
     def __get_data(self) -> None:
-        """Gets data from the database and calculate additional columns
+        """Gets data from the local price store and calculate additional columns
 
-        - Tries to query db for ticker data
+        - Tries to read ticker data from the store, which syncs new rows from the db
         - If not available, add new data
         - Calculate returns and log returns
         - Store ticker metadata
         """
-        # query db and check if ticker exists
-
-        sb = Client(SUPABASE_URL, SUPABASE_KEY)
-
-        metadata = sb.table('tickers').select('asset_type, currency, sector, timezone').eq('ticker', self.ticker).execute().data
-        if not metadata:
+        # query local store (or db) and check if ticker exists
+        metadata = price_store.read_metadata(self.ticker)
+        if metadata is None:
             insert_new_ticker(self.ticker)
-            metadata = sb.table('tickers').select('asset_type, currency, sector, timezone').eq('ticker', self.ticker).execute().data
-        metadata = metadata[0]
+            metadata = price_store.read_metadata(self.ticker)
         self.asset_type, self.currency, self.sector, self.timezone = metadata.values()
 
         # reindex data and calculate returns and log returns
         for i, table in enumerate(['daily', 'five_minute']):
-            data = sb.table(table).select('date, open, high, low, close, adj_close, volume').eq('ticker', self.ticker).execute().data
             if table == 'five_minute' and self.asset_type == 'Mutual Fund':
                 self.five_minute = self.daily
                 continue
-            df = pd.DataFrame(data).set_index('date')
-            df = df.astype(float)
-            df.index = pd.to_datetime(df.index)
-            df = df.sort_index()
+            df = price_store.read_prices(self.ticker, table)
             df['log_rets'] = np.log(df['adj_close'] / df['adj_close'].shift(1))
             df['rets'] = df['adj_close'].pct_change()
 
@@ -97,6 +144,60 @@ class Asset():
             else:
                 self.five_minute = df
 
+    def refresh(self) -> bool:
+        """Picks up rows the price store has gained since the asset was loaded
+
+        - Appends newer rows and computes returns only for them, so existing rows,
+          and indicators cached for them, stay valid
+        - Reloads a table whose stored history no longer starts where the asset's does
+        - Replaces frames instead of modifying them, since they may be shared
+
+        Returns:
+            bool: whether any data changed
+        """
+        changed = False
+        for table in ['daily', 'five_minute']:
+            if table == 'five_minute' and self.asset_type == 'Mutual Fund':
+                self.five_minute = self.daily
+                continue
+            current = self.daily if table == 'daily' else self.five_minute
+            stored = price_store.read_prices(self.ticker, table)
+
+            n = len(current)
+            if n and len(stored) >= n and stored.index[0] == current.index[0] and stored.index[n - 1] == current.index[-1]:
+                if len(stored) == n:
+                    continue
+                df = self.__append_rows(current, stored.iloc[n:])
+            else:
+                df = stored
+                df['log_rets'] = np.log(df['adj_close'] / df['adj_close'].shift(1))
+                df['rets'] = df['adj_close'].pct_change()
+
+            if table == 'daily':
+                self.daily = df
+            else:
+                self.five_minute = df
+            changed = True
+
+        return changed
+
+    @staticmethod
+    def __append_rows(df: DataFrame, rows: DataFrame) -> DataFrame:
+        """Appends price rows to a frame, continuing its returns from its last adjusted close
+
+        Args:
+            df (pandas.core.frame.DataFrame): frame with return columns
+            rows (pandas.core.frame.DataFrame): newer rows with the price columns
+
+        Returns:
+            pandas.core.frame.DataFrame: new frame with the rows and their returns
+        """
+        rows = rows.copy()
+        adj_close = np.concatenate([df['adj_close'].to_numpy()[-1:], rows['adj_close'].to_numpy()])
+        rows['log_rets'] = np.log(adj_close[1:] / adj_close[:-1])
+        rows['rets'] = adj_close[1:] / adj_close[:-1] - 1
+        return pd.concat([df, rows[df.columns]])
+
     def __clean_data(self, df: DataFrame) -> DataFrame:
         """Cleans OHLC data to ensure data passes db table price checks
 
@@ -498,6 +599,18 @@ class Asset():
 
         return data
 
+    def price_asof(self, dates: DateLike | list[DateLike] | np.ndarray | pd.Index, column: str = 'adj_close') -> float | np.ndarray:
+        """Daily price on or before each date, carrying the last price over non-trading days
+
+        Args:
+            dates (DateLike | array-like): one date or an array of dates
+            column (str, optional): price column to use. Defaults to 'adj_close'
+
+        Returns:
+            float | numpy.ndarray: price for a single date, or array of prices in the order of dates
+        """
+        return asof(self.daily, dates, column)
+
     def rolling_stats(self, *, window: int = 20, five_min: bool = False, r: float = 0., ewm: bool = False, 
                        alpha: Optional[float] = None, halflife: Optional[float] = None, bollinger_bands: bool = False, 
                        num_std: float = 2., sharpe_ratio: bool = False) -> DataFrame:
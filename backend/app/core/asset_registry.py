@@ -0,0 +1,193 @@
+''' Process-wide registry of loaded assets
+Every router and Portfolio gets assets from here so each ticker is loaded
+once per process and its frames are shared instead of copied
+- memory budget with least recently used eviction
+- single-flight loading of concurrent requests for a ticker
+- hit, miss and eviction counters
+- currency-converted views cached per (ticker, currency) and shared across portfolios
+- refresh appends rows stored since an asset was loaded without reloading it
+- entries older than the price store's SYNC_INTERVAL are refreshed when next accessed
+
+Shared assets are read-only: callers must copy frames before modifying them
+'''
+
+import copy
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.core.frame import DataFrame
+
+from app.core.asset import Asset, DateLike, asof
+from app.core.cache import LRUCache, nbytes
+from app.database import price_store
+
+MAX_BYTES = int(os.getenv('ASSET_REGISTRY_MAX_BYTES', 512 * 1024 ** 2))
+
+
+def _size(value: Asset | DataFrame) -> int:
+    if not isinstance(value, Asset):
+        return nbytes(value)
+    asset = value
+    frames = {id(f): f for f in (getattr(asset, 'daily', None), getattr(asset, 'five_minute', None)) if f is not None}
+    return sum(int(f.memory_usage(index=True).sum()) for f in frames.values())
+
+
+class AssetRegistry():
+    ''' Shares one loaded Asset per ticker across the process
+    '''
+
+    def __init__(self, max_bytes: int = MAX_BYTES) -> None:
+        """Creates an empty registry
+
+        Args:
+            max_bytes (int, optional): memory budget for the cached frames. Defaults to MAX_BYTES
+        """
+        self._assets = LRUCache(max_bytes, sizeof=_size)
+        self._refresh_lock = threading.Lock()
+        self._synced = {}  # key -> time.monotonic() of its last load or refresh, for keys still cached
+        self._synced_lock = threading.Lock()
+
+    def _load(self, key, load):
+        loaded = []
+        def timed():
+            loaded.append(True)
+            return load()
+        value = self._assets.get_or_load(key, timed)
+        if loaded:
+            self._mark_synced(key, prune=True)
+        return value
+
+    def _mark_synced(self, key, prune: bool = False) -> None:
+        with self._synced_lock:
+            self._synced[key] = time.monotonic()
+            if prune:
+                # loads are rare, so they also forget the keys the cache has evicted since
+                for stale in [k for k in self._synced if k not in self._assets]:
+                    del self._synced[stale]
+
+    def _is_stale(self, key) -> bool:
+        synced = self._synced.get(key)
+        return synced is not None and time.monotonic() - synced > price_store.SYNC_INTERVAL
+
+    def get(self, ticker: str) -> Asset:
+        """Gets the shared Asset for a ticker, loading it on first use
+
+        Assets loaded more than SYNC_INTERVAL ago are refreshed first
+
+        Args:
+            ticker (str): ticker string from yfinance
+
+        Returns:
+            Asset: shared, read-only asset
+        """
+        asset = self._load(ticker, lambda: Asset(ticker))
+        if self._is_stale(ticker):
+            asset = self.refresh(ticker)
+        return asset
+
+    def get_converted(self, ticker: str, currency: str) -> Asset:
+        """Gets a daily-only view of an asset with prices in another currency
+
+        Converted prices are computed once per (ticker, currency) and shared,
+        and recomputed when the asset or the exchange rates they used are refreshed.
+        The shared asset's own frames are never modified.
+
+        Args:
+            ticker (str): ticker string from yfinance
+            currency (str): currency to express prices in
+
+        Returns:
+            Asset: read-only view with converted daily data and currency
+        """
+        asset = self.get(ticker)
+        if asset.currency == currency:
+            return _daily_view(asset, asset.daily, currency)
+        # syncing the rates drops views converted with older ones
+        self.get_forex(f'{asset.currency}/{currency}')
+        return self._assets.get_or_load((ticker, asset.currency, currency), lambda: self._convert(asset, currency))
+
+    def get_forex(self, pair: str) -> DataFrame:
+        """Gets the daily rates of a currency pair, e.g. 'USD/GBP', re-read after SYNC_INTERVAL"""
+        key = ('forex', pair)
+        forex = self._load(key, lambda: price_store.read_prices(pair, 'daily_forex'))
+        if self._is_stale(key):
+            with self._refresh_lock:
+                stored = price_store.read_prices(pair, 'daily_forex')
+                if not stored.equals(forex):
+                    forex = stored
+                    self._assets.put(key, forex)
+                    source, target = pair.split('/')
+                    self._drop_converted(lambda k: k[1] == source and k[2] == target)
+                self._mark_synced(key)
+        return forex
+
+    def forex_asof(self, pair: str, dates: DateLike | list[DateLike] | np.ndarray | pd.Index) -> float | np.ndarray:
+        """Gets the closing rate of a currency pair on or before each date"""
+        return asof(self.get_forex(pair), dates, 'close')
+
+    def _convert(self, asset: Asset, currency: str) -> Asset:
+        forex = self.get_forex(f'{asset.currency}/{currency}')
+
+        daily = asset.daily.copy()
+        frx = forex['close'].reindex(daily.index, method='ffill')
+        daily[['open', 'high', 'low', 'close', 'adj_close']] = daily[['open', 'high', 'low', 'close', 'adj_close']].mul(frx, axis=0)
+        daily['log_rets'] = np.log(daily['adj_close'] / daily['adj_close'].shift(1))
+        daily['rets'] = daily['adj_close'].pct_change(fill_method=None)
+
+        return _daily_view(asset, daily, currency)
+
+    def refresh(self, ticker: str) -> Asset:
+        """Gets the shared Asset for a ticker with any rows stored since it was loaded
+
+        Converted views of the ticker are dropped when its daily data changes
+
+        Args:
+            ticker (str): ticker string from yfinance
+
+        Returns:
+            Asset: shared, read-only asset
+        """
+        asset = self._load(ticker, lambda: Asset(ticker))
+        with self._refresh_lock:
+            daily = asset.daily
+            if asset.refresh():
+                self._assets.put(ticker, asset)  # measure the new frames
+                if asset.daily is not daily:
+                    self._drop_converted(lambda k: k[0] == ticker)
+            self._mark_synced(ticker)
+        return asset
+
+    def _drop_converted(self, match) -> None:
+        # converted views are keyed (ticker, asset currency, currency), forex rates ('forex', pair)
+        for key, _ in self._assets.items():
+            if isinstance(key, tuple) and len(key) == 3 and match(key):
+                self._assets.pop(key)
+
+    def evict(self, ticker: str) -> None:
+        self._assets.pop(ticker)
+        with self._synced_lock:
+            self._synced.pop(ticker, None)
+
+    def stats(self) -> dict:
+        return self._assets.stats()
+
+
+def _daily_view(asset: Asset, daily: DataFrame, currency: str) -> Asset:
+    # shallow copy sharing metadata with the registry asset, without five minute data
+    view = copy.copy(asset)
+    if hasattr(view, 'five_minute'):
+        del view.five_minute
+    view.daily = daily
+    view.currency = currency
+    return view
+
+
+registry = AssetRegistry()
+
+
+def get_asset(asset_ticker: str) -> Asset:
+    """Router dependency returning the shared asset for a ticker"""
+    return registry.get(asset_ticker)
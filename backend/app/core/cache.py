@@ -0,0 +1,165 @@
+''' Thread-safe, size-bounded LRU cache shared by the core modules
+- evicts least recently used entries once the size budget is exceeded
+- single-flight loading so concurrent misses on a key share one load
+- hit, miss and eviction counters
+'''
+
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable
+
+import numpy as np
+import pandas as pd
+
+
+def nbytes(obj: Any) -> int:
+    """Estimates the memory held by a cached value
+
+    Args:
+        obj (Any): value to measure, frames and arrays are measured exactly
+
+    Returns:
+        int: size in bytes
+    """
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, (tuple, list)):
+        return sum(nbytes(o) for o in obj)
+    return sys.getsizeof(obj)
+
+
+class LRUCache():
+    ''' Least recently used cache bounded by the total size of its values
+    - sizes come from the sizeof function, which defaults to byte size
+    - pass sizeof=lambda _: 1 to bound the number of entries instead
+    '''
+
+    def __init__(self, max_size: int, sizeof: Callable[[Any], int] = nbytes) -> None:
+        """Creates an empty cache
+
+        Args:
+            max_size (int): total size budget of the cached values
+            sizeof (Callable[[Any], int], optional): size of a single value. Defaults to nbytes
+        """
+        self.max_size = max_size
+        self.sizeof = sizeof
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._inflight = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = self.sizeof(value)
+        with self._lock:
+            if key in self._data:
+                self.size -= self._sizes.pop(key)
+                del self._data[key]
+            self._data[key] = value
+            self._sizes[key] = size
+            self.size += size
+            self._evict()
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return default
+            self.size -= self._sizes.pop(key)
+            return self._data.pop(key)
+
+    def items(self) -> list[tuple[Hashable, Any]]:
+        """Snapshot of the cached entries, least recently used first"""
+        with self._lock:
+            return list(self._data.items())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.size = 0
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Gets a value, loading it on a miss
+
+        Concurrent misses on the same key wait for the first caller's load
+        instead of loading the value again
+
+        Args:
+            key (Hashable): cache key
+            loader (Callable[[], Any]): builds the value on a miss
+
+        Returns:
+            Any: cached or freshly loaded value
+        """
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                self.misses += 1
+                future = self._inflight[key] = Future()
+            else:
+                self.hits += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        self.put(key, value)
+        with self._lock:
+            del self._inflight[key]
+        future.set_result(value)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._data),
+                'size': self.size,
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def _evict(self) -> None:
+        # always keep the newest entry, even if it alone is over budget
+        while self.size > self.max_size and len(self._data) > 1:
+            key, _ = self._data.popitem(last=False)
+            self.size -= self._sizes.pop(key)
+            self.evictions += 1
@@ -1,6 +1,9 @@
 import numpy as np
 import pandas as pd
 from app.core.asset import Asset
+from app.core.asset_registry import registry
+from app.core.portfolio_stats import return_stats
+from app.core.returns_matrix import ReturnsMatrix, matrix_key
 from collections import Counter, defaultdict, namedtuple
 import psycopg as pg
 import datetime
@@ -12,7 +15,7 @@ import json
 from dotenv import load_dotenv
 import os
 from itertools import cycle, islice
-from supabase import Client
+import copy
 
 load_dotenv()
 
@@ -30,6 +33,224 @@ DateLike = str | datetime.datetime | datetime.date | pd.Timestamp
 
 transaction = namedtuple('transaction', ['type', 'asset', 'shares', 'value', 'profit', 'date', 'id'])
 
+# layout of the pickled state, bumped when the fields of __getstate__ change
+STATE_VERSION = 1
+
+
+def drawdown_episodes(drawdowns: pd.Series) -> pd.DataFrame:
+    """Finds every drawdown episode of a drawdown series in one vectorized pass
+
+    An episode starts when the drawdown goes below zero and recovers at the next zero.
+    The bottom is the first date the episode reaches its minimum.
+
+    Args:
+        drawdowns (pd.Series): non-positive drawdowns indexed by date
+
+    Returns:
+        pd.DataFrame: start, bottom, recovery, depth, time_to_recovery and duration of each episode,
+            with no recovery for an episode still open at the end of the series
+    """
+    dd = drawdowns.to_numpy()
+    dates = drawdowns.index
+    under = dd < 0
+    if not under.any():
+        return pd.DataFrame()
+
+    # runs of negative drawdowns, each recovering at the first zero after the run
+    prev_under = np.concatenate(([False], under[:-1]))
+    starts = np.flatnonzero(under & ~prev_under)
+    ends = np.flatnonzero(~under & prev_under)
+    is_open = len(ends) < len(starts)
+
+    # first position of each run's minimum
+    episode = np.cumsum(under & ~prev_under) - 1
+    depth = np.minimum.reduceat(dd, starts)
+    at_min = (episode >= 0) & (dd == depth[np.maximum(episode, 0)])
+    bottoms = np.flatnonzero(at_min)[np.unique(episode[at_min], return_index=True)[1]]
+
+    days = lambda a, b: ((dates[a] - dates[b]) // pd.Timedelta(days=1)).to_numpy()
+    last = np.append(ends, len(dd) - 1) if is_open else ends
+    recovery = list(dates[ends]) + [None] * is_open
+    time_to_recovery = list(days(ends, bottoms[:len(ends)])) + [None] * is_open
+
+    return pd.DataFrame({
+        'start': dates[starts],
+        'bottom': dates[bottoms],
+        'recovery': recovery,
+        'depth': depth,
+        'time_to_recovery': time_to_recovery,
+        'duration': days(last, starts),
+    })
+
+
+class EquityCurve:
+    """Daily deposits, cash and holdings value of a portfolio, built from its transactions
+
+    Built once per transaction version and extended in place when a transaction
+    is appended on or after the last one, so repeated metric calls share one curve
+    """
+
+    def __init__(self, transactions: list[transaction], version: int) -> None:
+        self.version = version
+        self.n_transactions = len(transactions)
+        self.built_on = datetime.date.today()
+        self._derived = {}
+
+        if not transactions:
+            self.deposits, self.cash, self.values = pd.Series(), pd.Series(), pd.Series()
+            self.index = None
+            return
+
+        # Sort transactions by date
+        sorted_transactions = sorted(transactions, key=lambda x: x.date)
+
+        # Create a DataFrame of holdings changes
+        holdings_changes = {}
+        current_holdings = defaultdict(float)
+        running_deposit = defaultdict(float)
+        cash = defaultdict(float)
+
+        has_crypto = False
+        for t in sorted_transactions:
+            if type(t.asset) != str:
+                if t.asset.asset_type == 'Cryptocurrency':
+                    has_crypto = True
+            if t.type == 'BUY':
+                current_holdings[t.asset] += t.shares
+                cash[t.date] -= t.value
+            elif t.type == 'SELL':
+                current_holdings[t.asset] -= t.shares
+                cash[t.date] += t.value
+            elif t.type == 'DEPOSIT':
+                running_deposit[t.date] += t.value
+                cash[t.date] += t.value
+            elif t.type == 'WITHDRAW':
+                running_deposit[t.date] -= t.value
+                cash[t.date] -= t.value
+            holdings_changes[t.date[:10]] = dict(current_holdings)
+
+        running_deposit = pd.Series(running_deposit)
+        cash = pd.Series(cash)
+        running_deposit.index = pd.to_datetime(running_deposit.index)
+        cash.index = pd.to_datetime(cash.index)
+
+        # Convert to DataFrame and forward fill
+        holdings_df = pd.DataFrame.from_dict(holdings_changes, orient='index').fillna(0)
+        holdings_df.index = pd.to_datetime(holdings_df.index)
+        if holdings_df.empty:
+            earliest_date = min(cash.index[0], running_deposit.index[0])
+        else:
+            earliest_date = min(cash.index[0], running_deposit.index[0], holdings_df.index[0])
+        holdings_df = holdings_df.reindex(
+            pd.date_range(start=earliest_date.date(), end=pd.Timestamp.today(), freq=('D' if has_crypto else 'B'))
+        ).ffill()
+
+        running_deposit = running_deposit.reindex(holdings_df.index).fillna(0).cumsum()
+        cash = cash.reindex(holdings_df.index).fillna(0).cumsum()
+
+        prices = pd.DataFrame(index=holdings_df.index)
+        for ast in holdings_df.columns:
+            prices[ast] = ast.daily['adj_close']
+        prices = prices.ffill()
+
+        self.index = holdings_df.index
+        self.has_crypto = has_crypto
+        self.last_date = sorted_transactions[-1].date
+        self.current_holdings = current_holdings
+        self.holdings = holdings_df
+        self.prices = prices
+        self.deposits = running_deposit
+        self.cash = cash
+        self.values = holdings_df.mul(prices).sum(axis=1)
+
+    def __copy__(self) -> 'EquityCurve':
+        # extend updates the holdings in place, so a copy gets its own
+        curve = self.__class__.__new__(self.__class__)
+        curve.__dict__.update(self.__dict__)
+        if self.index is not None:
+            curve.current_holdings = self.current_holdings.copy()
+            curve.holdings = self.holdings.copy()
+            curve.prices = self.prices.copy()
+        curve._derived = dict(self._derived)
+        return curve
+
+    def is_expired(self) -> bool:
+        # the curve runs up to today
+        return self.built_on != datetime.date.today()
+
+    def extend(self, t: transaction, version: int) -> bool:
+        """Applies a newly appended transaction to the curve
+
+        Returns:
+            bool: False if the transaction cannot be applied incrementally and the curve must be rebuilt
+        """
+        if self.index is None or t.date < self.last_date or self.is_expired():
+            return False
+        if type(t.asset) != str and t.asset.asset_type == 'Cryptocurrency' and not self.has_crypto:
+            return False
+
+        # transactions falling outside the curve's calendar need the full rebuild's handling
+        date = pd.Timestamp(t.date)
+        if date not in self.index:
+            return False
+        start = self.index.get_loc(date)
+
+        flow = {'BUY': -t.value, 'SELL': t.value, 'DEPOSIT': t.value, 'WITHDRAW': -t.value}[t.type]
+        cash = self.cash.to_numpy().copy()
+        cash[start:] += flow
+        self.cash = pd.Series(cash, index=self.index)
+        if t.type in ('DEPOSIT', 'WITHDRAW'):
+            deposits = self.deposits.to_numpy().copy()
+            deposits[start:] += flow
+            self.deposits = pd.Series(deposits, index=self.index)
+
+        if t.type in ('BUY', 'SELL'):
+            self.current_holdings[t.asset] += t.shares if t.type == 'BUY' else -t.shares
+            if t.asset not in self.holdings.columns:
+                self.holdings[t.asset] = np.nan
+                self.prices[t.asset] = t.asset.daily['adj_close'].reindex(self.index).ffill()
+
+        # every row from the transaction date holds the latest snapshot
+        if len(self.holdings.columns):
+            self.holdings.iloc[start:] = pd.Series(self.current_holdings)[self.holdings.columns].to_numpy()
+            values = self.values.to_numpy().copy()
+            values[start:] = self.holdings.iloc[start:].mul(self.prices.iloc[start:]).sum(axis=1).to_numpy()
+            self.values = pd.Series(values, index=self.index)
+
+        self.last_date = t.date
+        self.version = version
+        self.n_transactions += 1
+        self._derived = {}
+        return True
+
+    def _cached(self, name: str, compute) -> pd.Series:
+        if name not in self._derived:
+            self._derived[name] = compute()
+        return self._derived[name]
+
+    @property
+    def pnls(self) -> pd.Series:
+        return self._cached('pnls', lambda: (self.values + self.cash - self.deposits).diff())
+
+    @property
+    def returns(self) -> pd.Series:
+        def compute():
+            rets = (self.values + self.cash) / self.deposits
+            return rets.pct_change().dropna()
+        return self._cached('returns', compute)
+
+    @property
+    def drawdowns(self) -> pd.Series:
+        def compute():
+            cum_rets = (1 + self.returns).cumprod()
+            drawdown = (cum_rets / cum_rets.cummax() - 1)
+            return drawdown.dropna()
+        return self._cached('drawdowns', compute)
+
+    @property
+    def drawdown_df(self) -> pd.DataFrame:
+        return self._cached('drawdown_df', lambda: drawdown_episodes(self.drawdowns))
+
 
 class Portfolio:
 
@@ -39,24 +260,23 @@ class Portfolio:
         self.cost_bases = defaultdict(float)
         self.transactions = []
         self.assets = []
-        self.forex_cache = {}
         self.asset_mapping = {}
         self.r = r
         self.cash = 0.0
         self.id = 0
+        self._version = 0
+        self._curve = None
+        self._matrices = {}
 
         if assets:  # Only process if assets provided
-            self.assets.extend([Asset(holdings['asset']) for holdings in assets])  # store copy of assets
+            shared = [registry.get(holdings['asset']) for holdings in assets]
 
             if currency is None:
-                self.currency = Counter((ast.currency for ast in self.assets)).most_common()[0][0]
+                self.currency = Counter((ast.currency for ast in shared)).most_common()[0][0]
             else:
                 self.currency = currency
 
-            for ast in self.assets:
-                del ast.five_minute
-                if ast.currency != self.currency:
-                    self._convert_ast(ast)
+            self.assets.extend([self._convert_ast(ast) for ast in shared])
 
             for i, ast in enumerate(self.assets):
                 self.holdings[ast] = assets[i]['shares']
@@ -69,49 +289,80 @@ class Portfolio:
             if cash is not None:
                 self.cash = cash
 
-        self.market = Asset('SPY')
-        self._convert_ast(self.market)
+        self.market = self._convert_ast(registry.get('SPY'))
 
-    def _convert_price(self, price: float, currency: str, date: DateLike | None = None) -> float:
-        date = self._parse_date(date)[:10]
-
-        f = currency
-        t = self.currency
-        key = f'{f}/{t}'
-        while True:
-            if date in self.forex_cache[key].index:
-                rate = self.forex_cache[key].loc[date, 'close']
-                break
-            else:
-                date_obj = datetime.datetime.strptime(date, '%Y-%m-%d')
-                date_obj -= datetime.timedelta(days=1)
-                date = date_obj.strftime('%Y-%m-%d')
+    def __getstate__(self) -> dict:
+        # identity and state only, like save(): assets are kept by ticker and re-attached
+        # from the registry on load, the equity curve and returns matrices are rebuilt on demand
+        return {
+            'schema': STATE_VERSION,
+            'currency': self.currency,
+            'r': self.r,
+            'cash': self.cash,
+            'id': self.id,
+            'version': self._version,
+            'assets': [ast.ticker for ast in self.assets],
+            'holdings': {ast.ticker: v for ast, v in self.holdings.items()},
+            'cost_bases': {ast.ticker: v for ast, v in self.cost_bases.items()},
+            'transactions': [tuple(t._replace(asset=t.asset.ticker)) if isinstance(t.asset, Asset) else tuple(t)
+                             for t in self.transactions],
+        }
 
-        return float(price * rate)
+    def __copy__(self) -> 'Portfolio':
+        # shares the read-only assets, copies everything transactions modify
+        port = self.__class__.__new__(self.__class__)
+        port.__dict__.update(self.__dict__)
+        port.holdings = self.holdings.copy()
+        port.cost_bases = self.cost_bases.copy()
+        port.transactions = list(self.transactions)
+        port.assets = list(self.assets)
+        port.asset_mapping = dict(self.asset_mapping)
+        port._curve = copy.copy(self._curve)
+        port._matrices = dict(self._matrices)
+        return port
 
-    def _convert_ast(self, asset: Asset) -> None:
-        f = asset.currency
-        t = self.currency
-        if f == t:
+    def __setstate__(self, state: dict) -> None:
+        if 'schema' not in state:  # full state pickled before the slim layout
+            state.setdefault('_version', 0)
+            state.setdefault('_curve', None)
+            state.setdefault('_matrices', {})
+            self.__dict__.update(state)
             return
-        key = f'{f}/{t}'
-        if key not in self.forex_cache:
-            sb = Client(SUPABASE_URL, SUPABASE_KEY)
-            forex = sb.table('daily_forex').select('currency_pair, date, close').eq('currency_pair', key).execute().data
-            forex = pd.DataFrame(forex).set_index('date')
-            forex.index = pd.to_datetime(forex.index)
-            forex = forex.sort_index()
-            forex['close'] = forex['close'].astype(float)
-            self.forex_cache[key] = forex
-
-        forex = self.forex_cache[key]
-
-        frx = forex.reindex_like(asset.daily, method='ffill')[['close']]
-        asset.daily[['open', 'high', 'low', 'close', 'adj_close']] = asset.daily[['open', 'high', 'low', 'close', 'adj_close']].mul(frx['close'], axis=0)
-        asset.daily['log_rets'] = np.log(asset.daily['adj_close'] / asset.daily['adj_close'].shift(1))
-        asset.daily['rets'] = asset.daily['adj_close'].pct_change(fill_method=None)
-
-        asset.currency = self.currency
+        if state['schema'] != STATE_VERSION:
+            raise ValueError(f'Unsupported portfolio state version: {state["schema"]}')
+
+        self.currency = state['currency']
+        self.r = state['r']
+        self.cash = state['cash']
+        self.id = state['id']
+        self._version = state['version']
+        self.asset_mapping = {}
+        self._curve = None
+        self._matrices = {}
+
+        # one view per ticker so holdings, cost bases and transactions share it
+        views = {}
+        def attach(ticker: str) -> Asset:
+            if ticker not in views:
+                views[ticker] = registry.get_converted(ticker, self.currency)
+            return views[ticker]
+
+        self.assets = [attach(ticker) for ticker in state['assets']]
+        self.holdings = defaultdict(float, {attach(ticker): v for ticker, v in state['holdings'].items()})
+        self.cost_bases = defaultdict(float, {attach(ticker): v for ticker, v in state['cost_bases'].items()})
+        self.transactions = [transaction(*t)._replace(asset=attach(t[1])) if t[0] in ('BUY', 'SELL') else transaction(*t)
+                             for t in state['transactions']]
+        self.market = self._convert_ast(registry.get('SPY'))
+
+    def _convert_price(self, price: float | np.ndarray, currency: str, date: DateLike | np.ndarray | None = None) -> float | np.ndarray:
+        if np.ndim(date) == 0:
+            date = self._parse_date(date)
+        rate = registry.forex_asof(f'{currency}/{self.currency}', date)
+        return price * rate if isinstance(rate, np.ndarray) else float(price * rate)
+
+    def _convert_ast(self, asset: Asset) -> Asset:
+        # shared daily-only view with prices in the portfolio currency
+        return registry.get_converted(asset.ticker, self.currency)
 
     def _parse_date(self, date: DateLike | None = None) -> str:
         if date is None:
@@ -128,16 +379,8 @@ class Portfolio:
 
         return date
     
-    def _get_price(self,  ast: Asset, date: str) -> float:
-        date = date[:10]
-        while True:
-            if date in ast.daily.index:
-                price = ast.daily.loc[date, 'adj_close']
-                return price
-            else:
-                date_obj = datetime.datetime.strptime(date, '%Y-%m-%d')
-                date_obj -= datetime.timedelta(days=1)
-                date = date_obj.strftime('%Y-%m-%d')
+    def _get_price(self, ast: Asset, date: DateLike | np.ndarray) -> float | np.ndarray:
+        return ast.price_asof(date)
 
     def deposit(self, value: float, currency: str | None = None, date: DateLike | None = None) -> tuple[transaction, float]:
         date = self._parse_date(date)
@@ -150,7 +393,7 @@ class Portfolio:
         value = round(float(value), 2)
 
         t = transaction('DEPOSIT', 'Cash', 0.0, value, 0., date, self.id)
-        self.transactions.append(t)
+        self._record(t)
         self.cash += value
         self.id += 1
         return t, self.cash
@@ -169,7 +412,7 @@ class Portfolio:
             raise ValueError('Not enough money')
 
         t = transaction('WITHDRAW', 'Cash', 0.0, value, 0., date, self.id)
-        self.transactions.append(t)
+        self._record(t)
         self.cash -= value
         self.id += 1
         return t, self.cash
@@ -183,11 +426,7 @@ class Portfolio:
             currency = self.currency
 
         if asset not in self.assets:
-            ast = Asset(asset.ticker)  # create copy
-            del ast.five_minute
-            if ast.currency != self.currency:
-                self._convert_ast(ast)
-            self.assets.append(ast)
+            self.assets.append(self._convert_ast(asset))
 
         # get price at buy
         idx = self.assets.index(asset)
@@ -213,7 +452,7 @@ class Portfolio:
             raise ValueError('Not enough money')
 
         t = transaction('BUY', ast, round(float(shares), 5), value, 0., date, self.id)
-        self.transactions.append(t)
+        self._record(t)
         old_cost_basis = self.cost_bases[ast] * self.holdings[ast]
         self.holdings[ast] += float(shares)
         self.cost_bases[ast] = (old_cost_basis + value) / self.holdings[ast]
@@ -250,7 +489,7 @@ class Portfolio:
         value = round(float(value), 2)
         profit = (value - (self.cost_bases[ast] * shares))
         t = transaction('SELL', ast, round(float(shares), 5), value, round(float(profit), 2), date, self.id)
-        self.transactions.append(t)
+        self._record(t)
 
         self.holdings[ast] -= float(shares)
         self.cash += value
@@ -417,7 +656,7 @@ class Portfolio:
 
         values = self.holdings_value()
         total_value = sum(values.values())
-        curr_weight = self.weights
+        curr_weight = {ast: v / total_value for ast, v in values.items()}
         weight_diff = {ast: target_weights.get(ast, 0) - curr_weight[ast] for ast in self.assets}
         sorted_assets = sorted(self.assets, key=lambda x: weight_diff[x])
 
@@ -461,7 +700,7 @@ class Portfolio:
         df['time'] = df['time'].dt.date
         df.loc[df['currency'] == 'GBP', 'ticker'] += '.L'
         tickers = list(df['ticker'].dropna().unique())
-        asset_mapping = {ticker: Asset(ticker) for ticker in tickers}
+        asset_mapping = {ticker: registry.get(ticker) for ticker in tickers}
         last_transaction = len(self.transactions)
 
         for _, row in df.iterrows():
@@ -520,7 +759,7 @@ class Portfolio:
         # Combine and sort
         df = pd.concat([cash, inv]).sort_values('Date')
         tickers = list(df['Ticker'].dropna().unique())
-        asset_mapping = {ticker: Asset(ticker) for ticker in tickers}
+        asset_mapping = {ticker: registry.get(ticker) for ticker in tickers}
         last_transaction = len(self.transactions)
 
         for _, row in df.iterrows():
@@ -545,64 +784,63 @@ class Portfolio:
             decimals = 2 if is_currency else 3
             return round(float(value), decimals)
 
-        # Returns & Performance Metrics
+        # Returns, risk and drawdown metrics come from one pass over the returns
         returns = self.returns
-        empty = returns.empty
-        log_returns = np.log1p(returns)
+        market = self.market.daily['rets'].reindex(returns.index)
+        rs = return_stats(returns.to_numpy(), market.to_numpy())
         ann_factor = self.ann_factor
 
         performance_metrics = {
-            'total_returns': round_number(np.exp(log_returns.sum()) - 1) if not empty else 0.,
+            'total_returns': round_number(rs.total_returns),
             'trading_returns': round_number(self.trading_returns),
-            'annualized_returns': round_number(ann_rets := (1 + returns.mean()) ** ann_factor - 1 if not empty else 0.),
+            'annualized_returns': round_number(ann_rets := (1 + rs.mean) ** ann_factor - 1 if rs.n else 0.),
             'daily_returns': {
-                'mean': round_number(returns.mean()) if not empty else 0.,
-                'median': round_number(returns.median()) if not empty else 0.,
-                'std': round_number(returns.std()) if not empty else 0.,
-                'skewness': round_number(stats.skew(returns)) if not empty else 0.,
-                'kurtosis': round_number(stats.kurtosis(returns)) if not empty else 0.,
+                'mean': round_number(rs.mean),
+                'median': round_number(rs.median),
+                'std': round_number(rs.std),
+                'skewness': round_number(rs.skewness),
+                'kurtosis': round_number(rs.kurtosis),
             },
-            'best_day': round_number(returns.max()) if not empty else 0.,
-            'worst_day': round_number(returns.min()) if not empty else 0.,
-            'positive_days': round_number((returns > 0).sum() / len(returns)) if not empty else 0.,
+            'best_day': round_number(rs.best_day),
+            'worst_day': round_number(rs.worst_day),
+            'positive_days': round_number(rs.positive_days),
         }
 
         # Risk Metrics
         daily_rf = self.r / ann_factor
-        mean_excess_returns = (returns - daily_rf).mean() * ann_factor
-        dd = float(np.sqrt(np.mean(np.minimum(returns, 0) ** 2))) if not empty else 0.
-        market = self.market.daily['rets'].reindex(returns.index)
+        mean_excess_returns = (rs.mean - daily_rf) * ann_factor
+        dd = rs.downside_deviation if rs.n else 0.
         value = self.get_value()
-        volatility = returns.std() * np.sqrt(ann_factor)
+        volatility = rs.std * np.sqrt(ann_factor)
 
         risk_metrics = {
-            'volatility': round_number(volatility) if not empty else 0.,
+            'volatility': round_number(volatility),
             'sharpe_ratio': round_number(mean_excess_returns / volatility) if volatility != 0 else 0.,
             'sortino_ratio': round_number(mean_excess_returns / (dd * np.sqrt(ann_factor))) if (dd * np.sqrt(ann_factor)) != 0 else 0.,
             'beta': round_number(beta := self.beta),
-            'value_at_risk': round_number(np.abs(returns.quantile(0.05) * value), True) if not empty else 0.,
-            'tracking_error': round_number(tracking_error := np.std(returns - market)) if not empty else 0.,
-            'information_ratio': round_number(np.mean(returns - market) / tracking_error) if not empty else 0.,
+            'value_at_risk': round_number(np.abs(rs.var_quantile * value), True),
+            'tracking_error': round_number(rs.tracking_error),
+            'information_ratio': round_number(rs.active_mean / rs.tracking_error) if rs.n else 0.,
             'treynor_ratio': round_number(mean_excess_returns / beta) if beta != 0 else 0.,
         }
 
-        # Drawdown Metrics 
-        cum_rets = (1 + returns).cumprod()
+        # Drawdown Metrics
         df = self.drawdown_df
-        drawdowns = self.drawdowns
         min_depth = df['depth'].quantile(0.95) if not df.empty else 0.
+        max_dd = rs.max_drawdown if rs.n else 0.
+        avg_dd = rs.average_drawdown if rs.n else 0.
 
         drawdown_metrics = {
-            'max_drawdown': round_number(max_dd := (cum_rets / cum_rets.cummax() - 1).min() if not empty else 0.),
+            'max_drawdown': round_number(max_dd),
             'longest_drawdown_duration': self.longest_drawdown_duration,
-            'average_drawdown': round_number(avg_dd := drawdowns[drawdowns < 0].mean() if not empty else 0.),
+            'average_drawdown': round_number(avg_dd),
             'average_drawdown_duration': round_number(
                 df[(df['duration'] >= 3) & (-df['depth'] >= np.abs(min_depth))]['duration'].mean()
             ) if not df.empty else 0.,
             'time_to_recovery': round_number(
                 df[(df['duration'] >= 3) & (-df['depth'] >= np.abs(min_depth))]['time_to_recovery'].mean()
             ) if not df.empty else 0.,
-            'drawdown_ratio': round_number(max_dd / avg_dd) if not empty else 0.,
+            'drawdown_ratio': round_number(max_dd / avg_dd) if rs.n else 0.,
             'calmar_ratio': round_number(ann_rets / np.abs(max_dd)) if max_dd != 0 else 0.,
         }
 
@@ -704,77 +942,39 @@ class Portfolio:
         return float(self.trading_pnl() / total_cost_basis) if total_cost_basis else 0.0
 
     def _returns_helper(self) -> tuple[pd.Series, pd.Series, pd.Series]:
-
-        if not self.transactions:
-            return pd.Series(), pd.Series(), pd.Series()
-
-        # Sort transactions by date
-        sorted_transactions = sorted(self.transactions, key=lambda x: x.date)
-
-        # Create a DataFrame of holdings changes
-        holdings_changes = {}
-        current_holdings = defaultdict(float)
-        running_deposit = defaultdict(float)
-        cash = defaultdict(float)
-
-        has_crypto = False
-        for t in sorted_transactions:
-            if type(t.asset) != str:
-                if t.asset.asset_type == 'Cryptocurrency':
-                    has_crypto = True
-            if t.type == 'BUY':
-                current_holdings[t.asset] += t.shares
-                cash[t.date] -= t.value
-            elif t.type == 'SELL':
-                current_holdings[t.asset] -= t.shares
-                cash[t.date] += t.value
-            elif t.type == 'DEPOSIT':
-                running_deposit[t.date] += t.value
-                cash[t.date] += t.value
-            elif t.type == 'WITHDRAW':
-                running_deposit[t.date] -= t.value
-                cash[t.date] -= t.value
-            holdings_changes[t.date[:10]] = dict(current_holdings)
-
-        running_deposit = pd.Series(running_deposit)
-        cash = pd.Series(cash)
-        running_deposit.index = pd.to_datetime(running_deposit.index)
-        cash.index = pd.to_datetime(cash.index)
-
-        # Convert to DataFrame and forward fill
-        holdings_df = pd.DataFrame.from_dict(holdings_changes, orient='index').fillna(0)
-        holdings_df.index = pd.to_datetime(holdings_df.index)
-        if holdings_df.empty:
-            earliest_date = min(cash.index[0], running_deposit.index[0])
-        else:
-            earliest_date = min(cash.index[0], running_deposit.index[0], holdings_df.index[0])
-        holdings_df = holdings_df.reindex(
-            pd.date_range(start=earliest_date.date(), end=pd.Timestamp.today(), freq=('D' if has_crypto else 'B'))
-        ).ffill()
-
-        running_deposit = running_deposit.reindex(holdings_df.index).fillna(0).cumsum()
-        cash = cash.reindex(holdings_df.index).fillna(0).cumsum()
-
-
-        prices = pd.DataFrame(index=holdings_df.index)
-        for ast in holdings_df.columns:
-            prices[ast] = ast.daily['adj_close']
-        prices = prices.ffill()
-
-        portfolio_values = holdings_df.mul(prices).sum(axis=1)
-
-        return running_deposit, cash, portfolio_values
+        curve = self._equity_curve()
+        return curve.deposits, curve.cash, curve.values
+
+    def _equity_curve(self) -> 'EquityCurve':
+        curve = self._curve
+        if (curve is None or curve.version != self._version
+                or curve.n_transactions != len(self.transactions) or curve.is_expired()):
+            curve = self._curve = EquityCurve(self.transactions, self._version)
+        return curve
+
+    def _record(self, t: transaction) -> None:
+        # extend the cached equity curve with the new transaction instead of dropping it
+        self.transactions.append(t)
+        self._version += 1
+        curve = self._curve
+        if curve is not None and not (curve.n_transactions == len(self.transactions) - 1 and curve.extend(t, self._version)):
+            self._curve = None
+
+    def _returns_matrix(self, column: str = 'rets', benchmark: Asset | None = None) -> ReturnsMatrix:
+        # rebuilt only when the held assets or their prices change
+        key = matrix_key(self.assets, column, benchmark)
+        matrix = self._matrices.get((column, benchmark is not None))
+        if matrix is None or matrix.key != key:
+            matrix = self._matrices[(column, benchmark is not None)] = ReturnsMatrix(self.assets, column, benchmark)
+        return matrix
 
     @property
     def pnls(self) -> pd.Series:
-        deps, cash, values = self._returns_helper()
-        return (values + cash - deps).diff()
+        return self._equity_curve().pnls
 
     @property
     def returns(self) -> pd.Series:
-        deps, cash, values = self._returns_helper()
-        rets = (values + cash) / deps
-        return rets.pct_change().dropna()
+        return self._equity_curve().returns
 
     @property
     def log_returns(self) -> pd.Series:
@@ -886,11 +1086,14 @@ class Portfolio:
         return {ast: float(pnl[ast] / (self.holdings[ast] * self.cost_bases[ast]))
                 for ast in self.assets}
 
-    def holdings_value(self, date: DateLike | None = None) -> dict:
-        """Market value of each holdings at date"""
-        date = self._parse_date(date)[:10]
+    def holdings_value(self, date: DateLike | np.ndarray | None = None) -> dict:
+        """Market value of each holdings at date, or array of values for an array of dates"""
+        if np.ndim(date) == 0:
+            date = self._parse_date(date)[:10]
+            return {asset: float(self._get_price(asset, date) * shares)
+                    for asset, shares in self.holdings.items()}
 
-        return {asset: float(self._get_price(asset, date) * shares)
+        return {asset: self._get_price(asset, date) * shares
                 for asset, shares in self.holdings.items()}
 
     @property
@@ -975,30 +1178,14 @@ class Portfolio:
 
     @property
     def beta(self) -> float:
-        market = self.market
-        df = pd.DataFrame(index=pd.date_range(start='2020-01-01', end=pd.Timestamp.today()))
-        has_crypto = False
-        df['market'] = market.daily['log_rets']
-        for ast in self.assets:
-            df[ast] = ast.daily['log_rets']
-            if ast.asset_type == 'Cryptocurrency':
-                has_crypto = True
-
-        df = df.ffill() if has_crypto else df.dropna()
-
-        df = df.dropna().resample('ME').agg('sum')
-        df = np.exp(df)
-
-        betas = {}
-        market_var = df['market'].var()
-        for col in df.columns:
-            if str(col) == 'market':
-                continue
-            beta = df[col].cov(df['market']) / market_var
-            betas[col] = float(beta)
+        if not self.assets:
+            return 0
+        has_crypto = any(ast.asset_type == 'Cryptocurrency' for ast in self.assets)
+        matrix = self._returns_matrix('log_rets', benchmark=self.market)
+        betas = matrix.monthly_betas('2020-01-01', pd.Timestamp.today().normalize(), has_crypto)
 
         weights = self.weights
-        return sum(weights[ast] * betas[ast] for ast in self.assets)
+        return sum(weights[ast] * float(beta) for ast, beta in zip(self.assets, betas))
 
     def VaR(self, confidence: float = 0.95) -> float:
         returns = self.returns
@@ -1009,11 +1196,8 @@ class Portfolio:
     def correlation_matrix(self) -> go.Figure | None:
         if len(self.assets) < 2:
             return None
-        df = pd.DataFrame()
-        for ast in self.assets:
-            df[ast.ticker] = ast.daily['rets']
-
-        corr_matrix = df.corr()
+        tickers = [ast.ticker for ast in self.assets]
+        corr_matrix = pd.DataFrame(self._returns_matrix().corr(), index=tickers, columns=tickers)
         
         # Create mask for upper triangle
         mask = np.zeros_like(corr_matrix, dtype=bool)
@@ -1054,15 +1238,10 @@ class Portfolio:
     def risk_decomposition(self)  -> go.Figure | None:
         if len(self.assets) < 2:
             return None
-        df = pd.DataFrame()
         port_weights = self.weights
-        weights = []
-        for ast in self.assets:
-            df[ast] = ast.daily['rets']
-            weights.append(port_weights[ast])
-        weights = np.array(weights)
+        weights = np.array([port_weights[ast] for ast in self.assets])
 
-        cov = df.cov() * self.ann_factor
+        cov = self._returns_matrix().cov() * self.ann_factor
         port_vol = np.sqrt(weights.T @ cov @ weights)
         marginal_risk = (cov @ weights) / port_vol
         component_risk = marginal_risk * weights
@@ -1194,9 +1373,7 @@ class Portfolio:
 
     @property
     def drawdowns(self) -> pd.Series:
-        cum_rets = (1 + self.returns).cumprod()
-        drawdown = (cum_rets / cum_rets.cummax() - 1)
-        return drawdown.dropna()
+        return self._equity_curve().drawdowns
 
     @property
     def longest_drawdown_duration(self) -> dict:
@@ -1271,54 +1448,7 @@ class Portfolio:
 
     @property
     def drawdown_df(self) -> pd.DataFrame:
-        drawdown_series = self.drawdowns
-        # Initialize variables
-        in_drawdown = False
-        drawdown_start = None
-        bottom_date = None
-        current_bottom = 0
-        recovery_periods = []
-
-        for date, dd in drawdown_series.items():
-            # New drawdown starts
-            if not in_drawdown and dd < 0:
-                in_drawdown = True
-                drawdown_start = date
-                bottom_date = date
-                current_bottom = dd
-
-            # During drawdown
-            elif in_drawdown:
-                # Update bottom if we go lower
-                if dd < current_bottom:
-                    bottom_date = date
-                    current_bottom = dd
-
-                # Recovery found
-                if dd == 0:
-                    recovery_date = date
-                    in_drawdown = False
-                    recovery_periods.append({
-                        'start': drawdown_start,
-                        'bottom': bottom_date,
-                        'recovery': recovery_date,
-                        'depth': current_bottom,
-                        'time_to_recovery': (recovery_date - bottom_date).days,
-                        'duration': (recovery_date - drawdown_start).days
-                    })
-
-        # If still in drawdown at end of series
-        if in_drawdown:
-            recovery_periods.append({
-                'start': drawdown_start,
-                'bottom': bottom_date,
-                'recovery': None,
-                'depth': current_bottom,
-                'time_to_recovery': None,
-                'duration': (date - drawdown_start).days
-            })
-
-        return pd.DataFrame(recovery_periods)
+        return self._equity_curve().drawdown_df
 
     @property
     def calmar_ratio(self) -> float:
@@ -1403,12 +1533,7 @@ class Portfolio:
         # update state
         port.cash = state['cash']
         port.id = state['id']
-        port.assets = [Asset(ast) for ast in state['assets']]
-
-        for ast in port.assets:
-            del ast.five_minute
-            if ast.currency != port.currency:
-                port._convert_ast(ast)
+        port.assets = [registry.get_converted(ast, port.currency) for ast in state['assets']]
 
         holdings = state['holdings']
         port.holdings.update({ast: holdings[ast.ticker] for ast in port.assets})
@@ -1419,9 +1544,7 @@ class Portfolio:
                 idx = tickers.index(ticker)
                 port.cost_bases[port.assets[idx]] = state['cost_bases'][ticker]
             else:
-                ast = Asset(ticker)
-                if ast.currency != port.currency:
-                    port._convert_ast(ast)
+                ast = registry.get_converted(ticker, port.currency)
                 port.cost_bases[ast] = state['cost_bases'][ticker]
 
         # update transactions
@@ -1434,6 +1557,7 @@ class Portfolio:
             t_list.append(t)
 
         port.transactions = t_list
+        port._version += 1
 
         return port
 
@@ -10,8 +10,9 @@ class PortfolioOptimizer():
 
     def __init__(self, portfolio: Portfolio, min_alloc: float = 0., max_alloc: float = 1.):
 
-        self.data = pd.DataFrame({asset: asset.daily['adj_close'] for asset in portfolio.assets}).dropna()
-        self.rets = pd.DataFrame({asset: asset.daily['log_rets'] for asset in portfolio.assets}).dropna()
+        matrix = portfolio._returns_matrix('log_rets')
+        self.rets = matrix.complete_frame()
+        self.mean_rets = self.rets.mean().to_numpy()
 
         weights = portfolio.weights
         self.weights = np.array([weights[asset] for asset in self.rets.columns])
@@ -21,6 +22,7 @@ class PortfolioOptimizer():
         self.min_alloc = min_alloc
         self.max_alloc = max_alloc
         self.ann_factor = 365 if all(a.asset_type == 'Cryptocurrency' for a in portfolio.assets) else 252
+        self.cov_matrix = matrix.complete_cov() * self.ann_factor
 
         self.optimize_sharpe()
         self.opt_sharpe_ratio = -self.opt_sharpe.fun
@@ -57,7 +59,7 @@ class PortfolioOptimizer():
         else:
             weights = np.array(weights)
 
-        rets = np.array(self.rets.mean())
+        rets = self.mean_rets
         if weights.ndim == 1:
             return float(np.sum(rets * weights) * self.ann_factor)
         else:
@@ -68,7 +70,7 @@ class PortfolioOptimizer():
             weights = self.weights
         else:
             weights = np.array(weights)
-        cov_matrix = self.rets.cov() * self.ann_factor
+        cov_matrix = self.cov_matrix
 
         if weights.ndim == 1:
             return float(np.sqrt(np.sum(weights * (weights @ cov_matrix))))
@@ -0,0 +1,109 @@
+''' Fused statistics kernel for portfolio returns
+Computes every returns-based metric of Portfolio.stats from one pass over
+the returns and benchmark arrays instead of separate pandas and scipy calls
+- moments share one set of deviations from the mean
+- median, best/worst day and value at risk share one sort
+- drawdowns share one cumulative wealth curve
+'''
+
+from typing import NamedTuple
+
+import numpy as np
+
+
+class ReturnStats(NamedTuple):
+    ''' Returns-based portfolio metrics, NaN where a metric is undefined
+    '''
+    n: int
+    total_returns: float
+    mean: float
+    median: float
+    std: float
+    skewness: float
+    kurtosis: float
+    best_day: float
+    worst_day: float
+    positive_days: float
+    downside_deviation: float
+    var_quantile: float
+    active_mean: float
+    tracking_error: float
+    max_drawdown: float
+    average_drawdown: float
+
+
+EMPTY = ReturnStats(0, *[np.nan] * (len(ReturnStats._fields) - 1))
+
+
+def _quantile(sorted_values: np.ndarray, q: float) -> float:
+    # linear interpolation, same as pandas' and numpy's default
+    pos = q * (len(sorted_values) - 1)
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return float(sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo))
+
+
+def return_stats(returns: np.ndarray, benchmark: np.ndarray | None = None, var_level: float = 0.05) -> ReturnStats:
+    """Computes the returns-based metrics of a portfolio
+
+    - std is the sample standard deviation, skewness and kurtosis are the biased (population) estimates
+    - tracking error and active mean skip days without a benchmark return
+    - drawdowns are measured on the compounded returns
+
+    Args:
+        returns (np.ndarray): daily portfolio returns without NaNs
+        benchmark (np.ndarray | None, optional): benchmark returns aligned to returns, may contain NaNs. Defaults to None
+        var_level (float, optional): quantile used for value at risk. Defaults to 0.05
+
+    Returns:
+        ReturnStats: metrics of the returns
+    """
+    r = np.asarray(returns, dtype=float)
+    n = len(r)
+    if n == 0:
+        return EMPTY
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = r.mean()
+        dev = r - mean
+        dev2 = dev * dev
+        m2 = dev2.mean()
+        m3 = (dev2 * dev).mean()
+        m4 = (dev2 * dev2).mean()
+        std = np.sqrt(m2 * n / (n - 1)) if n > 1 else np.nan
+        skewness = m3 / m2 ** 1.5 if m2 > 0 else np.nan
+        kurtosis = m4 / m2 ** 2 - 3 if m2 > 0 else np.nan
+
+        ordered = np.sort(r)
+        downside = np.minimum(r, 0)
+
+        active_mean = tracking_error = np.nan
+        if benchmark is not None:
+            active = r - np.asarray(benchmark, dtype=float)
+            active = active[~np.isnan(active)]
+            if len(active):
+                active_mean = active.mean()
+                tracking_error = np.sqrt(((active - active_mean) ** 2).mean())
+
+        wealth = np.cumprod(1 + r)
+        drawdowns = wealth / np.maximum.accumulate(wealth) - 1
+        underwater = drawdowns[drawdowns < 0]
+
+    return ReturnStats(
+        n=n,
+        total_returns=float(wealth[-1] - 1),
+        mean=float(mean),
+        median=_quantile(ordered, 0.5),
+        std=float(std),
+        skewness=float(skewness),
+        kurtosis=float(kurtosis),
+        best_day=float(ordered[-1]),
+        worst_day=float(ordered[0]),
+        positive_days=float(np.count_nonzero(r > 0) / n),
+        downside_deviation=float(np.sqrt(np.mean(downside * downside))),
+        var_quantile=_quantile(ordered, var_level),
+        active_mean=float(active_mean),
+        tracking_error=float(tracking_error),
+        max_drawdown=float(np.nanmin(drawdowns)) if not np.isnan(drawdowns).all() else np.nan,
+        average_drawdown=float(underwater.mean()) if len(underwater) else np.nan,
+    )
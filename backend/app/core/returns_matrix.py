@@ -0,0 +1,133 @@
+''' Aligned asset returns matrix shared by the portfolio risk metrics
+Builds one contiguous float64 (dates x assets) array of a returns column
+and caches the statistics computed from it
+- pairwise-complete covariance and correlation, matching pandas .cov() and .corr()
+- complete-case frame and covariance, matching .dropna().cov()
+- monthly betas against a benchmark
+'''
+
+from typing import Callable, Hashable
+
+import numpy as np
+import pandas as pd
+from pandas.core.frame import DataFrame
+
+from app.core.asset import Asset
+
+
+def matrix_key(assets: list[Asset], column: str, benchmark: Asset | None = None) -> tuple:
+    """Identifies the data a matrix was built from, changing when assets or their prices change"""
+    def asset_key(ast):
+        daily = ast.daily
+        return (ast.ticker, ast.currency, len(daily), daily.index[-1] if len(daily) else None)
+    return (column, tuple(asset_key(ast) for ast in assets), asset_key(benchmark) if benchmark is not None else None)
+
+
+class ReturnsMatrix():
+    ''' One returns column of several assets aligned on the union of their dates
+    '''
+
+    def __init__(self, assets: list[Asset], column: str = 'rets', benchmark: Asset | None = None) -> None:
+        """Aligns the assets' returns into one matrix
+
+        Args:
+            assets (list[Asset]): assets in column order
+            column (str, optional): daily column to use. Defaults to 'rets'
+            benchmark (Asset | None, optional): asset kept alongside for betas. Defaults to None
+        """
+        self.assets = list(assets)
+        self.column = column
+        self.key = matrix_key(assets, column, benchmark)
+
+        series = [ast.daily[column] for ast in assets]
+        if benchmark is not None:
+            series.append(benchmark.daily[column])
+
+        index = series[0].index if series else pd.DatetimeIndex([])
+        for s in series[1:]:
+            if not s.index.equals(index):
+                index = index.union(s.index)
+        self.index = index
+
+        values = np.full((len(index), len(series)), np.nan)
+        for i, s in enumerate(series):
+            values[:, i] = s.to_numpy() if s.index.equals(index) else s.reindex(index).to_numpy()
+        self.values = np.ascontiguousarray(values[:, :len(assets)])
+        self.benchmark = values[:, len(assets)].copy() if benchmark is not None else None
+        self._derived = {}
+
+    def _cached(self, key: Hashable, compute: Callable):
+        if key not in self._derived:
+            self._derived[key] = compute()
+        return self._derived[key]
+
+    def frame(self, labels: list | None = None) -> DataFrame:
+        """Wraps the matrix in a DataFrame without copying, labelled by asset unless labels are given"""
+        return DataFrame(self.values, index=self.index, columns=self.assets if labels is None else labels, copy=False)
+
+    def cov(self) -> np.ndarray:
+        """Pairwise-complete sample covariance, the same as DataFrame.cov()"""
+        return self._pairwise()[0]
+
+    def corr(self) -> np.ndarray:
+        """Pairwise-complete Pearson correlation, the same as DataFrame.corr()"""
+        return self._pairwise()[1]
+
+    def _pairwise(self) -> tuple[np.ndarray, np.ndarray]:
+        # every pair uses only the dates where both assets have a return,
+        # so sums are taken through the validity mask instead of per pair
+        def compute():
+            valid = ~np.isnan(self.values)
+            x = np.where(valid, self.values, 0.)
+            m = valid.astype(float)
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                n = m.T @ m
+                sx = x.T @ m                 # sum of x_i over dates where x_j is valid
+                sxx = (x * x).T @ m
+                sxy = x.T @ x
+                cov = (sxy - sx * sx.T / n) / (n - 1)
+                var = (sxx - sx * sx / n) / (n - 1)  # variance of x_i over the pair's dates
+                corr = np.clip(cov / np.sqrt(var * var.T), -1, 1)
+
+            cov[n < 2] = np.nan
+            corr[n < 2] = np.nan
+            np.fill_diagonal(corr, np.where(np.diag(n) >= 2, 1., np.nan))
+            return cov, corr
+        return self._cached('pairwise', compute)
+
+    def complete_frame(self) -> DataFrame:
+        """Dates where every asset has a return, the same as frame().dropna()"""
+        return self._cached('complete', lambda: self.frame()[~np.isnan(self.values).any(axis=1)])
+
+    def complete_cov(self) -> np.ndarray:
+        """Sample covariance over the dates where every asset has a return"""
+        def compute():
+            x = self.complete_frame().to_numpy()
+            return np.cov(x, rowvar=False, ddof=1).reshape(x.shape[1], x.shape[1])
+        return self._cached('complete_cov', compute)
+
+    def monthly_betas(self, start: str, end: pd.Timestamp, fill: bool) -> np.ndarray:
+        """Betas of monthly gross returns against the benchmark
+
+        The matrix is laid on a calendar-day index, gaps are forward filled or dropped,
+        and log returns are summed per month before taking betas
+
+        Args:
+            start (str): first calendar day
+            end (pd.Timestamp): last calendar day
+            fill (bool): forward fill gaps instead of dropping incomplete days
+
+        Returns:
+            np.ndarray: beta of each asset
+        """
+        def compute():
+            calendar = pd.date_range(start=start, end=end)
+            df = DataFrame(np.column_stack([self.benchmark, self.values]), index=self.index).reindex(calendar)
+            df = df.ffill() if fill else df.dropna()
+            monthly = np.exp(df.dropna().resample('ME').agg('sum').to_numpy())
+
+            dev = monthly - monthly.mean(axis=0)
+            cov = dev[:, 1:].T @ dev[:, 0] / (len(monthly) - 1)
+            return cov / (dev[:, 0] @ dev[:, 0] / (len(monthly) - 1))
+        return self._cached(('monthly_betas', start, end, fill), compute)
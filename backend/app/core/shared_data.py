@@ -0,0 +1,265 @@
+''' Zero-copy price data shared with worker processes
+Publishes the strategy columns of an asset once per (ticker, timeframe) as
+Arrow files in shared memory, so tasks carry a small handle instead of the
+pickled asset and workers memory-map the same pages
+- published files are reused across requests until the asset's data changes
+- superseded files are removed once no running job uses them
+- workers keep a few attached assets and rebuild them with Asset.from_frames
+- arrays a single job's tasks all read are published the same way for the job's duration
+'''
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Iterator, NamedTuple, Optional
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pandas.core.frame import DataFrame
+
+from app.core.asset import Asset
+from app.core.cache import LRUCache
+
+COLUMNS = ['open', 'high', 'low', 'close', 'adj_close', 'log_rets', 'rets']
+
+_default_root = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+SHARED_DATA_DIR = os.getenv('SHARED_DATA_DIR', _default_root)
+WORKER_CACHE_SIZE = int(os.getenv('SHARED_DATA_WORKER_CACHE', 16))  # assets each worker keeps attached
+WORKER_ARRAYS_SIZE = 2  # job arrays each worker keeps attached, they are not reused after the job
+
+
+class AssetHandle(NamedTuple):
+    ''' Picklable reference to a published asset
+    '''
+    ticker: str
+    asset_type: str
+    currency: str
+    sector: Optional[str]
+    timezone: Optional[str]
+    daily: str
+    five_minute: str
+
+
+class ArraysHandle(NamedTuple):
+    ''' Picklable reference to arrays published for one job
+    '''
+    path: str
+    names: tuple
+
+
+class _Published(NamedTuple):
+    frame: weakref.ref  # the frame last published, without keeping it alive
+    fingerprint: str
+    path: str
+
+
+_lock = threading.Lock()
+_published: dict[tuple[str, str], _Published] = {}
+_refs: dict[str, int] = {}
+_retired: set[str] = set()
+_dir: Optional[str] = None
+
+_attached = LRUCache(WORKER_CACHE_SIZE, sizeof=lambda _: 1)
+_attached_arrays = LRUCache(WORKER_ARRAYS_SIZE, sizeof=lambda _: 1)
+
+
+def _fingerprint(df: DataFrame) -> str:
+    # content of the published columns, so a reloaded frame with restated prices,
+    # e.g. adjusted closes after a split, is never taken for the one already published
+    hashes = pd.util.hash_pandas_object(df[COLUMNS], index=True).to_numpy()
+    return hashlib.blake2b(hashes.tobytes(), digest_size=16).hexdigest()
+
+
+def _process_dir() -> str:
+    global _dir
+    if _dir is None:
+        _remove_orphans()
+        _dir = os.path.join(SHARED_DATA_DIR, f'flapp-{os.getpid()}')
+        os.makedirs(_dir, exist_ok=True)
+    return _dir
+
+
+def _remove_orphans() -> None:
+    """Deletes directories left behind by server processes that no longer exist"""
+    if not os.path.isdir(SHARED_DATA_DIR):
+        return
+    for name in os.listdir(SHARED_DATA_DIR):
+        if not name.startswith('flapp-'):
+            continue
+        try:
+            os.kill(int(name[len('flapp-'):]), 0)
+        except ProcessLookupError:
+            shutil.rmtree(os.path.join(SHARED_DATA_DIR, name), ignore_errors=True)
+        except (ValueError, PermissionError):
+            continue
+
+
+def _write(path: str, df: DataFrame) -> None:
+    table = pa.Table.from_pandas(df[COLUMNS].astype(float).rename_axis('date'), preserve_index=True)
+    tmp = f'{path}.tmp'
+    with pa.OSFile(tmp, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+
+
+def _read(path: str) -> DataFrame:
+    # split_blocks keeps each column as a zero-copy, read-only view of the mapped file
+    table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+def _publish_frame(ticker: str, timeframe: str, df: DataFrame) -> str:
+    key = (ticker, timeframe)
+    current = _published.get(key)
+    # shared frames are replaced rather than modified, so the same object needs no hashing
+    if current is not None and current.frame() is df:
+        return current.path
+
+    fingerprint = _fingerprint(df)
+    if current is not None and current.fingerprint == fingerprint:
+        _published[key] = current._replace(frame=weakref.ref(df))
+        return current.path
+
+    version = 0 if current is None else int(current.path.rsplit('.', 2)[-2]) + 1
+    path = os.path.join(_process_dir(), f'{quote(ticker, safe="")}.{timeframe}.{version}.arrow')
+    _write(path, df)
+    _published[key] = _Published(weakref.ref(df), fingerprint, path)
+    if current is not None:
+        _retire(current.path)
+    return path
+
+
+def _retire(path: str) -> None:
+    if _refs.get(path, 0):
+        _retired.add(path)
+    else:
+        _unlink(path)
+
+
+def _unlink(path: str) -> None:
+    _retired.discard(path)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _publish_locked(asset: Asset) -> AssetHandle:
+    """Publishes an asset's strategy columns and takes a reference on its files
+
+    Must be called holding _lock, so a newer version of the asset published by
+    another request cannot retire the files between publishing and referencing them.
+    """
+    daily = _publish_frame(asset.ticker, 'daily', asset.daily)
+    # mutual funds reuse the daily frame as their five minute data
+    if asset.five_minute is asset.daily:
+        five_minute = daily
+    else:
+        five_minute = _publish_frame(asset.ticker, 'five_minute', asset.five_minute)
+    for path in {daily, five_minute}:
+        _refs[path] = _refs.get(path, 0) + 1
+
+    return AssetHandle(asset.ticker, asset.asset_type, asset.currency,
+                       getattr(asset, 'sector', None), getattr(asset, 'timezone', None),
+                       daily, five_minute)
+
+
+@contextmanager
+def published(asset: Asset) -> Iterator[AssetHandle]:
+    """Publishes an asset, reusing files that are still current, and keeps them alive until the block exits
+
+    Use around the tasks that attach the handle, so a newer version of the
+    asset published meanwhile does not remove files the tasks still need.
+
+    Args:
+        asset (Asset): asset to share with workers
+
+    Yields:
+        AssetHandle: handle workers pass to attach
+    """
+    with _lock:
+        handle = _publish_locked(asset)
+    paths = {handle.daily, handle.five_minute}
+    try:
+        yield handle
+    finally:
+        with _lock:
+            for path in paths:
+                _refs[path] -= 1
+                if not _refs[path]:
+                    del _refs[path]
+                    if path in _retired:
+                        _unlink(path)
+
+
+def attach(handle: AssetHandle) -> Asset:
+    """Rebuilds a published asset in a worker without copying its prices
+
+    Args:
+        handle (AssetHandle): handle from published
+
+    Returns:
+        Asset: read-only asset backed by the shared files
+    """
+    def load():
+        daily = _read(handle.daily)
+        five_minute = daily if handle.five_minute == handle.daily else _read(handle.five_minute)
+        return Asset.from_frames(handle.ticker, daily, five_minute, asset_type=handle.asset_type,
+                                 currency=handle.currency, sector=handle.sector, timezone=handle.timezone)
+    return _attached.get_or_load(handle, load)
+
+
+@contextmanager
+def published_arrays(**arrays: np.ndarray) -> Iterator[ArraysHandle]:
+    """Publishes arrays every task of a job reads, removing them when the block exits
+
+    Tasks carry the handle instead of the arrays, so the data is written once
+    per job rather than pickled into every batch of tasks.
+
+    Args:
+        **arrays (np.ndarray): arrays by name
+
+    Yields:
+        ArraysHandle: handle workers pass to attach_arrays
+    """
+    with _lock:
+        path = tempfile.mkdtemp(prefix='arrays.', dir=_process_dir())
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(path, f'{name}.npy'), np.ascontiguousarray(array))
+        yield ArraysHandle(path, tuple(arrays))
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def attach_arrays(handle: ArraysHandle) -> dict[str, np.ndarray]:
+    """Memory-maps arrays published by published_arrays in a worker
+
+    Args:
+        handle (ArraysHandle): handle from published_arrays
+
+    Returns:
+        dict[str, np.ndarray]: read-only arrays by name, backed by the shared files
+    """
+    def load():
+        return {name: np.load(os.path.join(handle.path, f'{name}.npy'), mmap_mode='r') for name in handle.names}
+    return _attached_arrays.get_or_load(handle, load)
+
+
+def clear() -> None:
+    """Removes every published file of this process"""
+    global _dir
+    with _lock:
+        _published.clear()
+        _refs.clear()
+        _retired.clear()
+        if _dir is not None:
+            shutil.rmtree(_dir, ignore_errors=True)
+            _dir = None
@@ -11,9 +11,15 @@ Module Structure:
     * bb: Bollinger Bands signals with multiple methods
 
 - Signal Integration
+    * rsi_signals, macd_signals, bb_signals: Individual signals each indicator votes on
+    * combine: Applies a combination method to individual signals
     * vote: Combines multiple signals using weighted voting
     * fill: Ensures continuous signals by forward-filling values
 
+- Compiled Kernels
+    * signal_kernels: numba versions of the crossover, momentum, band and fill loops,
+      which the functions here wrap for Series and array inputs
+
 - Pattern Detection
     * find_momentum_divergence: Finds regular and hidden divergence patterns
     * find_double_patterns: Detects double tops and bottoms
@@ -54,6 +60,7 @@ import pandas as pd
 from scipy.signal import find_peaks
 from typing import Optional
 import numba as nb
+from app.core import signal_kernels as sk
 
 def ma_crossover(short: pd.Series, long: pd.Series) -> np.ndarray:
     """Generate trading signals from moving average crossovers.
@@ -97,6 +104,26 @@ def rsi(RSI: pd.Series, price: pd.Series, ub: float, lb: float,
     Returns:
         pd.Series: Combined trading signals (-1 or 1)
     """
+    signals = rsi_signals(RSI, price, ub, lb, exit, signal_type, m_rev_bound)
+    return combine(signals, method, threshold, weights)
+
+
+def rsi_signals(RSI: pd.Series, price: pd.Series, ub: float, lb: float, exit: str,
+                signal_type: list[str], m_rev_bound: Optional[float] = 50) -> pd.DataFrame:
+    """Generate the individual RSI signals that rsi votes on.
+
+    Args:
+        RSI (pd.Series): RSI values
+        price (pd.Series): Price series for divergence detection
+        ub (float): Upper bound for overbought condition
+        lb (float): Lower bound for oversold condition
+        exit (str): Exit signal type ('re' for mean reversion)
+        signal_type (list[str]): List of signal types to use
+        m_rev_bound (float, optional): Mean reversion level. Defaults to 50.
+
+    Returns:
+        pd.DataFrame: One column of signals (-1 or 1) per signal type
+    """
     signals = pd.DataFrame(index=RSI.index)
 
     if 'crossover' in signal_type:
@@ -108,14 +135,7 @@ def rsi(RSI: pd.Series, price: pd.Series, ub: float, lb: float,
     if 'hidden divergence' in signal_type:
         signals['hidden_div'] = rsi_divergence(RSI, price, True)
 
-    if method == 'unanimous':
-        threshold = .99
-        weights = [1 / len(signals.columns)] * len(signals.columns)
-    elif method == 'majority':
-        threshold = 0
-        weights = [1 / len(signals.columns)] * len(signals.columns)
-
-    return vote(signals, threshold, weights)
+    return signals
 
 
 def rsi_divergence(RSI: pd.Series, price: pd.Series, hidden: bool = False) -> pd.Series:
@@ -156,29 +176,9 @@ def rsi_crossover(RSI: pd.Series, ub: float, lb: float,
     Returns:
         pd.Series: Trading signals (-1 or 1)
     """
-    if exit == 're':
-        signal = np.where(
-            (RSI.shift(1) > ub) & (RSI < ub), -1, 
-            np.where((RSI.shift(1) < lb) & (RSI > lb), 1, np.nan)
-        )
-        short_entries = (RSI.shift(1) > ub) & (RSI < ub)
-    else:
-        signal = np.where(
-            RSI > ub, -1,
-            np.where(RSI < lb, 1, np.nan)
-        )
-        short_entries = (RSI.shift(1) <= ub) & (RSI > ub)
-
-    signal = pd.Series(signal, index=RSI.index)
-    signal = fill(signal)
-
-    if m_rev_bound is not None:
-        mean_rev_points = (RSI <= m_rev_bound) & (signal == -1)
-        groups = short_entries.cumsum()
-        mean_rev_triggered = mean_rev_points.groupby(groups).cummax()
-        signal = np.where(mean_rev_triggered, 1, signal)
-
-    return signal
+    signal = sk.rsi_crossover(np.ascontiguousarray(RSI, dtype=float), float(ub), float(lb), exit == 're',
+                              m_rev_bound is not None, float(m_rev_bound if m_rev_bound is not None else np.nan))
+    return signal if m_rev_bound is not None else pd.Series(signal, index=RSI.index)
 
 
 def macd(macd_hist: pd.Series, macd: pd.Series, price: pd.Series, 
@@ -205,6 +205,23 @@ def macd(macd_hist: pd.Series, macd: pd.Series, price: pd.Series,
     Returns:
         pd.Series: Combined trading signals (-1 or 1)
     """
+    signals = macd_signals(macd_hist, macd, price, signal_type)
+    return combine(signals, method, threshold, weights)
+
+
+def macd_signals(macd_hist: pd.Series, macd: pd.Series, price: pd.Series,
+                 signal_type: list[str]) -> pd.DataFrame:
+    """Generate the individual MACD signals that macd votes on.
+
+    Args:
+        macd_hist (pd.Series): MACD histogram values
+        macd (pd.Series): MACD line values
+        price (pd.Series): Price series for divergence detection
+        signal_type (list[str]): List of signal types to use
+
+    Returns:
+        pd.DataFrame: One column of signals (-1 or 1) per signal type
+    """
     signals = pd.DataFrame(index=macd_hist.index)
 
     if 'crossover' in signal_type:
@@ -222,14 +239,7 @@ def macd(macd_hist: pd.Series, macd: pd.Series, price: pd.Series,
     if 'double peak/trough' in signal_type:
         signals['double'] = macd_double(macd_hist)
 
-    if method == 'unanimous':
-        threshold = .99
-        weights = [1 / len(signals.columns)] * len(signals.columns)
-    elif method == 'majority':
-        threshold = 0
-        weights = [1 / len(signals.columns)] * len(signals.columns)
-
-    return vote(signals, threshold, weights)
+    return signals
 
 
 def macd_divergence(macd: pd.Series, price: pd.Series, hidden: bool = False) -> pd.Series:
@@ -262,17 +272,7 @@ def macd_momentum(macd_hist: pd.Series) -> pd.Series:
     Returns:
         pd.Series: Trading signals (-1 or 1)
     """
-    signal = np.where(
-        (macd_hist.shift(1) < macd_hist)
-        & (macd_hist.shift(1) < 0), 1,
-        np.where(
-            (macd_hist.shift(1) > macd_hist)
-            & (macd_hist.shift(1) > 0), -1, np.nan
-        )
-    )
-
-    signal = pd.Series(signal, index=macd_hist.index)
-    return fill(signal)
+    return pd.Series(sk.macd_momentum(np.ascontiguousarray(macd_hist, dtype=float)), index=macd_hist.index)
 
 
 def macd_double(macd_hist: pd.Series) -> pd.Series:
@@ -290,9 +290,9 @@ def macd_double(macd_hist: pd.Series) -> pd.Series:
     return double_pattern_signals(macd_hist, *find_double_patterns(macd_hist))
 
 
-def bb(price: pd.Series, bb_up: pd.Series, bb_down: pd.Series,
+def bb(price: pd.Series | np.ndarray, bb_up: pd.Series | np.ndarray, bb_down: pd.Series | np.ndarray,
       signal_type: list[str], method: str, threshold: float,
-      weights: Optional[list[float]] = None) -> pd.Series:
+      weights: Optional[list[float]] = None) -> pd.Series | np.ndarray:
     """Generate trading signals from Bollinger Bands using multiple methods.
 
     Main entry point for Bollinger Bands signal generation. Combines multiple signal types:
@@ -303,19 +303,44 @@ def bb(price: pd.Series, bb_up: pd.Series, bb_down: pd.Series,
     - Band breakouts (momentum breaks outside bands)
     - %B indicator (normalized price position)
 
+    Bands can also be 2-D arrays of shape (n, k) holding k candidate band pairs,
+    in which case every candidate is evaluated in one call.
+
     Args:
-        price (pd.Series): Price series
-        bb_up (pd.Series): Upper Bollinger Band
-        bb_down (pd.Series): Lower Bollinger Band
+        price (pd.Series | np.ndarray): Price series
+        bb_up (pd.Series | np.ndarray): Upper Bollinger Band, or (n, k) candidate upper bands
+        bb_down (pd.Series | np.ndarray): Lower Bollinger Band, or (n, k) candidate lower bands
         signal_type (list[str]): List of signal types to use
         method (str): Signal combination method ('weighted', 'unanimous', 'majority')
         threshold (float): Voting threshold for signal generation
         weights (list[float], optional): Weights for each signal type. Defaults to equal weights.
 
     Returns:
-        pd.Series: Combined trading signals (-1 or 1)
+        pd.Series | np.ndarray: Combined trading signals (-1 or 1), an (n, k) array for 2-D bands
     """
-    signals = pd.DataFrame(index=price.index)
+    signals = bb_signals(price, bb_up, bb_down, signal_type)
+
+    if isinstance(price, pd.Series):
+        return combine(pd.DataFrame(signals, index=price.index), method, threshold, weights)
+
+    threshold, weights = _method_vote(method, threshold, weights, len(signals))
+    return vote_arrays(list(signals.values()), threshold, weights)
+
+
+def bb_signals(price: pd.Series | np.ndarray, bb_up: pd.Series | np.ndarray,
+               bb_down: pd.Series | np.ndarray, signal_type: list[str]) -> dict:
+    """Generate the individual Bollinger Band signals that bb votes on.
+
+    Args:
+        price (pd.Series | np.ndarray): Price series
+        bb_up (pd.Series | np.ndarray): Upper Bollinger Band, or (n, k) candidate upper bands
+        bb_down (pd.Series | np.ndarray): Lower Bollinger Band, or (n, k) candidate lower bands
+        signal_type (list[str]): List of signal types to use
+
+    Returns:
+        dict: Signals (-1 or 1) of each signal type, in signal_type order of the checks below
+    """
+    signals = {}
 
     if 'bounce' in signal_type:
         signals['bounce'] = bb_bounce(price, bb_up, bb_down)
@@ -335,17 +360,54 @@ def bb(price: pd.Series, bb_up: pd.Series, bb_down: pd.Series,
     if '%B' in signal_type:
         signals['%B'] = bb_pctB(price, bb_up, bb_down)
 
-    if method == 'unanimous':
-        threshold = .99
-        weights = [1 / len(signals.columns)] * len(signals.columns)
-    elif method == 'majority':
-        threshold = 0
-        weights = [1 / len(signals.columns)] * len(signals.columns)
+    return signals
+
+
+def _bands(price: pd.Series | np.ndarray, bb_up: pd.Series | np.ndarray,
+           bb_down: pd.Series | np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Float arrays of price and bands, with price as a column when bands are 2-D."""
+    price = np.asarray(price, dtype=float)
+    bb_up = np.asarray(bb_up, dtype=float)
+    bb_down = np.asarray(bb_down, dtype=float)
+    if bb_up.ndim == 2 and price.ndim == 1:
+        price = price[:, None]
+    return price, bb_up, bb_down
 
-    return vote(signals, threshold, weights)
 
+def _kernel_bands(price: pd.Series | np.ndarray, bb_up: pd.Series | np.ndarray,
+                  bb_down: pd.Series | np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Contiguous float arrays for the band kernels, price as (n,) and bands as (n, k)."""
+    price = np.ascontiguousarray(price, dtype=float)
+    bb_up = np.asarray(bb_up, dtype=float)
+    bb_down = np.asarray(bb_down, dtype=float)
+    if bb_up.ndim == 1:
+        bb_up, bb_down = bb_up[:, None], bb_down[:, None]
+    return price, np.ascontiguousarray(bb_up), np.ascontiguousarray(bb_down)
 
-def bb_bounce(price: pd.Series, bb_up: pd.Series, bb_down: pd.Series) -> pd.Series:
+
+def _kernel_signal(signal: np.ndarray, bb_up: pd.Series | np.ndarray,
+                   price: pd.Series | np.ndarray) -> pd.Series | np.ndarray:
+    """Shape (n, k) kernel signals like the bands they came from."""
+    return _like(signal if np.ndim(bb_up) == 2 else signal[:, 0], price)
+
+
+def _shift(values: np.ndarray, fill_value: float = np.nan) -> np.ndarray:
+    """Shift rows down by one, like Series.shift(1)."""
+    shifted = np.empty_like(values)
+    shifted[:1] = fill_value
+    shifted[1:] = values[:-1]
+    return shifted
+
+
+def _like(values: np.ndarray, price: pd.Series | np.ndarray) -> pd.Series | np.ndarray:
+    """Return signals as a Series when called with Series, otherwise as an array."""
+    if isinstance(price, pd.Series) and values.ndim == 1:
+        return pd.Series(values, index=price.index)
+    return values
+
+
+def bb_bounce(price: pd.Series | np.ndarray, bb_up: pd.Series | np.ndarray,
+              bb_down: pd.Series | np.ndarray) -> pd.Series | np.ndarray:
     """Generate signals from price bouncing off Bollinger Bands.
 
     Signals generated when price reverses after touching bands:
@@ -353,47 +415,50 @@ def bb_bounce(price: pd.Series, bb_up: pd.Series, bb_down: pd.Series) -> pd.Seri
     - Sell when price bounces down from upper band
 
     Args:
-        price (pd.Series): Price series
-        bb_up (pd.Series): Upper Bollinger Band
-        bb_down (pd.Series): Lower Bollinger Band
+        price (pd.Series | np.ndarray): Price series
+        bb_up (pd.Series | np.ndarray): Upper Bollinger Band, 2-D for several candidates
+        bb_down (pd.Series | np.ndarray): Lower Bollinger Band, 2-D for several candidates
 
     Returns:
-        pd.Series: Trading signals (-1 or 1)
+        pd.Series | np.ndarray: Trading signals (-1 or 1)
     """
-    signal = pd.Series(np.where(
-        (price.shift(1) > bb_up) & (price < bb_up), -1,
-        np.where(
-            (price.shift(1) < bb_down) & (price > bb_down), 1, np.nan
-        )
-    ), index=price.index)
-
-    return fill(signal)
+    return _kernel_signal(sk.bb_bounce(*_kernel_bands(price, bb_up, bb_down)), bb_up, price)
 
 
-def bb_double(price: pd.Series, bb_up: pd.Series, bb_down: pd.Series) -> pd.Series:
+def bb_double(price: pd.Series | np.ndarray, bb_up: pd.Series | np.ndarray,
+              bb_down: pd.Series | np.ndarray) -> pd.Series | np.ndarray:
     """Generate signals from double touches of Bollinger Bands.
 
     Normalizes price position relative to bands and detects double top/bottom patterns.
 
     Args:
-        price (pd.Series): Price series
-        bb_up (pd.Series): Upper Bollinger Band
-        bb_down (pd.Series): Lower Bollinger Band
+        price (pd.Series | np.ndarray): Price series
+        bb_up (pd.Series | np.ndarray): Upper Bollinger Band, 2-D for several candidates
+        bb_down (pd.Series | np.ndarray): Lower Bollinger Band, 2-D for several candidates
 
     Returns:
-        pd.Series: Trading signals (-1 or 1)
+        pd.Series | np.ndarray: Trading signals (-1 or 1)
     """
-    rel_width = bb_up - bb_down
-    hist = pd.Series(np.where(
-        price > bb_up, (price - bb_up) / rel_width,
-        np.where(price < bb_down, (price - bb_down) / rel_width, 0)
-    ), index=price.index)
+    p, up, down = _bands(price, bb_up, bb_down)
+    rel_width = up - down
+    with np.errstate(divide='ignore', invalid='ignore'):
+        hist = np.where(
+            p > up, (p - up) / rel_width,
+            np.where(p < down, (p - down) / rel_width, 0)
+        )
+
+    # peak detection is inherently 1-D, so candidates are scanned one column at a time
+    if hist.ndim == 1:
+        signal = double_pattern_signals(hist, *find_double_patterns(hist, 5, 15))
+    else:
+        signal = np.column_stack([double_pattern_signals(h, *find_double_patterns(h, 5, 15)) for h in hist.T])
 
-    return double_pattern_signals(price, *find_double_patterns(hist, 5, 15))
+    return _like(signal, price)
 
 
-def bb_walks(price: pd.Series, bb_up: pd.Series, bb_down: pd.Series,
-            prox: float = 0.2, periods: int = 5) -> pd.Series:
+def bb_walks(price: pd.Series | np.ndarray, bb_up: pd.Series | np.ndarray,
+             bb_down: pd.Series | np.ndarray, prox: float = 0.2,
+             periods: int = 5) -> pd.Series | np.ndarray:
     """Generate signals from price walking along Bollinger Bands.
 
     Detects when price consistently stays near bands:
@@ -401,30 +466,21 @@ def bb_walks(price: pd.Series, bb_up: pd.Series, bb_down: pd.Series,
     - Sell when walking along lower band
 
     Args:
-        price (pd.Series): Price series
-        bb_up (pd.Series): Upper Bollinger Band
-        bb_down (pd.Series): Lower Bollinger Band
+        price (pd.Series | np.ndarray): Price series
+        bb_up (pd.Series | np.ndarray): Upper Bollinger Band, 2-D for several candidates
+        bb_down (pd.Series | np.ndarray): Lower Bollinger Band, 2-D for several candidates
         prox (float, optional): Proximity threshold to bands. Defaults to 0.2.
         periods (int, optional): Required consecutive periods. Defaults to 5.
 
     Returns:
-        pd.Series: Trading signals (-1 or 1)
+        pd.Series | np.ndarray: Trading signals (-1 or 1)
     """
-    width = bb_up - bb_down
-    close_upper = np.abs(price - bb_up) < width * prox
-    close_lower = np.abs(price - bb_down) < width * prox
-
-    upper_walk = close_upper.rolling(periods).sum() >= periods - 1
-    lower_walk = close_lower.rolling(periods).sum() >= periods - 1
-
-    walk = pd.Series(np.where(upper_walk, 1,
-                    np.where(lower_walk, -1, np.nan)), index=price.index)
-
-    return fill(walk)
+    walk = sk.bb_walks(*_kernel_bands(price, bb_up, bb_down), float(prox), int(periods))
+    return _kernel_signal(walk, bb_up, price)
 
 
-def bb_squeeze(price: pd.Series, bb_up: pd.Series, bb_down: pd.Series,
-              aggressive: bool = False) -> pd.Series:
+def bb_squeeze(price: pd.Series | np.ndarray, bb_up: pd.Series | np.ndarray,
+               bb_down: pd.Series | np.ndarray, aggressive: bool = False) -> pd.Series | np.ndarray:
     """Generate signals from Bollinger Band squeezes.
 
     Detects volatility contraction (squeeze) followed by expansion:
@@ -432,32 +488,20 @@ def bb_squeeze(price: pd.Series, bb_up: pd.Series, bb_down: pd.Series,
     - Sell when price moves down after squeeze
 
     Args:
-        price (pd.Series): Price series
-        bb_up (pd.Series): Upper Bollinger Band
-        bb_down (pd.Series): Lower Bollinger Band
+        price (pd.Series | np.ndarray): Price series
+        bb_up (pd.Series | np.ndarray): Upper Bollinger Band, 2-D for several candidates
+        bb_down (pd.Series | np.ndarray): Lower Bollinger Band, 2-D for several candidates
         aggressive (bool, optional): Use aggressive entry. Defaults to False.
 
     Returns:
-        pd.Series: Trading signals (-1 or 1)
+        pd.Series | np.ndarray: Trading signals (-1 or 1)
     """
-    width = bb_up - bb_down
-    squeeze = width < width.rolling(20).quantile(0.2)
-
-    if aggressive:
-        ext = (width > width.shift(1)) & squeeze.shift(1)
-    else:
-        ext = ~squeeze & squeeze.shift(1)
+    signal = sk.bb_squeeze(*_kernel_bands(price, bb_up, bb_down), bool(aggressive))
+    return _kernel_signal(signal, bb_up, price)
 
-    signal = pd.Series(np.where(
-        ext & (price > price.shift(1)), 1,
-        np.where(ext & (price < price.shift(1)), -1, np.nan)
-    ), index=price.index)
 
-    return fill(signal)
-
-
-def bb_breakout(price: pd.Series, bb_up: pd.Series, bb_down: pd.Series,
-                threshold: float = 0.3) -> pd.Series:
+def bb_breakout(price: pd.Series | np.ndarray, bb_up: pd.Series | np.ndarray,
+                bb_down: pd.Series | np.ndarray, threshold: float = 0.3) -> pd.Series | np.ndarray:
     """Generate signals from Bollinger Band breakouts.
 
     Detects strong momentum moves outside bands:
@@ -465,47 +509,46 @@ def bb_breakout(price: pd.Series, bb_up: pd.Series, bb_down: pd.Series,
     - Sell on downward breakout with momentum
 
     Args:
-        price (pd.Series): Price series
-        bb_up (pd.Series): Upper Bollinger Band
-        bb_down (pd.Series): Lower Bollinger Band
+        price (pd.Series | np.ndarray): Price series
+        bb_up (pd.Series | np.ndarray): Upper Bollinger Band, 2-D for several candidates
+        bb_down (pd.Series | np.ndarray): Lower Bollinger Band, 2-D for several candidates
         threshold (float, optional): Momentum threshold. Defaults to 0.3.
 
     Returns:
-        pd.Series: Trading signals (-1 or 1)
+        pd.Series | np.ndarray: Trading signals (-1 or 1)
     """
-    momentum = price.pct_change()
-    mom_range = momentum.max() - momentum.min()
+    p, up, down = _bands(price, bb_up, bb_down)
+    momentum = p / _shift(p) - 1
+    mom_range = np.nanmax(momentum, axis=0) - np.nanmin(momentum, axis=0)
 
-    signal = pd.Series(np.where(
-        (price > bb_up) & (momentum > threshold * mom_range), 1,
-        np.where((price < bb_down) & (momentum < -threshold * mom_range), -1, np.nan)
-    ), index=price.index)
+    signal = np.where(
+        (p > up) & (momentum > threshold * mom_range), 1,
+        np.where((p < down) & (momentum < -threshold * mom_range), -1, np.nan)
+    )
 
-    return fill(signal)
+    return _like(fill_array(signal), price)
 
 
-def bb_pctB(price: pd.Series, bb_up: pd.Series, bb_down: pd.Series,
-            overbought: float = 0.8, oversold: float = 0.2) -> pd.Series:
+def bb_pctB(price: pd.Series | np.ndarray, bb_up: pd.Series | np.ndarray,
+            bb_down: pd.Series | np.ndarray, overbought: float = 0.8,
+            oversold: float = 0.2) -> pd.Series | np.ndarray:
     """Generate signals from %B indicator.
 
     %B normalizes price position within Bollinger Bands.
     Generates signals based on overbought/oversold levels.
 
     Args:
-        price (pd.Series): Price series
-        bb_up (pd.Series): Upper Bollinger Band
-        bb_down (pd.Series): Lower Bollinger Band
+        price (pd.Series | np.ndarray): Price series
+        bb_up (pd.Series | np.ndarray): Upper Bollinger Band, 2-D for several candidates
+        bb_down (pd.Series | np.ndarray): Lower Bollinger Band, 2-D for several candidates
         overbought (float, optional): Overbought threshold. Defaults to 0.8.
         oversold (float, optional): Oversold threshold. Defaults to 0.2.
 
     Returns:
-        pd.Series: Trading signals (-1 or 1)
+        pd.Series | np.ndarray: Trading signals (-1 or 1)
     """
-    pctB = (price - bb_down) / (bb_up - bb_down)
-    signal = pd.Series(np.where(pctB > overbought, -1,
-                      np.where(pctB < oversold, 1, np.nan)), index=price.index)
-
-    return fill(signal)
+    signal = sk.bb_pctB(*_kernel_bands(price, bb_up, bb_down), float(overbought), float(oversold))
+    return _kernel_signal(signal, bb_up, price)
 
 
 def find_momentum_divergence(price: pd.Series, indicator: pd.Series,
@@ -541,65 +584,51 @@ def find_momentum_divergence(price: pd.Series, indicator: pd.Series,
         tuple[list[tuple[int, int]], list[tuple[int, int]]]: Lists of (price_idx, indicator_idx)
             for bearish and bullish divergences
     """
-    price_peaks, _ = find_peaks(price, distance=distance_min,
-                               prominence=prominence*(price.max() - price.min()))
-    price_troughs, _ = find_peaks(-price, distance=distance_min,
-                                 prominence=prominence*(price.max() - price.min()))
-    
-    ind_peaks, _ = find_peaks(indicator, distance=distance_min,
-                             prominence=prominence*(indicator.max() - indicator.min()))
-    ind_troughs, _ = find_peaks(-indicator, distance=distance_min,
-                               prominence=prominence*(indicator.max() - indicator.min()))
-
-    bearish_divs = []
-    for i in range(len(price_peaks)-1):
-        peak1_idx = price_peaks[i]
-        peak2_idx = price_peaks[i+1]
-
-        if peak2_idx - peak1_idx > distance_max:
-            continue
-
-        # Regular: price higher high + indicator lower high
-        # Hidden: price lower high + indicator higher high
-        if (not hidden and price.iloc[peak2_idx] > price.iloc[peak1_idx]) or \
-           (hidden and price.iloc[peak2_idx] < price.iloc[peak1_idx]):
-
-            ind_peak1 = ind_peaks[(ind_peaks >= peak1_idx - distance_min) & 
-                                (ind_peaks <= peak1_idx + distance_min)]
-            ind_peak2 = ind_peaks[(ind_peaks >= peak2_idx - distance_min) & 
-                                (ind_peaks <= peak2_idx + distance_min)]
-
-            if len(ind_peak1) > 0 and len(ind_peak2) > 0:
-                if (not hidden and indicator.iloc[ind_peak2[0]] < indicator.iloc[ind_peak1[0]]) or \
-                   (hidden and indicator.iloc[ind_peak2[0]] > indicator.iloc[ind_peak1[0]]):
-                    # For RSI bearish, more significant if peaks are in overbought territory
-                    if not is_rsi or indicator.iloc[ind_peak1[0]] > ub:
-                        bearish_divs.append((int(peak2_idx), int(ind_peak2[0])))
-
-    bullish_divs = []
-    for i in range(len(price_troughs)-1):
-        trough1_idx = price_troughs[i]
-        trough2_idx = price_troughs[i+1]
-
-        if trough2_idx - trough1_idx > distance_max:
-            continue
-
-        # Regular: price lower low + indicator higher low
-        # Hidden: price higher low + indicator lower low
-        if (not hidden and price.iloc[trough2_idx] < price.iloc[trough1_idx]) or \
-           (hidden and price.iloc[trough2_idx] > price.iloc[trough1_idx]):
-
-            ind_trough1 = ind_troughs[(ind_troughs >= trough1_idx - distance_min) & 
-                                    (ind_troughs <= trough1_idx + distance_min)]
-            ind_trough2 = ind_troughs[(ind_troughs >= trough2_idx - distance_min) & 
-                                    (ind_troughs <= trough2_idx + distance_min)]
-
-            if len(ind_trough1) > 0 and len(ind_trough2) > 0:
-                if (not hidden and indicator.iloc[ind_trough2[0]] > indicator.iloc[ind_trough1[0]]) or \
-                   (hidden and indicator.iloc[ind_trough2[0]] < indicator.iloc[ind_trough1[0]]):
-                    # For RSI bullish, more significant if troughs are in oversold territory
-                    if not is_rsi or indicator.iloc[ind_trough1[0]] < lb:
-                        bullish_divs.append((int(trough2_idx), int(ind_trough2[0])))
+    price = np.asarray(price, dtype=float)
+    indicator = np.asarray(indicator, dtype=float)
+    price_prominence = prominence * (np.nanmax(price) - np.nanmin(price))
+    ind_prominence = prominence * (np.nanmax(indicator) - np.nanmin(indicator))
+
+    price_peaks, _ = find_peaks(price, distance=distance_min, prominence=price_prominence)
+    price_troughs, _ = find_peaks(-price, distance=distance_min, prominence=price_prominence)
+
+    ind_peaks, _ = find_peaks(indicator, distance=distance_min, prominence=ind_prominence)
+    ind_troughs, _ = find_peaks(-indicator, distance=distance_min, prominence=ind_prominence)
+
+    def nearest(extrema, points):
+        # first indicator extremum within distance_min of each point, -1 if none
+        if len(extrema) == 0:
+            return np.full(len(points), -1)
+        pos = np.searchsorted(extrema, points - distance_min)
+        found = pos < len(extrema)
+        match = np.where(found, extrema[np.minimum(pos, len(extrema) - 1)], -1)
+        return np.where(found & (match <= points + distance_min), match, -1)
+
+    def pairs(extrema, ind_extrema, bearish):
+        # consecutive price extrema close enough together
+        first, second = extrema[:-1], extrema[1:]
+        close = second - first <= distance_max
+        first, second = first[close], second[close]
+
+        # Regular bearish: price higher high + indicator lower high
+        # Hidden bearish: price lower high + indicator higher high
+        # Regular bullish: price lower low + indicator higher low
+        # Hidden bullish: price higher low + indicator lower low
+        price_up = bearish != hidden
+        price_ok = price[second] > price[first] if price_up else price[second] < price[first]
+
+        ind1, ind2 = nearest(ind_extrema, first), nearest(ind_extrema, second)
+        keep = price_ok & (ind1 >= 0) & (ind2 >= 0)
+        ind1, ind2, second = ind1[keep], ind2[keep], second[keep]
+
+        ind_ok = indicator[ind2] < indicator[ind1] if price_up else indicator[ind2] > indicator[ind1]
+        # For RSI, more significant if the first extremum is overbought (bearish) or oversold (bullish)
+        if is_rsi:
+            ind_ok &= indicator[ind1] > ub if bearish else indicator[ind1] < lb
+        return [(int(p), int(i)) for p, i in zip(second[ind_ok], ind2[ind_ok])]
+
+    bearish_divs = pairs(price_peaks, ind_peaks, True)
+    bullish_divs = pairs(price_troughs, ind_troughs, False)
 
     return bearish_divs, bullish_divs
 
@@ -619,18 +648,14 @@ def divergence_signals(df: pd.Series, bearish_divs: list[tuple[int, int]],
     Returns:
         pd.Series: Trading signals (-1 or 1)
     """
-    signal = pd.Series(np.nan, index=df.index)
-
-    for price_idx, _ in bearish_divs:
-        signal.iloc[price_idx] = -1
-
-    for price_idx, _ in bullish_divs:
-        signal.iloc[price_idx] = 1
+    signal = np.full(len(df), np.nan)
+    signal[[price_idx for price_idx, _ in bearish_divs]] = -1
+    signal[[price_idx for price_idx, _ in bullish_divs]] = 1
 
-    return fill(signal)
+    return pd.Series(fill_array(signal), index=df.index)
 
 
-def find_double_patterns(hist: pd.Series, distance_min: int = 7, 
+def find_double_patterns(hist: pd.Series | np.ndarray, distance_min: int = 7, 
                         distance_max: int = 25, prominence: float = 0.05) -> tuple[list[tuple[int, int]], list[tuple[int, int]]]:
     """Find double tops and bottoms in indicator values.
 
@@ -641,7 +666,7 @@ def find_double_patterns(hist: pd.Series, distance_min: int = 7,
     Validates patterns by checking for significant valley/peak between points.
 
     Args:
-        hist (pd.Series): Series to analyze for patterns
+        hist (pd.Series | np.ndarray): Series to analyze for patterns
         distance_min (int, optional): Minimum distance between peaks. Defaults to 7.
         distance_max (int, optional): Maximum distance between peaks. Defaults to 25.
         prominence (float, optional): Required peak prominence. Defaults to 0.05.
@@ -650,7 +675,8 @@ def find_double_patterns(hist: pd.Series, distance_min: int = 7,
         tuple[list[tuple[int, int]], list[tuple[int, int]]]: Lists of (first_idx, second_idx)
             for tops and bottoms
     """
-    prominence *= (hist.max() - hist.min())
+    hist = np.asarray(hist, dtype=float)
+    prominence *= (np.nanmax(hist) - np.nanmin(hist))
 
     # Find all peaks first
     peaks, _ = find_peaks(hist, 
@@ -658,7 +684,7 @@ def find_double_patterns(hist: pd.Series, distance_min: int = 7,
                           prominence=prominence)
 
     # Filter for positive peaks only
-    pos_peaks = peaks[hist.iloc[peaks] > 0]
+    pos_peaks = peaks[hist[peaks] > 0]
 
     # Find all troughs
     troughs, _ = find_peaks(-hist,
@@ -666,9 +692,7 @@ def find_double_patterns(hist: pd.Series, distance_min: int = 7,
                             prominence=prominence)
 
     # Filter for negative troughs only
-    neg_troughs = troughs[hist.iloc[troughs] < 0]
-
-    hist = hist.values
+    neg_troughs = troughs[hist[troughs] < 0]
 
     return _find_double_pattern_numba(hist, pos_peaks, neg_troughs, distance_max)
 
@@ -729,8 +753,8 @@ def _find_double_pattern_numba(hist: np.array, pos_peaks: np.array, neg_troughs:
     return double_tops, double_bottoms
 
 
-def double_pattern_signals(df: pd.Series, double_tops: list[tuple[int, int]],
-                         double_bottoms: list[tuple[int, int]]) -> pd.Series:
+def double_pattern_signals(df: pd.Series | np.ndarray, double_tops: list[tuple[int, int]],
+                         double_bottoms: list[tuple[int, int]]) -> pd.Series | np.ndarray:
     """Convert double pattern indices to trading signals.
 
     Creates signals at the confirmation points of patterns:
@@ -738,22 +762,52 @@ def double_pattern_signals(df: pd.Series, double_tops: list[tuple[int, int]],
     - Buy (1) after second trough of double bottom
 
     Args:
-        df (pd.Series): Original series for index alignment
+        df (pd.Series | np.ndarray): Original series for index alignment
         double_tops (list[tuple[int, int]]): List of double top pattern indices
         double_bottoms (list[tuple[int, int]]): List of double bottom pattern indices
 
     Returns:
-        pd.Series: Trading signals (-1 or 1)
+        pd.Series | np.ndarray: Trading signals (-1 or 1), an array when df is an array
     """
-    signal = pd.Series(np.nan, index=df.index)
+    signal = np.full(len(df), np.nan)
 
     for _, top2 in double_tops:
-        signal.iloc[top2] = -1  # Bearish signal after second peak
+        signal[top2] = -1  # Bearish signal after second peak
 
     for _, bottom2 in double_bottoms:
-        signal.iloc[bottom2] = 1  # Bullish signal after second trough
+        signal[bottom2] = 1  # Bullish signal after second trough
+
+    return _like(fill_array(signal), df)
 
-    return fill(signal)
+
+def _method_vote(method: str, threshold: float, weights: Optional[list[float]],
+                 n_signals: int) -> tuple[float, Optional[list[float]]]:
+    """Threshold and weights a combination method votes with."""
+    if method == 'unanimous':
+        return .99, [1 / n_signals] * n_signals
+    if method == 'majority':
+        return 0, [1 / n_signals] * n_signals
+    return threshold, weights
+
+
+def combine(signals: pd.DataFrame, method: str, threshold: float,
+            weights: Optional[list[float]] = None) -> pd.Series:
+    """Combine individual signals with one of the combination methods.
+
+    'unanimous' and 'majority' vote with equal weights at fixed thresholds,
+    any other method is a weighted vote with the given threshold and weights.
+
+    Args:
+        signals (pd.DataFrame): DataFrame where each column is a signal series
+        method (str): Signal combination method ('weighted', 'unanimous', 'majority')
+        threshold (float): Voting threshold for signal generation
+        weights (list[float], optional): Weights for each signal
+
+    Returns:
+        pd.Series: Combined signal series (-1 or 1)
+    """
+    threshold, weights = _method_vote(method, threshold, weights, len(signals.columns))
+    return vote(signals, threshold, weights)
 
 
 def vote(signals: pd.DataFrame, threshold: float, weights: list[float]) -> pd.Series:
@@ -771,10 +825,50 @@ def vote(signals: pd.DataFrame, threshold: float, weights: list[float]) -> pd.Se
         pd.Series: Combined signal series (-1 or 1)
     """
     weights = np.array(weights)
-    combined = signals.dot(weights)
-    signal = pd.Series(np.where(combined > threshold, 1, 
-                    np.where(combined < -threshold, -1, np.nan)), index=signals.index)
-    return fill(signal)
+    combined = signals.dot(weights).to_numpy(dtype=float)
+    return pd.Series(sk.vote_fill(combined[:, None], np.array([threshold], dtype=float))[:, 0], index=signals.index)
+
+
+def vote_arrays(signals: list[np.ndarray], threshold: float, weights: list[float]) -> np.ndarray:
+    """Combine signal arrays using weighted voting, the array counterpart of vote.
+
+    Args:
+        signals (list[np.ndarray]): Signal arrays of the same shape, (n,) or (n, k)
+        threshold (float): Required threshold for generating signal [-1 to 1]
+        weights (list[float]): Weight for each signal (must sum to 1)
+
+    Returns:
+        np.ndarray: Combined signals (-1 or 1) with the shape of each input
+    """
+    weights = np.asarray(weights, dtype=float)
+    stacked = np.stack(signals).astype(float)
+    one_d = stacked.ndim == 2
+
+    # one (n, signals) product per candidate, laid out like vote's DataFrame.dot so that
+    # votes landing exactly on the threshold round the same way
+    if one_d:
+        combined = stacked.T @ weights
+    else:
+        combined = np.column_stack([np.ascontiguousarray(stacked[:, :, j]).T @ weights
+                                    for j in range(stacked.shape[2])])
+    combined = np.ascontiguousarray(combined.reshape(len(combined), -1))
+    signal = sk.vote_fill(combined, np.full(combined.shape[1], threshold, dtype=float))
+    return signal[:, 0] if one_d else signal
+
+
+def fill_array(signal: np.ndarray, default: int = 1) -> np.ndarray:
+    """Forward-fill signal arrays down each column, the array counterpart of fill.
+
+    Args:
+        signal (np.ndarray): Signals of shape (n,) or (n, k) with potential NaN values
+        default (int, optional): Initial position. Defaults to 1.
+
+    Returns:
+        np.ndarray: Continuous integer signals of -1 and 1 values
+    """
+    signal = np.asarray(signal, dtype=float)
+    filled = sk.ffill(np.ascontiguousarray(signal.reshape(len(signal), -1)), int(default))
+    return filled.reshape(signal.shape)
 
 
 def fill(series: pd.Series, default: int = 1) -> pd.Series:
@@ -790,9 +884,8 @@ def fill(series: pd.Series, default: int = 1) -> pd.Series:
     Returns:
         pd.Series: Continuous signal series of -1 and 1 values
     """
-    if np.isnan(series.iloc[0]):
-        series.iloc[0] = default
-    return series.ffill().astype(int)
+    values = series.to_numpy(dtype=float)
+    return pd.Series(sk.ffill(values.reshape(-1, 1), int(default))[:, 0], index=series.index, name=series.name)
 
 # TODO:
 # bb signals: bounce, double, walks, squeeze, breakout, pctB
@@ -0,0 +1,329 @@
+''' Compiled signal kernels behind signal_gen
+Numba versions of the signal generators that work on raw float64 arrays,
+so each signal is one pass over the data instead of a chain of pandas
+shift/where/rolling temporaries
+- band kernels take price of shape (n,) and bands of shape (n, k), one column per candidate,
+  and run the candidate columns in parallel threads
+- signals come back as int64 arrays of -1 and 1, forward filled from a default position
+- NaN comparisons are False, the same as in the pandas versions
+- ewm_mean is the resumable moving average behind TAEngine's streamed indicators
+'''
+
+import numpy as np
+import numba as nb
+
+# tbb or omp, the workqueue layer aborts when request threads launch kernels concurrently
+nb.config.THREADING_LAYER = 'threadsafe'
+
+kernel = nb.njit(cache=True, nogil=True, error_model='numpy')
+# columns are independent, so prange splits them across numba's threads
+column_kernel = nb.njit(cache=True, nogil=True, parallel=True, error_model='numpy')
+
+
+def ewm_state() -> np.ndarray:
+    """Running state of ewm_mean before the first value: mean, weight and observation count"""
+    return np.array([np.nan, 1., -1.])
+
+
+@kernel
+def ewm_mean(values: np.ndarray, alpha: float, min_periods: int, state: np.ndarray) -> np.ndarray:
+    """Exponentially weighted mean that continues from the state of earlier values
+
+    Follows the recurrence of Series.ewm(adjust=True).mean() operation for operation,
+    so a series computed in pieces matches computing it at once exactly.
+
+    Args:
+        values (np.ndarray): (n,) values following the ones state has seen
+        alpha (float): smoothing factor, 1 / (1 + com) as pandas derives it
+        min_periods (int): observations needed before a mean is reported
+        state (np.ndarray): (3,) state from ewm_state, updated in place
+
+    Returns:
+        np.ndarray: (n,) means, NaN before min_periods observations
+    """
+    n = len(values)
+    out = np.empty(n)
+    weighted, old_wt, nobs = state[0], state[1], state[2]
+    for i in range(n):
+        cur = values[i]
+        is_observation = cur == cur
+        if nobs < 0:
+            weighted = cur
+            nobs = 1. if is_observation else 0.
+        else:
+            nobs += is_observation
+            if weighted == weighted:
+                old_wt *= 1. - alpha
+                if is_observation:
+                    # constant runs keep their exact value
+                    if weighted != cur:
+                        weighted = old_wt * weighted + cur
+                        weighted /= old_wt + 1.
+                    old_wt += 1.
+            elif is_observation:
+                weighted = cur
+        out[i] = weighted if nobs >= min_periods else np.nan
+    state[0], state[1], state[2] = weighted, old_wt, nobs
+    return out
+
+
+@kernel
+def ffill(signal: np.ndarray, default: int = 1) -> np.ndarray:
+    """Forward-fills NaN positions down each column, starting from default
+
+    Args:
+        signal (np.ndarray): (n, k) signals with NaN where there is no new position
+
+    Returns:
+        np.ndarray: (n, k) continuous signals
+    """
+    n, k = signal.shape
+    out = np.empty((n, k), dtype=np.int64)
+    last = np.full(k, float(default))
+    for i in range(n):
+        for j in range(k):
+            if not np.isnan(signal[i, j]):
+                last[j] = signal[i, j]
+            out[i, j] = int(last[j])
+    return out
+
+
+@kernel
+def vote_fill(combined: np.ndarray, threshold: np.ndarray, default: int = 1) -> np.ndarray:
+    """Thresholds combined votes into positions and forward-fills them
+
+    Args:
+        combined (np.ndarray): (n, k) weighted votes
+        threshold (np.ndarray): (k,) thresholds, votes above one go long, below its negative go short
+
+    Returns:
+        np.ndarray: (n, k) continuous signals
+    """
+    n, k = combined.shape
+    out = np.empty((n, k), dtype=np.int64)
+    last = np.full(k, default)
+    for i in range(n):
+        for j in range(k):
+            if combined[i, j] > threshold[j]:
+                last[j] = 1
+            elif combined[i, j] < -threshold[j]:
+                last[j] = -1
+            out[i, j] = last[j]
+    return out
+
+
+@kernel
+def rsi_crossover(rsi: np.ndarray, ub: float, lb: float, reversion_exit: bool,
+                  m_rev: bool, m_rev_bound: float) -> np.ndarray:
+    """RSI crossover signals with the optional mean reversion override
+
+    Args:
+        rsi (np.ndarray): (n,) RSI values
+        ub (float): overbought level
+        lb (float): oversold level
+        reversion_exit (bool): signal on crossing back inside the bounds instead of outside
+        m_rev (bool): go long once RSI falls to m_rev_bound during a short
+        m_rev_bound (float): mean reversion level
+
+    Returns:
+        np.ndarray: (n,) continuous signals
+    """
+    n = len(rsi)
+    out = np.empty(n, dtype=np.int64)
+    position = 1
+    triggered = False
+    prev = np.nan
+    for i in range(n):
+        r = rsi[i]
+        if reversion_exit:
+            short_entry = prev > ub and r < ub
+            if short_entry:
+                position = -1
+            elif prev < lb and r > lb:
+                position = 1
+        else:
+            short_entry = prev <= ub and r > ub
+            if r > ub:
+                position = -1
+            elif r < lb:
+                position = 1
+
+        # a short entry starts a new group, within it the override stays on once triggered
+        if short_entry:
+            triggered = False
+        if m_rev and r <= m_rev_bound and position == -1:
+            triggered = True
+        out[i] = 1 if m_rev and triggered else position
+        prev = r
+    return out
+
+
+@kernel
+def macd_momentum(hist: np.ndarray) -> np.ndarray:
+    """MACD histogram slope signals
+
+    Args:
+        hist (np.ndarray): (n,) MACD histogram
+
+    Returns:
+        np.ndarray: (n,) continuous signals
+    """
+    n = len(hist)
+    out = np.empty(n, dtype=np.int64)
+    position = 1
+    for i in range(n):
+        if i > 0:
+            prev = hist[i - 1]
+            if prev < hist[i] and prev < 0:
+                position = 1
+            elif prev > hist[i] and prev > 0:
+                position = -1
+        out[i] = position
+    return out
+
+
+@column_kernel
+def bb_bounce(price: np.ndarray, up: np.ndarray, down: np.ndarray) -> np.ndarray:
+    """Signals on price crossing back inside the bands"""
+    n, k = up.shape
+    out = np.empty((n, k), dtype=np.int64)
+    for j in nb.prange(k):
+        position = 1
+        for i in range(n):
+            p = price[i]
+            prev = price[i - 1] if i > 0 else np.nan
+            if prev > up[i, j] and p < up[i, j]:
+                position = -1
+            elif prev < down[i, j] and p > down[i, j]:
+                position = 1
+            out[i, j] = position
+    return out
+
+
+@column_kernel
+def bb_walks(price: np.ndarray, up: np.ndarray, down: np.ndarray, prox: float, periods: int) -> np.ndarray:
+    """Signals on price staying near a band for periods - 1 of the last periods rows"""
+    n, k = up.shape
+    out = np.empty((n, k), dtype=np.int64)
+    for j in nb.prange(k):
+        position = 1
+        near_upper = np.zeros(n, dtype=np.bool_)
+        near_lower = np.zeros(n, dtype=np.bool_)
+        upper_count = 0
+        lower_count = 0
+        for i in range(n):
+            p = price[i]
+            width = up[i, j] - down[i, j]
+            near_upper[i] = abs(p - up[i, j]) < width * prox
+            near_lower[i] = abs(p - down[i, j]) < width * prox
+            upper_count += near_upper[i]
+            lower_count += near_lower[i]
+            if i >= periods:
+                upper_count -= near_upper[i - periods]
+                lower_count -= near_lower[i - periods]
+
+            if i >= periods - 1:
+                if upper_count >= periods - 1:
+                    position = 1
+                elif lower_count >= periods - 1:
+                    position = -1
+            out[i, j] = position
+    return out
+
+
+@column_kernel
+def rolling_quantile(values: np.ndarray, window: int, q: float) -> np.ndarray:
+    """Rolling linear-interpolated quantile of each column, NaN unless the whole window is defined
+
+    Matches DataFrame.rolling(window).quantile(q). The window is kept sorted
+    and updated one value in, one value out, instead of sorted per row.
+    """
+    n, k = values.shape
+    out = np.full((n, k), np.nan)
+    pos = q * (window - 1)
+    lo = int(pos)
+    frac = pos - lo
+    for j in nb.prange(k):
+        ordered = np.empty(window + 1)  # one extra slot while a value is swapped in
+        size = 0
+        missing = 0
+        for i in range(n):
+            v = values[i, j]
+            if np.isnan(v):
+                missing += 1
+            else:
+                # insert keeping the window sorted
+                m = size
+                while m > 0 and ordered[m - 1] > v:
+                    ordered[m] = ordered[m - 1]
+                    m -= 1
+                ordered[m] = v
+                size += 1
+
+            if i >= window:
+                old = values[i - window, j]
+                if np.isnan(old):
+                    missing -= 1
+                else:
+                    m = 0
+                    while ordered[m] != old:
+                        m += 1
+                    for t in range(m, size - 1):
+                        ordered[t] = ordered[t + 1]
+                    size -= 1
+
+            if i >= window - 1 and missing == 0:
+                if frac == 0:
+                    out[i, j] = ordered[lo]
+                else:
+                    out[i, j] = ordered[lo] + (ordered[lo + 1] - ordered[lo]) * frac
+    return out
+
+
+@column_kernel
+def bb_squeeze(price: np.ndarray, up: np.ndarray, down: np.ndarray, aggressive: bool,
+               window: int = 20, q: float = 0.2) -> np.ndarray:
+    """Signals on the price direction when the bands expand after a squeeze
+
+    A squeeze is a band width below its rolling q quantile over window rows
+    """
+    n, k = up.shape
+    width = up - down
+    limit = rolling_quantile(width, window, q)
+    out = np.empty((n, k), dtype=np.int64)
+    if n == 0:
+        return out
+    for j in nb.prange(k):
+        position = 1
+        out[0, j] = position
+        for i in range(1, n):
+            p = price[i]
+            prev = price[i - 1]
+            prev_squeeze = width[i - 1, j] < limit[i - 1, j]
+            if aggressive:
+                ext = width[i, j] > width[i - 1, j] and prev_squeeze
+            else:
+                ext = not (width[i, j] < limit[i, j]) and prev_squeeze
+            if ext and p > prev:
+                position = 1
+            elif ext and p < prev:
+                position = -1
+            out[i, j] = position
+    return out
+
+
+@column_kernel
+def bb_pctB(price: np.ndarray, up: np.ndarray, down: np.ndarray, overbought: float, oversold: float) -> np.ndarray:
+    """Signals on %B leaving the oversold/overbought range"""
+    n, k = up.shape
+    out = np.empty((n, k), dtype=np.int64)
+    for j in nb.prange(k):
+        position = 1
+        for i in range(n):
+            pctB = (price[i] - down[i, j]) / (up[i, j] - down[i, j])
+            if pctB > overbought:
+                position = -1
+            elif pctB < oversold:
+                position = 1
+            out[i, j] = position
+    return out
@@ -16,24 +16,80 @@ Features:
 - Parameter optimization via grid search
 - Strategy weights optimization
 - Signal combination through weighted voting
+- Indicators extended by newly appended bars instead of recomputed
 '''
 
 from abc import ABC, abstractmethod
 from itertools import product
+from functools import partial
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
 from pandas.core.frame import DataFrame
 import numpy as np
 import app.core.signal_gen as sg
+import app.core.signal_kernels as sk
 import scipy.optimize as sco
 from app.core.asset import Asset
-from typing import Optional, List
+from app.core.asset_registry import registry
+from app.core import shared_data, workers
+from app.core.cache import LRUCache
+from typing import NamedTuple, Optional, List
 from datetime import datetime, date
-import multiprocessing as mp
+import copy
+import os
 
 DateLike = str | datetime | date | pd.Timestamp
 
+TA_CACHE_BYTES = int(os.getenv('TA_CACHE_MAX_BYTES', 64 * 1024 ** 2))
+INDICATOR_CACHE_BYTES = int(os.getenv('INDICATOR_CACHE_MAX_BYTES', 256 * 1024 ** 2))
+
+# indicators of named sources shared by every engine in the process
+indicator_cache = LRUCache(INDICATOR_CACHE_BYTES)
+
+# layout of a pickled strategy, bumped when the fields of Strategy.__getstate__ change
+STATE_VERSION = 1
+
+
+def data_fingerprint(data: pd.Series) -> tuple:
+    """Identifies the values of a series cheaply.
+
+    Changes when rows are added or the column is restated, e.g. after a
+    dividend adjustment, so cached indicators of older data are never reused.
+
+    Args:
+        data (pd.Series): Series an indicator is computed from
+
+    Returns:
+        tuple: (column, length, first and last timestamp, last value, sum)
+    """
+    if len(data) == 0:
+        return (data.name, 0)
+    values = data.to_numpy(dtype=float)
+    return (data.name, len(values), data.index[0], data.index[-1], float(values[-1]), float(np.nansum(values)))
+
+
+def _ewm_alpha(param_type: str, param: float) -> float:
+    """Smoothing factor pandas' ewm uses for a parameter, derived through the center of mass the same way."""
+    if param_type == 'com':
+        com = param
+    elif param_type == 'span':
+        com = (param - 1) / 2
+    elif param_type == 'halflife':
+        com = 1 / (1 - np.exp(np.log(0.5) / param)) - 1
+    elif param_type == 'alpha':
+        com = (1 - param) / param
+    else:
+        raise ValueError(f'Invalid ewm parameter type: {param_type}')
+    return 1. / (1. + float(com))
+
+
+class _Stream(NamedTuple):
+    # fingerprint of the data a streamed indicator was last computed on, and its running state
+    fingerprint: tuple
+    state: object
+
+
 class TAEngine:
     """Technical Analysis calculation engine with caching capabilities.
     
@@ -41,17 +97,109 @@ class TAEngine:
     while caching results to avoid redundant computations. Can be used standalone
     or as part of strategy implementations.
 
-    The engine caches results using a combination of parameters and data name
-    as keys, allowing efficient reuse when the same calculations are needed
-    multiple times, such as during optimization.
+    The engine caches results under (indicator, *parameters, source, data name,
+    data fingerprint) tuple keys, allowing efficient reuse when the same
+    calculations are needed multiple times, such as during optimization.
+    Engines created with a source, such as the asset's ticker, share the
+    process-wide indicator_cache, so every strategy on the same asset reuses
+    the others' indicators. Engines without a source keep a private cache.
+    Caches are bounded by the byte size of the cached series and evict the
+    least recently used ones. A private cache is left out when the engine is
+    pickled unless persist_cache is set.
+
+    Moving averages, RSI, MACD and Bollinger Bands are streamed: the engine
+    also keeps their running state, such as EMA weights and Wilder gain/loss
+    averages, and when the data only gained rows since the last computation
+    it extends the cached values by the new rows instead of recomputing the
+    history. Rolling windows are extended by recomputing the trailing window.
 
     Attributes:
-        cache (dict): Dictionary storing computed technical indicators
+        source (str | None): Identifier of the data the engine sees, e.g. the ticker
+        cache (LRUCache): Size-bounded cache of computed technical indicators
+        persist_cache (bool): Whether pickling keeps a private cache's indicators
     """
 
-    def __init__(self):
-        """Initialize an empty cache for storing computed indicators."""
-        self.cache = {}
+    def __init__(self, source: Optional[str] = None, max_bytes: int = TA_CACHE_BYTES,
+                 persist_cache: bool = False):
+        """Initialize the engine's indicator cache.
+
+        Args:
+            source (str, optional): Identifier of the data, e.g. the ticker, to share the
+                process-wide cache. Defaults to None, a private cache.
+            max_bytes (int, optional): Size budget of a private cache. Defaults to TA_CACHE_BYTES.
+            persist_cache (bool, optional): Keep a private cache's indicators when pickled. Defaults to False.
+        """
+        self.source = source
+        self.cache = indicator_cache if source is not None else LRUCache(max_bytes)
+        self.persist_cache = persist_cache
+
+    def __getstate__(self) -> dict:
+        entries = self.cache.items() if self.persist_cache and self.source is None else []
+        return {'source': self.source, 'max_bytes': self.cache.max_size,
+                'persist_cache': self.persist_cache, 'entries': entries}
+
+    def __setstate__(self, state: dict) -> None:
+        # engines pickled before the LRU cache only hold a 'cache' dict, which is dropped
+        self.__init__(state.get('source'), state.get('max_bytes', TA_CACHE_BYTES), state.get('persist_cache', False))
+        for key, value in state.get('entries', []):
+            self.cache.put(key, value)
+
+    def _cached(self, key: tuple, data: pd.Series, name: str, compute):
+        return self.cache.get_or_load(key + (self.source, name, data_fingerprint(data)), compute)
+
+    def _streamed(self, key: tuple, data: pd.Series, name: str, update):
+        """Cache an indicator that can be extended when rows are appended to its data.
+
+        update(start, state) computes the indicator for data.iloc[start:] from the
+        running state after the rows before start, or from scratch when state is
+        None, and returns those rows with the state after them. If the data the
+        indicator was last computed on is a prefix of data and its values are
+        still cached, only the appended rows are computed.
+        """
+        stream_key = ('stream',) + key + (self.source, name)
+        fingerprint = data_fingerprint(data)
+
+        def compute():
+            stream = self.cache.get(stream_key)
+            previous = None
+            if stream is not None:
+                n = stream.fingerprint[1]
+                if 0 < n < len(data) and data_fingerprint(data.iloc[:n]) == stream.fingerprint:
+                    previous = self.cache.get(key + (self.source, name, stream.fingerprint))
+
+            if previous is None:
+                result, state = update(0, None)
+            else:
+                rows, state = update(len(previous), stream.state)
+                result = pd.concat([previous, rows])
+                # the values of the shorter data are a prefix of result, so they need not be kept twice
+                self.cache.pop(key + (self.source, name, stream.fingerprint))
+            self.cache.put(stream_key, _Stream(fingerprint, state))
+            return result
+
+        return self.cache.get_or_load(key + (self.source, name, fingerprint), compute)
+
+    def _ewm(self, data: pd.Series, start: int, alpha: float, state: Optional[np.ndarray],
+             min_periods: int = 1) -> tuple[pd.Series, np.ndarray]:
+        """Exponentially weighted mean of data.iloc[start:] continuing from state, see _streamed."""
+        state = sk.ewm_state() if state is None else state.copy()
+        rows = data.iloc[start:]
+        mean = sk.ewm_mean(rows.to_numpy(dtype=float), alpha, min_periods, state)
+        return pd.Series(mean, index=rows.index, name=data.name), state
+
+    @staticmethod
+    def _rolling(data: pd.Series, start: int, window: int, stat: str) -> pd.Series:
+        """Rolling stat of data.iloc[start:], computed over the trailing window only."""
+        lo = max(0, start - window + 1)
+        return getattr(data.iloc[lo:].rolling(window=window), stat)().iloc[start - lo:]
+
+    def cache_stats(self) -> dict:
+        """Size, hit, miss and eviction counters of the indicator cache.
+
+        Returns:
+            dict: Cache statistics
+        """
+        return self.cache.stats()
 
     def calculate_ma(self, data: pd.Series, ewm: bool, param_type: str, 
                     param: float, name: str) -> pd.Series:
@@ -73,14 +221,12 @@ class TAEngine:
         Returns:
             pd.Series: Moving average series
         """
-        key = f'ma_{param_type}={param}, {name=}'
-        if key not in self.cache:
+        def update(start, state):
             if ewm:
-                self.cache[key] = data.ewm(**{f'{param_type}': param}).mean()
-            else:
-                self.cache[key] = data.rolling(window=param).mean()
+                return self._ewm(data, start, _ewm_alpha(param_type, param), state)
+            return self._rolling(data, start, param, 'mean'), None
 
-        return self.cache[key]
+        return self._streamed(('ma', param_type, param), data, name, update)
 
     def calculate_rsi(self, data: pd.Series, window: int, name: str) -> pd.Series:
         """Calculate Relative Strength Index (RSI) with caching.
@@ -96,15 +242,22 @@ class TAEngine:
         Returns:
             pd.Series: RSI values ranging from 0 to 100
         """
-        key = f'rsi_window={window}, {name=}'
-        if key not in self.cache:
-            delta = data.diff()
-            gain = (delta.where(delta > 0, 0)).ewm(alpha=1/window, min_periods=window).mean()
-            loss = (-delta.where(delta < 0, 0)).ewm(alpha=1/window, min_periods=window).mean()
-            rs = gain / loss
-            self.cache[key] = 100 - (100 / (1 + rs))
-
-        return self.cache[key]
+        def update(start, state):
+            # Wilder averages of gains and losses, resumed from the last close before start
+            values = data.to_numpy(dtype=float)
+            delta = np.diff(values[start - 1:]) if start else np.concatenate([[np.nan], np.diff(values)])
+            alpha = _ewm_alpha('alpha', 1 / window)
+            gain_state, loss_state = (None, None) if state is None else state
+            gain = pd.Series(np.where(delta > 0, delta, 0.))
+            loss = pd.Series(-np.where(delta < 0, delta, 0.))
+            gain, gain_state = self._ewm(gain, 0, alpha, gain_state, window)
+            loss, loss_state = self._ewm(loss, 0, alpha, loss_state, window)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rs = gain.to_numpy() / loss.to_numpy()
+                rsi = 100 - (100 / (1 + rs))
+            return pd.Series(rsi, index=data.index[start:], name=data.name), (gain_state, loss_state)
+
+        return self._streamed(('rsi', window), data, name, update)
 
     def calculate_macd(self, data: pd.Series, windows: list[int], name: str) -> pd.DataFrame:
         """Calculate Moving Average Convergence Divergence (MACD) with caching.
@@ -129,24 +282,24 @@ class TAEngine:
                 - signal_line: EMA of the MACD line
                 - macd_hist: MACD histogram (signal_line - macd)
         """
-        key = f'macd_{windows=}, {name=}'
-        if key not in self.cache:
-            results = pd.DataFrame(index=data.index)
+        def update(start, state):
+            results = pd.DataFrame(index=data.index[start:])
 
             alpha_fast = 2 / (windows[0] + 1)
             alpha_slow = 2 / (windows[1] + 1)
             alpha_signal = 2 / (windows[2] + 1)
 
-            results['macd'] = (self.calculate_ma(data, True, 'alpha', alpha_fast, name)
-                                - self.calculate_ma(data, True, 'alpha', alpha_slow, name))
+            results['macd'] = (self.calculate_ma(data, True, 'alpha', alpha_fast, name).iloc[start:]
+                                - self.calculate_ma(data, True, 'alpha', alpha_slow, name).iloc[start:])
 
-            results['signal_line'] = self.calculate_ma(results['macd'], True, 'alpha', alpha_signal, name)
+            # the signal line depends on fast and slow too, so it is cached as part of the result
+            # rather than as an EMA of its own
+            results['signal_line'], state = self._ewm(results['macd'], 0, _ewm_alpha('alpha', alpha_signal), state)
 
             results['macd_hist'] = results['signal_line'] - results['macd']
+            return results, state
 
-            self.cache[key] = results
-
-        return self.cache[key]
+        return self._streamed(('macd', tuple(windows)), data, name, update)
 
     def rolling_std(self, data: pd.Series, ewm: bool, param_type: str, 
                     param: float, name: str) -> pd.Series:
@@ -167,14 +320,16 @@ class TAEngine:
         Returns:
             pd.Series: Rolling standard deviation series
         """
-        key = f'rol_std_{param_type}={param}, {name=}'
-        if key not in self.cache:
-            if ewm:
-                self.cache[key] = data.ewm(**{f'{param_type}': param}).std()
-            else:
-                self.cache[key] = data.rolling(window=param).std()
+        if ewm:
+            def compute():
+                return data.ewm(**{f'{param_type}': param}).std()
+
+            return self._cached(('rol_std', param_type, param), data, name, compute)
 
-        return self.cache[key]
+        def update(start, state):
+            return self._rolling(data, start, param, 'std'), None
+
+        return self._streamed(('rol_std', param_type, param), data, name, update)
 
     def calculate_bb(self, data: pd.Series, window: int, num_std: float, 
                     name: str) -> pd.DataFrame:
@@ -197,18 +352,29 @@ class TAEngine:
                 - bol_up: Upper Bollinger Band
                 - bol_down: Lower Bollinger Band
         """
-        key = f'bb_{window=}_{num_std=}, {name}'
-        if key not in self.cache:
-            results = pd.DataFrame(index=data.index)
+        def update(start, state):
+            results = pd.DataFrame(index=data.index[start:])
 
-            results['sma'] = self.calculate_ma(data, False, 'window', window, name)
-            std = self.rolling_std(data, False, 'window', window, name)
+            results['sma'] = self.calculate_ma(data, False, 'window', window, name).iloc[start:]
+            std = self.rolling_std(data, False, 'window', window, name).iloc[start:]
             results['bol_up'] = results['sma'] + num_std * std
             results['bol_down'] = results['sma'] - num_std * std
+            return results, None
+
+        return self._streamed(('bb', window, num_std), data, name, update)
+
 
-            self.cache[key] = results
+class VoteInputs(NamedTuple):
+    """Precomputed arrays a weight optimization evaluates candidates on.
 
-        return self.cache[key]
+    Attributes:
+        signals (np.ndarray): Component signals of shape (m, n), one row per signal
+        rows (np.ndarray): Positions in the signals of each backtest row
+        returns (np.ndarray): Log returns of the backtest rows
+    """
+    signals: np.ndarray
+    rows: np.ndarray
+    returns: np.ndarray
 
 
 class Strategy(ABC):
@@ -225,8 +391,10 @@ class Strategy(ABC):
 
     Attributes:
         asset (Asset): Asset object containing price data and metadata
-        daily (pd.DataFrame): DataFrame containing daily trading signals and returns
-        five_min (pd.DataFrame): DataFrame containing 5-minute trading signals and returns
+        daily (pd.DataFrame): DataFrame containing daily trading signals and returns,
+            computed on first access
+        five_min (pd.DataFrame): DataFrame containing 5-minute trading signals and returns,
+            computed on first access
         params (str): String representation of strategy parameters
 
     Abstract Methods:
@@ -241,6 +409,115 @@ class Strategy(ABC):
             asset (Asset): Asset object containing price data and metadata
         """
         self.asset = asset
+        self._frames = {}
+
+    def __copy__(self) -> 'Strategy':
+        """Copy whose parameters change independently, sharing the asset and the computed frames."""
+        strategy = self.__class__.__new__(self.__class__)
+        strategy.__dict__.update(self.__dict__)
+        strategy._frames = dict(self._frames)
+        return strategy
+
+    def __getstate__(self) -> dict:
+        """Parameters only: the asset is kept by ticker and the frames are rebuilt on first access."""
+        state = {k: v for k, v in self.__dict__.items() if k not in ('asset', '_frames')}
+        state['asset'] = self.asset.ticker
+        state['schema'] = STATE_VERSION
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """Re-attaches the shared asset of the pickled ticker from the asset registry."""
+        state = dict(state)
+        schema = state.pop('schema', None)
+        if schema is None:
+            # full state pickled before the slim layout: its private asset copy and eagerly
+            # built frames are replaced, and its engine joins the shared indicator cache
+            state['asset'] = state['asset'].ticker
+            state.pop('daily', None)
+            state.pop('five_min', None)
+            if 'engine' in state and state['engine'].source is None:
+                state['engine'] = TAEngine(state['asset'])
+        elif schema != STATE_VERSION:
+            raise ValueError(f'Unsupported strategy state version: {schema}')
+        state['asset'] = registry.get(state['asset'])
+        state['_frames'] = {}
+        self.__dict__.update(state)
+
+    @property
+    def daily(self) -> DataFrame:
+        """Daily signals and returns, computed on first access after a parameter change."""
+        return self._frame('daily')
+
+    @daily.setter
+    def daily(self, value: DataFrame) -> None:
+        self._drop_frame('daily')
+        self._frames['daily'] = value
+
+    @property
+    def five_min(self) -> DataFrame:
+        """5-minute signals and returns, computed on first access after a parameter change."""
+        return self._frame('five_min')
+
+    @five_min.setter
+    def five_min(self, value: DataFrame) -> None:
+        self._drop_frame('five_min')
+        self._frames['five_min'] = value
+
+    def _frame(self, name: str) -> DataFrame:
+        frames = self.__dict__.setdefault('_frames', {})
+        if name not in frames:
+            frames[name] = self._compute_frame(name)
+            frames[(name, 'rows')] = self._source_rows(name)
+        return frames[name]
+
+    def _source_rows(self, name: str) -> tuple:
+        """Length and last timestamp of the asset data a frame is built from."""
+        source = self.asset.daily if name == 'daily' else self.asset.five_minute
+        return (len(source), source.index[-1] if len(source) else None)
+
+    def refresh(self, asset: Optional[Asset] = None) -> bool:
+        """Pick up rows appended to the asset's data since the frames were built.
+
+        Frames of a timeframe whose data changed are rebuilt on next access.
+        Their indicators extend the cached values by the new rows only, see TAEngine.
+
+        Args:
+            asset (Asset, optional): Newer copy of the strategy's asset, e.g. from
+                the asset registry. Defaults to None, the current asset.
+
+        Returns:
+            bool: Whether any frame has to be rebuilt
+        """
+        if asset is not None:
+            self.asset = asset
+        # frames assigned directly through the setters have no recorded rows and are kept
+        stale = [name for name in ('daily', 'five_min')
+                 if (name, 'rows') in self._frames and self._frames[(name, 'rows')] != self._source_rows(name)]
+        for name in stale:
+            self._drop_frame(name)
+        return bool(stale)
+
+    def _drop_frame(self, name: str) -> None:
+        """Drop one timeframe's frame with everything derived from it: rows, arrays and component signals."""
+        for key in [key for key in self._frames if key == name or (isinstance(key, tuple) and key[0] == name)]:
+            del self._frames[key]
+
+    def _reset_frames(self) -> None:
+        """Drop the computed frames so the next access rebuilds them with the current parameters."""
+        self._frames = {}
+
+    def _compute_frame(self, name: str) -> DataFrame:
+        """Build the signals and returns of one timeframe.
+
+        To be implemented by concrete strategy classes.
+
+        Args:
+            name (str): 'daily' or 'five_min'
+
+        Returns:
+            pd.DataFrame: Strategy frame of the timeframe
+        """
+        raise NotImplementedError
 
     @abstractmethod
     def plot(self):
@@ -281,6 +558,9 @@ class Strategy(ABC):
                 - returns: Buy-and-hold cumulative returns
                 - strategy: Strategy cumulative returns
         """
+        if not plot:
+            return self._fast_backtest(timeframe, start_date, end_date)
+
         name = self.__class__.__name__
         df = self.daily.copy() if timeframe == '1d' else self.five_min.copy()
         df.dropna(inplace=True)
@@ -392,34 +672,158 @@ class Strategy(ABC):
 
 
         return np.exp(df[['returns', 'strategy']].sum()) - 1
-    
+
+    def _backtest_arrays(self, name: str) -> tuple[pd.DatetimeIndex, np.ndarray, np.ndarray]:
+        """Index, hold and strategy log returns of the complete rows of a frame, built once per frame."""
+        key = (name, 'arrays')
+        if key not in self._frames:
+            df = self._frame(name)
+            complete = df.notna().all(axis=1).to_numpy()
+            if not complete.all():
+                df = df[complete]
+            self._frames[key] = (df.index,
+                                 np.ascontiguousarray(df['returns'], dtype=float),
+                                 np.ascontiguousarray(df['strategy'], dtype=float))
+        return self._frames[key]
+
+    def _fast_backtest(self, timeframe: str = '1d', start_date: Optional[DateLike] = None,
+                       end_date: Optional[DateLike] = None) -> pd.Series:
+        """Backtest without plotting, summing views of the cached return arrays.
+
+        Gives the same result as backtest(plot=False) without copying the frame.
+        """
+        index, returns, strategy = self._backtest_arrays('daily' if timeframe == '1d' else 'five_min')
+        rows = self._window_slice(index, start_date, end_date)
+        return pd.Series(np.exp([returns[rows].sum(), strategy[rows].sum()]) - 1, index=['returns', 'strategy'])
+
+    @staticmethod
+    def _window_slice(index: pd.DatetimeIndex, start_date: Optional[DateLike] = None,
+                      end_date: Optional[DateLike] = None) -> slice | np.ndarray:
+        """Rows a backtest between start_date and end_date uses, as a slice when the index is sorted."""
+        if not index.is_monotonic_increasing:
+            return Strategy._window_mask(index, start_date, end_date)
+        lo = 0 if start_date is None else int(index.searchsorted(start_date, side='left'))
+        hi = len(index) if end_date is None else int(index.searchsorted(end_date, side='right'))
+        return slice(lo, max(lo, hi))
+
+    @staticmethod
+    def _window_mask(index: pd.DatetimeIndex, start_date: Optional[DateLike] = None,
+                    end_date: Optional[DateLike] = None) -> np.ndarray:
+        """Boolean mask of the rows a backtest between start_date and end_date uses."""
+        mask = np.ones(len(index), dtype=bool)
+        if start_date is not None:
+            mask &= index >= start_date
+        if end_date is not None:
+            mask &= index <= end_date
+        return mask
+
+    @staticmethod
+    def _batch_backtest(returns: np.ndarray, signals: np.ndarray,
+                        valid: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Backtest many candidate signals over the same returns at once.
+
+        Equivalent to calling backtest on each candidate, where each candidate
+        only uses the rows its indicators are defined on.
+
+        Args:
+            returns (np.ndarray): Log returns of shape (n,)
+            signals (np.ndarray): Signals of shape (n, k), one column per candidate
+            valid (np.ndarray): Boolean mask of shape (n, k) or (n,) of the rows each candidate uses
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Buy-and-hold and strategy returns of each candidate
+        """
+        returns = returns[:, None]
+        valid = valid if valid.ndim == 2 else valid[:, None]
+        hold = np.where(valid, returns, 0.).sum(axis=0)
+        strategy = np.where(valid, returns * signals, 0.).sum(axis=0)
+        hold = np.broadcast_to(hold, strategy.shape)
+        return np.exp(hold) - 1, np.exp(strategy) - 1
+
+    def _vote_inputs(self, timeframe: str = '1d', start_date: Optional[DateLike] = None,
+                     end_date: Optional[DateLike] = None) -> VoteInputs:
+        """Component signals and returns a weight optimization votes over, built once per run.
+
+        Args:
+            timeframe (str, optional): Data frequency to use ('1d' or '5m'). Defaults to '1d'.
+            start_date (DateLike, optional): Start date of the backtest window. Defaults to None.
+            end_date (DateLike, optional): End date of the backtest window. Defaults to None.
+
+        Returns:
+            VoteInputs: Signal matrix, backtest rows and their log returns
+        """
+        name = 'daily' if timeframe == '1d' else 'five_min'
+        index, returns, _ = self._backtest_arrays(name)
+        signals = self._frames.get((name, 'signals'))
+        if signals is None:
+            raise ValueError(f'No component signals for the {name} frame, it was not computed by the strategy')
+        window = self._window_slice(index, start_date, end_date)
+        rows = signals.index.get_indexer(index)[window]
+        if (rows < 0).any():
+            raise ValueError(f'Component signals do not cover every row of the {name} frame')
+        return VoteInputs(np.ascontiguousarray(signals.to_numpy(dtype=float).T),
+                          rows,
+                          np.ascontiguousarray(returns[window]))
+
+    @staticmethod
+    def _vote_returns(inputs: VoteInputs, params: np.ndarray) -> np.ndarray:
+        """Strategy returns of many weight and threshold candidates at once.
+
+        Equivalent to change_params(weights=..., vote_threshold=...) followed by
+        backtest(plot=False)['strategy'] for each candidate.
+
+        Args:
+            inputs (VoteInputs): Precomputed signals and returns
+            params (np.ndarray): Candidates of shape (k, m + 1), m weights then the threshold
+
+        Returns:
+            np.ndarray: Strategy returns of shape (k,)
+        """
+        weights = params[:, :-1] / params[:, :-1].sum(axis=1, keepdims=True)
+        # one product per candidate, like the DataFrame.dot in sg.vote, so votes round the same way
+        combined = np.column_stack([inputs.signals.T @ w for w in weights])
+        positions = sk.vote_fill(np.ascontiguousarray(combined), np.ascontiguousarray(params[:, -1]))
+        strategy = np.ascontiguousarray(positions[inputs.rows].T) * inputs.returns
+        return np.exp(strategy.sum(axis=1)) - 1
+
     @staticmethod
-    def _single_optimization(args):
+    def _single_optimization(handle: shared_data.ArraysHandle, n_weights: int, t_min: float, t_max: float,
+                             seed: np.random.SeedSequence):
         """Helper function to run a single optimization with random initialization."""
-        strategy, n_weights, t_min, t_max, timeframe, start_date, end_date = args
-        
+        inputs = VoteInputs(**shared_data.attach_arrays(handle))
+        rng = np.random.default_rng(seed)
+
         # Random initial weights that sum to 1
-        init_weights = np.random.dirichlet(np.ones(n_weights))
-        init_threshold = np.random.uniform(t_min, t_max)
+        init_weights = rng.dirichlet(np.ones(n_weights))
+        init_threshold = rng.uniform(t_min, t_max)
         init_params = np.concatenate([init_weights, [init_threshold]])
-        
-        def objective_function(params):
-            weights = params[:-1]
-            threshold = params[-1]
-            
-            # Evaluate combined signal with given weights
-            strategy.change_params(weights=weights, vote_threshold=threshold)
-            combined_returns = strategy.backtest(plot=False,
-                                            timeframe=timeframe,
-                                            start_date=start_date,
-                                            end_date=end_date)['strategy']
-            
+
+        lower = np.array([0.] * n_weights + [t_min])
+        upper = np.array([1.] * n_weights + [t_max])
+
+        def penalized(params):
+            weights = params[:, :-1]
+            combined_returns = Strategy._vote_returns(inputs, params)
+
             # Add regularization terms
-            diversity_bonus = 0.1 * np.sum(-weights * np.log(weights + 1e-10))
-            extreme_penalty = 0.05 * np.sum(weights ** 2)
-            
+            diversity_bonus = 0.1 * np.sum(-weights * np.log(weights + 1e-10), axis=1)
+            extreme_penalty = 0.05 * np.sum(weights ** 2, axis=1)
+
             return -combined_returns - diversity_bonus + extreme_penalty
-        
+
+        def objective_function(params):
+            return penalized(params[None, :])[0]
+
+        def gradient(params):
+            # forward differences of every parameter in one batched evaluation,
+            # with scipy's default step, stepping backwards at an upper bound
+            step = np.sqrt(np.finfo(float).eps) * np.where(params >= 0, 1., -1.) * np.maximum(1., np.abs(params))
+            step = np.where((params + step > upper) | (params + step < lower), -step, step)
+            shifted = params + np.diag(step)
+            step = np.diag(shifted) - params
+            values = penalized(np.vstack([params, shifted]))
+            return (values[1:] - values[0]) / step
+
         cons = ({
             'type': 'eq',
             'fun': lambda x: np.sum(x[:-1]) - 1
@@ -427,7 +831,7 @@ class Strategy(ABC):
         
         bnds = tuple([(0, 1)] * n_weights + [(t_min, t_max)])
         
-        result = sco.minimize(objective_function, init_params,
+        result = sco.minimize(objective_function, init_params, jac=gradient,
                             method='SLSQP', bounds=bnds,
                             constraints=cons)
         
@@ -470,13 +874,14 @@ class Strategy(ABC):
 
         t_min, t_max = threshold_range[0], threshold_range[-1]
 
-        # Prepare arguments for parallel processing
-        args = [(self, n_weights, t_min, t_max, timeframe, start_date, end_date)
-                for _ in range(runs)]
-
-        # Run optimizations in parallel
-        with mp.Pool(mp.cpu_count()) as pool:
-            results = pool.map(self._single_optimization, args)
+        # Each run gets its own random stream and evaluates weights directly on the
+        # component signals, which are computed once here instead of in every run and
+        # shared with the workers through memory-mapped files instead of pickled per batch
+        inputs = self._vote_inputs(timeframe, start_date, end_date)
+        seeds = np.random.SeedSequence().spawn(runs)
+        with shared_data.published_arrays(**inputs._asdict()) as handle:
+            results = workers.map_tasks(
+                partial(self._single_optimization, handle, n_weights, t_min, t_max), seeds)
 
         # Find best result
         best_value, best_params = min(results, key=lambda x: x[0])
@@ -601,37 +1006,44 @@ class MA_Crossover(Strategy):
         self.ewm = ewm
         self.__short = eval(f'short_{param_type}')
         self.__long = eval(f'long_{param_type}')
-        self.engine = TAEngine()
+        self.engine = TAEngine(self.asset.ticker)
         self.__get_data()
 
     def __get_data(self) -> None:
+        """Reset the strategy after a parameter change.
+
+        Frames are recomputed per timeframe on first access, see _compute_frame.
+        """
+        self.params = f'({self.short}/{self.long})'
+        self._reset_frames()
+
+    def _compute_frame(self, name: str) -> DataFrame:
         """Calculate moving averages and generate trading signals.
         
-        Updates both daily and 5-minute dataframes with:
+        Builds the frame of one timeframe with:
         - Short and long moving averages
         - Trading signals (-1 for sell, 1 for buy)
         - Strategy returns (signal * returns)
-        """
-        self.daily = pd.DataFrame(self.asset.daily[['adj_close', 'log_rets']].copy())
-        self.five_min = pd.DataFrame(self.asset.five_minute[['adj_close', 'log_rets']].copy())
-        self.params = f'({self.short}/{self.long})'
 
-        for i, df in enumerate([self.daily, self.five_min]):
-            data = df['adj_close']
-            name = 'daily' if i == 0 else 'five_min'
-            ptype = 'span' if self.ptype == 'window' and self.ewm else self.ptype
+        Args:
+            name (str): 'daily' or 'five_min'
 
-            df['short'] = self.engine.calculate_ma(data, self.ewm, ptype, self.short, name)
-            df['long'] = self.engine.calculate_ma(data, self.ewm, ptype, self.long, name)
-            df.dropna(inplace=True)
+        Returns:
+            pd.DataFrame: Strategy frame of the timeframe
+        """
+        source = self.asset.daily if name == 'daily' else self.asset.five_minute
+        df = pd.DataFrame(source[['adj_close', 'log_rets']].copy())
+        data = df['adj_close']
+        ptype = 'span' if self.ptype == 'window' and self.ewm else self.ptype
 
-            df['signal'] = sg.ma_crossover(df['short'], df['long'])
-            df.rename(columns=dict(log_rets='returns'), inplace=True)
-            df['strategy'] = df['returns'] * df['signal']
-            if i == 0:
-                self.daily = df
-            else:
-                self.five_min = df
+        df['short'] = self.engine.calculate_ma(data, self.ewm, ptype, self.short, name)
+        df['long'] = self.engine.calculate_ma(data, self.ewm, ptype, self.long, name)
+        df.dropna(inplace=True)
+
+        df['signal'] = sg.ma_crossover(df['short'], df['long'])
+        df.rename(columns=dict(log_rets='returns'), inplace=True)
+        df['strategy'] = df['returns'] * df['signal']
+        return df
 
     @property
     def short(self) -> float:
@@ -827,23 +1239,8 @@ class MA_Crossover(Strategy):
                 if self.ptype == 'halflife':
                     long_range = -np.log(2) / np.log(1 - long_range)  # halflife
 
-        old_params = {'short': self.short, 'long': self.long, 'ewm': self.ewm, 'ptype': self.ptype}
-
-        results = []
-        for short, long in product(short_range, long_range):
-            if self.ptype == 'alpha' and short <= long:
-                continue
-            elif self.ptype != 'alpha' and short >= long:
-                continue
-
-            self.change_params(short=short, long=long)
-            backtest_results = self.backtest(plot=False, 
-                                        timeframe=timeframe, 
-                                        start_date=start_date,
-                                        end_date=end_date)
-            results.append((short, long, backtest_results['returns'], backtest_results['strategy']))
-
-        results = pd.DataFrame(results, columns=['short', 'long', 'hold_returns', 'strategy_returns'])
+        results = pd.DataFrame(self._batch_optimize(short_range, long_range, timeframe, start_date, end_date),
+                               columns=['short', 'long', 'hold_returns', 'strategy_returns'])
         results['net'] = results['strategy_returns'] - results['hold_returns']
         results = results.sort_values(by='net', ascending=False)
 
@@ -856,8 +1253,6 @@ class MA_Crossover(Strategy):
 
         if inplace:
             self.change_params(short=opt_short, long=opt_long)
-        else:
-            self.change_params(**old_params)
 
         opt_results = results.iloc[0]
         return {
@@ -865,6 +1260,46 @@ class MA_Crossover(Strategy):
             'results': opt_results[-3:].to_dict()
         }
 
+    def _batch_optimize(self, short_range: np.ndarray, long_range: np.ndarray, timeframe: str = '1d',
+                        start_date: Optional[DateLike] = None,
+                        end_date: Optional[DateLike] = None) -> list[tuple]:
+        """Backtest every valid short/long pair without rebuilding the strategy data.
+
+        Each moving average is computed once and stacked into a (rows x params) array.
+        The signals of every long parameter are then derived at once for each short parameter.
+
+        Returns:
+            list[tuple]: (short, long, hold_returns, strategy_returns) in grid order
+        """
+        short_range, long_range = np.asarray(short_range), np.asarray(long_range)
+        name = 'daily' if timeframe == '1d' else 'five_min'
+        source = self.asset.daily if timeframe == '1d' else self.asset.five_minute
+        data = source['adj_close']
+        ptype = 'span' if self.ptype == 'window' and self.ewm else self.ptype
+
+        def stack(params):
+            return np.column_stack([self.engine.calculate_ma(data, self.ewm, ptype, p, name).to_numpy()
+                                    for p in params])
+
+        shorts, longs = stack(short_range), stack(long_range)
+        returns = source['log_rets'].to_numpy()
+        rows = (~np.isnan(data.to_numpy()) & ~np.isnan(returns)
+                & self._window_mask(source.index, start_date, end_date))
+        long_valid = rows[:, None] & ~np.isnan(longs)
+
+        results = []
+        for i, short in enumerate(short_range):
+            keep = long_range < short if self.ptype == 'alpha' else long_range > short
+            if not keep.any():
+                continue
+
+            signals = np.where(shorts[:, i, None] > longs[:, keep], 1, -1)
+            valid = long_valid[:, keep] & ~np.isnan(shorts[:, i, None])
+            hold, strategy = self._batch_backtest(returns, signals, valid)
+            results.extend(zip([short] * len(hold), long_range[keep], hold, strategy))
+
+        return results
+
     def optimize_weights(self):
         """Not implemented for MA Crossover strategy.
 
@@ -945,41 +1380,46 @@ class RSI(Strategy):
         self.__weights /= np.sum(self.__weights)
 
         self.__vote_threshold = vote_threshold
-        self.engine = TAEngine()
+        self.engine = TAEngine(self.asset.ticker)
         self.__get_data()
 
     def __get_data(self) -> None:
+        """Reset the strategy after a parameter change.
+
+        Frames are recomputed per timeframe on first access, see _compute_frame.
+        """
+        self.params = f'({self.ub}/{self.lb})'
+        self._reset_frames()
+
+    def _compute_frame(self, name: str) -> DataFrame:
         """Calculate RSI and generate trading signals.
         
-        Updates both daily and 5-minute dataframes with:
+        Builds the frame of one timeframe with:
         - RSI values
         - Combined trading signals from multiple signal types
         - Strategy returns (signal * returns)
-        """
-        self.daily = pd.DataFrame(self.asset.daily[['open', 'high', 'low', 'close', 'adj_close', 'log_rets']].copy())
-        self.five_min = pd.DataFrame(self.asset.five_minute[['open', 'high', 'low', 'close', 'adj_close', 'log_rets']].copy())
-
-        self.params = f'({self.ub}/{self.lb})'
 
-        for i, df in enumerate([self.daily, self.five_min]):
-            data = df['adj_close']
-            name = 'daily' if i == 0 else 'five_min'
+        Args:
+            name (str): 'daily' or 'five_min'
 
-            df['rsi'] = self.engine.calculate_rsi(data, self.window, name)
-            df.dropna(inplace=True)
+        Returns:
+            pd.DataFrame: Strategy frame of the timeframe
+        """
+        source = self.asset.daily if name == 'daily' else self.asset.five_minute
+        df = pd.DataFrame(source[['open', 'high', 'low', 'close', 'adj_close', 'log_rets']].copy())
+        data = df['adj_close']
 
-            df['signal'] = sg.rsi(df['rsi'], df['adj_close'], self.ub, self.lb, 
-                                self.exit, self.signal_type, self.method, 
-                                self.vote_threshold, self.weights, 
-                                self.m_rev_bound if self.m_rev else None)
+        df['rsi'] = self.engine.calculate_rsi(data, self.window, name)
+        df.dropna(inplace=True)
 
-            df.rename(columns=dict(log_rets='returns'), inplace=True)
-            df['strategy'] = df['returns'] * df['signal']
+        signals = sg.rsi_signals(df['rsi'], df['adj_close'], self.ub, self.lb, self.exit,
+                                 self.signal_type, self.m_rev_bound if self.m_rev else None)
+        self._frames[(name, 'signals')] = signals
+        df['signal'] = sg.combine(signals, self.method, self.vote_threshold, self.weights)
 
-            if i == 0:
-                self.daily = df
-            else:
-                self.five_min = df
+        df.rename(columns=dict(log_rets='returns'), inplace=True)
+        df['strategy'] = df['returns'] * df['signal']
+        return df
 
     # Property getters and setters for strategy parameters
     # Each property includes validation and triggers data recalculation
@@ -1190,32 +1630,27 @@ class RSI(Strategy):
         return [fig]
 
     @classmethod
-    def _backtest_wrapper(cls, strategy_params: dict, ub: float, lb: float, window: int,
-                         m_rev_bound: float, timeframe: str, start_date: Optional[DateLike], 
-                         end_date: Optional[DateLike]) -> tuple:
+    def _backtest_wrapper(cls, handle: shared_data.AssetHandle, strategy_params: dict, timeframe: str,
+                          start_date: Optional[DateLike], end_date: Optional[DateLike],
+                          params: tuple[float, float, int, float]) -> tuple:
         """Helper function to perform backtesting for a single parameter combination.
 
         Args:
-            strategy_params: Dictionary of parameters needed to initialize the strategy
-            ub: upper bound for overbought
-            lb: lower bound for oversold
-            window: lookback window
-            m_rev_bound: rsi bound for mean reversion
-            signal: Signal line period
+            handle: Shared data handle of the strategy's asset
+            strategy_params: Dictionary of parameters needed to initialize the strategy, without the asset
             timeframe: Data frequency to use
             start_date: Start date for backtest
             end_date: End date for backtest
+            params: (ub, lb, window, m_rev_bound) to test
 
         Returns:
-            tuple: (fast, slow, signal, hold_returns, strategy_returns)
+            tuple: (ub, lb, window, m_rev_bound, hold_returns, strategy_returns)
         """
-        # Create a fresh strategy instance for each test
-        strategy_params['ub'] = ub
-        strategy_params['lb'] = lb
-        strategy_params['window'] = window
-        strategy_params['m_rev_bound'] = m_rev_bound
+        ub, lb, window, m_rev_bound = params
 
-        strategy = cls(**strategy_params)
+        # Create a fresh strategy instance for each test
+        strategy = cls(asset=shared_data.attach(handle), ub=ub, lb=lb, window=window,
+                       m_rev_bound=m_rev_bound, **strategy_params)
         backtest_results = strategy.backtest(plot=False, 
                                            timeframe=timeframe, 
                                            start_date=start_date,
@@ -1274,16 +1709,15 @@ class RSI(Strategy):
         old_params = {'ub': self.ub, 'lb': self.lb, 'window': self.window,
                       'm_rev_bound': self.m_rev_bound}
         strategy_params = self._get_init_params()
+        del strategy_params['asset']
 
         params = list(product(*params))
         params = [(ub, lb, window, m_rev_bound) for ub, lb, window, m_rev_bound in params if ub > lb and
                   m_rev_bound < ub and m_rev_bound > lb]
 
-        args = [(strategy_params, ub, lb, window, m_rev_bound, timeframe, start_date, end_date)
-                for ub, lb, window, m_rev_bound in params]
-
-        with mp.Pool(mp.cpu_count()) as pool:
-            results = pool.starmap(self._backtest_wrapper, args)
+        with shared_data.published(self.asset) as handle:
+            results = workers.map_tasks(
+                partial(self._backtest_wrapper, handle, strategy_params, timeframe, start_date, end_date), params)
 
         results = pd.DataFrame(results, columns=['ub', 'lb', 'window', 'm_rev_bound', 'hold_returns', 'strategy_returns'])
         results['net'] = results['strategy_returns'] - results['hold_returns']
@@ -1382,43 +1816,48 @@ class MACD(Strategy):
         self.__weights /= np.sum(self.__weights)
 
         self.__vote_threshold = vote_threshold
-        self.engine = TAEngine()
+        self.engine = TAEngine(self.asset.ticker)
         self.__get_data()
 
     def __get_data(self) -> None:
+        """Reset the strategy after a parameter change.
+
+        Frames are recomputed per timeframe on first access, see _compute_frame.
+        """
+        self.params = f'({self.fast}/{self.slow}/{self.signal})'
+        self._reset_frames()
+
+    def _compute_frame(self, name: str) -> DataFrame:
         """Calculate MACD components and generate trading signals.
         
-        Updates both daily and 5-minute dataframes with:
+        Builds the frame of one timeframe with:
         - MACD line (fast EMA - slow EMA)
         - Signal line (EMA of MACD line)
         - MACD histogram
         - Combined trading signals from multiple signal types
         - Strategy returns (signal * returns)
-        """
-        self.daily = pd.DataFrame(self.asset.daily[['open', 'high', 'low', 'close', 'adj_close', 'log_rets']].copy())
-        self.five_min = pd.DataFrame(self.asset.five_minute[['open', 'high', 'low', 'close', 'adj_close', 'log_rets']].copy())
-
-        self.params = f'({self.fast}/{self.slow}/{self.signal})'
 
-        for i, df in enumerate([self.daily, self.five_min]):
-            data = df['adj_close']
-            name = 'daily' if i == 0 else 'five_min'
+        Args:
+            name (str): 'daily' or 'five_min'
 
-            df[['macd', 'signal_line', 'macd_hist']] = self.engine.calculate_macd(
-                data, [self.fast, self.slow, self.signal], name)
-            df.dropna(inplace=True)
+        Returns:
+            pd.DataFrame: Strategy frame of the timeframe
+        """
+        source = self.asset.daily if name == 'daily' else self.asset.five_minute
+        df = pd.DataFrame(source[['open', 'high', 'low', 'close', 'adj_close', 'log_rets']].copy())
+        data = df['adj_close']
 
-            df['signal'] = sg.macd(df['macd_hist'], df['macd'], df['adj_close'],
-                                 self.signal_type, self.method, self.vote_threshold, 
-                                 self.weights)
+        df[['macd', 'signal_line', 'macd_hist']] = self.engine.calculate_macd(
+            data, [self.fast, self.slow, self.signal], name)
+        df.dropna(inplace=True)
 
-            df.rename(columns=dict(log_rets='returns'), inplace=True)
-            df['strategy'] = df['returns'] * df['signal']
+        signals = sg.macd_signals(df['macd_hist'], df['macd'], df['adj_close'], self.signal_type)
+        self._frames[(name, 'signals')] = signals
+        df['signal'] = sg.combine(signals, self.method, self.vote_threshold, self.weights)
 
-            if i == 0:
-                self.daily = df
-            else:
-                self.five_min = df
+        df.rename(columns=dict(log_rets='returns'), inplace=True)
+        df['strategy'] = df['returns'] * df['signal']
+        return df
 
     @property
     def fast(self):
@@ -1616,29 +2055,26 @@ class MACD(Strategy):
         return [fig]
 
     @classmethod
-    def _backtest_wrapper(cls, strategy_params: dict, fast: int, slow: int, signal: int, 
-                         timeframe: str, start_date: Optional[DateLike], 
-                         end_date: Optional[DateLike]) -> tuple:
+    def _backtest_wrapper(cls, handle: shared_data.AssetHandle, strategy_params: dict, timeframe: str,
+                          start_date: Optional[DateLike], end_date: Optional[DateLike],
+                          params: tuple[int, int, int]) -> tuple:
         """Helper function to perform backtesting for a single parameter combination.
 
         Args:
-            strategy_params: Dictionary of parameters needed to initialize the strategy
-            fast: Fast EMA period
-            slow: Slow EMA period
-            signal: Signal line period
+            handle: Shared data handle of the strategy's asset
+            strategy_params: Dictionary of parameters needed to initialize the strategy, without the asset
             timeframe: Data frequency to use
             start_date: Start date for backtest
             end_date: End date for backtest
+            params: (fast, slow, signal) periods to test
 
         Returns:
             tuple: (fast, slow, signal, hold_returns, strategy_returns)
         """
-        # Create a fresh strategy instance for each test
-        strategy_params['fast'] = fast
-        strategy_params['slow'] = slow
-        strategy_params['signal'] = signal
+        fast, slow, signal = params
 
-        strategy = cls(**strategy_params)
+        # Create a fresh strategy instance for each test
+        strategy = cls(asset=shared_data.attach(handle), fast=fast, slow=slow, signal=signal, **strategy_params)
         backtest_results = strategy.backtest(plot=False, 
                                            timeframe=timeframe, 
                                            start_date=start_date,
@@ -1684,15 +2120,14 @@ class MACD(Strategy):
 
         old_params = {'fast': self.fast, 'slow': self.slow, 'signal': self.signal}
         strategy_params = self._get_init_params()
+        del strategy_params['asset']
 
         params = list(product(fast_range, slow_range, signal_range))
         params = [(fast, slow, signal) for fast, slow, signal in params if fast < slow]
 
-        args = [(strategy_params, fast, slow, signal, timeframe, start_date, end_date)
-                for fast, slow, signal in params]
-
-        with mp.Pool(mp.cpu_count()) as pool:
-            results = pool.starmap(self._backtest_wrapper, args)
+        with shared_data.published(self.asset) as handle:
+            results = workers.map_tasks(
+                partial(self._backtest_wrapper, handle, strategy_params, timeframe, start_date, end_date), params)
 
         results = pd.DataFrame(results, columns=['fast', 'slow', 'signal', 'hold_returns', 'strategy_returns'])
         results['net'] = results['strategy_returns'] - results['hold_returns']
@@ -1788,40 +2223,47 @@ class BB(Strategy):
         self.__weights /= np.sum(self.__weights)
 
         self.__vote_threshold = vote_threshold
-        self.engine = TAEngine()
+        self.engine = TAEngine(self.asset.ticker)
         self.__get_data()
 
     def __get_data(self) -> None:
+        """Reset the strategy after a parameter change.
+
+        Frames are recomputed per timeframe on first access, see _compute_frame.
+        """
+        self.params = f'window={self.window}(±{self.num_std})'
+        self._reset_frames()
+
+    def _compute_frame(self, name: str) -> DataFrame:
         """Calculate Bollinger Bands components and generate trading signals.
         
-        Updates both daily and 5-minute dataframes with:
+        Builds the frame of one timeframe with:
         - Simple moving average (middle band)
         - Upper and lower Bollinger Bands
         - Combined trading signals from multiple signal types
         - Strategy returns (signal * returns)
-        """
-        self.daily = pd.DataFrame(self.asset.daily[['open', 'high', 'low', 'close', 'adj_close', 'log_rets']].copy())
-        self.five_min = pd.DataFrame(self.asset.five_minute[['open', 'high', 'low', 'close', 'adj_close', 'log_rets']].copy())
-        self.params = f'window={self.window}(±{self.num_std})'
 
-        for i, df in enumerate([self.daily, self.five_min]):
-            data = df['adj_close']
-            name = 'daily' if i == 0 else 'five_min'
+        Args:
+            name (str): 'daily' or 'five_min'
 
-            df[['sma', 'bol_up', 'bol_down']] = self.engine.calculate_bb(
-                data, self.window, self.num_std, name)
-            df.dropna(inplace=True)
+        Returns:
+            pd.DataFrame: Strategy frame of the timeframe
+        """
+        source = self.asset.daily if name == 'daily' else self.asset.five_minute
+        df = pd.DataFrame(source[['open', 'high', 'low', 'close', 'adj_close', 'log_rets']].copy())
+        data = df['adj_close']
 
-            df['signal'] = sg.bb(df['adj_close'], df['bol_up'], df['bol_down'],
-                               self.signal_type, self.method, self.vote_threshold, 
-                               self.weights)
-            df.rename(columns=dict(log_rets='returns'), inplace=True)
-            df['strategy'] = df['returns'] * df['signal']
+        df[['sma', 'bol_up', 'bol_down']] = self.engine.calculate_bb(
+            data, self.window, self.num_std, name)
+        df.dropna(inplace=True)
 
-            if i == 0:
-                self.daily = df
-            else:
-                self.five_min = df
+        signals = pd.DataFrame(sg.bb_signals(df['adj_close'], df['bol_up'], df['bol_down'], self.signal_type),
+                               index=df.index)
+        self._frames[(name, 'signals')] = signals
+        df['signal'] = sg.combine(signals, self.method, self.vote_threshold, self.weights)
+        df.rename(columns=dict(log_rets='returns'), inplace=True)
+        df['strategy'] = df['returns'] * df['signal']
+        return df
 
     @property
     def window(self):
@@ -2033,19 +2475,8 @@ class BB(Strategy):
         if num_std_range is None:
             num_std_range = np.arange(1.5, 2.6, 0.1)
 
-        old_params = {'window': self.window, 'num_std': self.num_std}
-
-        results = []
-        for window, num_std in product(window_range, num_std_range):
-
-            self.change_params(window=window, num_std=num_std)
-            backtest_results = self.backtest(plot=False, 
-                             timeframe=timeframe, 
-                             start_date=start_date,
-                             end_date=end_date)
-            results.append((window, num_std, backtest_results['returns'], backtest_results['strategy']))
-
-        results = pd.DataFrame(results, columns=['window', 'num_std', 'hold_returns', 'strategy_returns'])
+        results = pd.DataFrame(self._batch_optimize(window_range, num_std_range, timeframe, start_date, end_date),
+                               columns=['window', 'num_std', 'hold_returns', 'strategy_returns'])
         results['net'] = results['strategy_returns'] - results['hold_returns']
         results = results.sort_values(by='net', ascending=False)
 
@@ -2054,8 +2485,6 @@ class BB(Strategy):
 
         if inplace:
             self.change_params(window=opt_window, num_std=opt_num_std)
-        else:
-            self.change_params(**old_params)
 
         opt_results = results.iloc[0]
         return {
@@ -2063,6 +2492,41 @@ class BB(Strategy):
             'results': opt_results[-3:].to_dict()
         }
 
+    def _batch_optimize(self, window_range: np.ndarray, num_std_range: np.ndarray, timeframe: str = '1d',
+                        start_date: Optional[DateLike] = None,
+                        end_date: Optional[DateLike] = None) -> list[tuple]:
+        """Backtest every window/num_std pair without rebuilding the strategy data.
+
+        The rolling mean and std are computed once per window and the bands of every
+        num_std are broadcast from them, so one signal call evaluates all of them.
+
+        Returns:
+            list[tuple]: (window, num_std, hold_returns, strategy_returns) in grid order
+        """
+        num_std_range = np.asarray(num_std_range)
+        name = 'daily' if timeframe == '1d' else 'five_min'
+        source = self.asset.daily if timeframe == '1d' else self.asset.five_minute
+        data = source['adj_close']
+        returns = source['log_rets'].to_numpy()
+        rows = source[['open', 'high', 'low', 'close', 'adj_close', 'log_rets']].notna().all(axis=1).to_numpy()
+        in_window = self._window_mask(source.index, start_date, end_date)
+
+        results = []
+        for window in window_range:
+            sma = self.engine.calculate_ma(data, False, 'window', window, name).to_numpy()
+            std = self.engine.rolling_std(data, False, 'window', window, name).to_numpy()
+            bol_up = sma[:, None] + num_std_range * std[:, None]
+            bol_down = sma[:, None] - num_std_range * std[:, None]
+
+            # signals only see the rows a single backtest would keep after dropna
+            keep = np.flatnonzero(rows & ~np.isnan(bol_up).any(axis=1) & ~np.isnan(bol_down).any(axis=1))
+            signals = sg.bb(data.to_numpy()[keep], bol_up[keep], bol_down[keep],
+                            self.signal_type, self.method, self.vote_threshold, self.weights)
+            hold, strategy = self._batch_backtest(returns[keep], signals, in_window[keep])
+            results.extend(zip([window] * len(hold), num_std_range, hold, strategy))
+
+        return results
+
 
 class CombinedStrategy(Strategy):
     """Meta-strategy that combines multiple technical analysis strategies.
@@ -2124,34 +2588,42 @@ class CombinedStrategy(Strategy):
         self.__get_data()
 
     def __get_data(self) -> None:
+        """Reset the strategy after a parameter change.
+
+        Frames are recomputed per timeframe on first access, see _compute_frame.
+        """
+        self.params = ''
+        self._reset_frames()
+
+    def _compute_frame(self, name: str) -> DataFrame:
         """Collect signals from all strategies and method them.
         
-        Updates both daily and 5-minute dataframes with:
+        Builds the frame of one timeframe with:
         - Individual strategy signals
         - Combined trading signal using weights and threshold
         - Strategy returns (signal * returns)
-        """
-        self.daily = pd.DataFrame(self.asset.daily[['open', 'high', 'low', 'close', 'adj_close', 'log_rets']].copy())
-        self.five_min = pd.DataFrame(self.asset.five_minute[['open', 'high', 'low', 'close', 'adj_close', 'log_rets']].copy())
-        self.params = ''
 
-        for i, df in enumerate([self.daily, self.five_min]):
-            name = 'daily' if i == 0 else 'five_min'
-            signals = pd.DataFrame(index=df.index)
+        Args:
+            name (str): 'daily' or 'five_min'
 
-            for j, strat in enumerate(self.strategies):
-                signals[f'{strat.__class__.__name__}_signal_{j}'] = eval(f"strat.{name}['signal']")
+        Returns:
+            pd.DataFrame: Strategy frame of the timeframe
+        """
+        source = self.asset.daily if name == 'daily' else self.asset.five_minute
+        df = pd.DataFrame(source[['open', 'high', 'low', 'close', 'adj_close', 'log_rets']].copy())
+        signals = pd.DataFrame(index=df.index)
 
-            signals.dropna(inplace=True)
-            df['signal'] = sg.vote(signals, self.vote_threshold, self.weights)
-            df.dropna(inplace=True)
+        for j, strat in enumerate(self.strategies):
+            signals[f'{strat.__class__.__name__}_signal_{j}'] = eval(f"strat.{name}['signal']")
 
-            df.rename(columns=dict(log_rets='returns'), inplace=True)
-            df['strategy'] = df['returns'] * df['signal']
-            if i == 0:
-                self.daily = df
-            else:
-                self.five_min = df
+        signals.dropna(inplace=True)
+        self._frames[(name, 'signals')] = signals
+        df['signal'] = sg.vote(signals, self.vote_threshold, self.weights)
+        df.dropna(inplace=True)
+
+        df.rename(columns=dict(log_rets='returns'), inplace=True)
+        df['strategy'] = df['returns'] * df['signal']
+        return df
 
     @property
     def strategies(self):
@@ -2190,6 +2662,23 @@ class CombinedStrategy(Strategy):
         self.__vote_threshold = value
         self.__get_data()
 
+    def __copy__(self) -> 'CombinedStrategy':
+        strategy = super().__copy__()
+        strategy.__strategies = [copy.copy(strat) for strat in self.strategies]
+        return strategy
+
+    def refresh(self, asset: Optional[Asset] = None) -> bool:
+        """Pick up rows appended to the asset's data, in the components first.
+
+        Args:
+            asset (Asset, optional): Newer copy of the strategy's asset. Defaults to None, the current asset.
+
+        Returns:
+            bool: Whether any frame has to be rebuilt
+        """
+        changed = [strat.refresh(asset) for strat in self.strategies]
+        return super().refresh(asset) or any(changed)
+
     def add_strategy(self, strategy: Strategy, weight: float = 1.):
         if strategy in self.__strategies:
             return
@@ -0,0 +1,89 @@
+''' Long-lived process pool for CPU-bound strategy work
+Optimizations submit their tasks here instead of opening a pool per request
+- started lazily on first use and reused by every request in the process
+- restarted automatically if a worker dies
+- shut down with the app or at interpreter exit
+- workers run numba's parallel kernels on WORKER_THREADS threads, the pool already uses every core
+'''
+
+import atexit
+import math
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterable, Optional
+
+MAX_WORKERS = int(os.getenv('WORKER_PROCESSES', os.cpu_count() or 1))
+# spawn avoids forking a server process that is running other threads
+START_METHOD = os.getenv('WORKER_START_METHOD', 'spawn')
+WORKER_THREADS = int(os.getenv('WORKER_THREADS', 1))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Gets the shared pool, starting it on first use"""
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=mp.get_context(START_METHOD),
+                                        initializer=_init_worker)
+        return _pool
+
+
+def _init_worker() -> None:
+    # one process per core already, numba threads on top of that would oversubscribe the cores
+    import numba
+    numba.set_num_threads(min(WORKER_THREADS, numba.config.NUMBA_NUM_THREADS))
+
+
+def map_tasks(fn: Callable, tasks: Iterable, chunksize: Optional[int] = None) -> list:
+    """Runs fn over every task in the shared pool
+
+    Tasks are sent in chunks so each worker receives a few large batches.
+    Arguments shared by every task should be bound to fn with functools.partial,
+    so they are pickled once per chunk instead of once per task.
+
+    Args:
+        fn (Callable): picklable function taking a single task
+        tasks (Iterable): task arguments
+        chunksize (int, optional): tasks per batch. Defaults to about four batches per worker
+
+    Returns:
+        list: results in the order of tasks
+    """
+    tasks = list(tasks)
+    if not tasks:
+        return []
+    if chunksize is None:
+        chunksize = max(1, math.ceil(len(tasks) / (MAX_WORKERS * 4)))
+
+    try:
+        return list(get_pool().map(fn, tasks, chunksize=chunksize))
+    except BrokenProcessPool:
+        # a worker died, e.g. killed for memory, so start a fresh pool and retry once
+        _reset()
+        return list(get_pool().map(fn, tasks, chunksize=chunksize))
+
+
+def _reset() -> None:
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown() -> None:
+    """Stops the worker processes, the pool restarts on next use"""
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(shutdown)
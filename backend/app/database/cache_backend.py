@@ -0,0 +1,307 @@
+''' Interchangeable key-value stores behind the object cache
+redis_client only needs a handful of Redis commands on string values, so the
+store is chosen by configuration instead of being tied to Upstash
+- upstash: Upstash REST API over HTTPS, the default
+- redis: native Redis protocol over pooled TCP connections, parsed by hiredis when installed
+- memory: process-local dict for tests, benchmarks and local runs
+
+Set CACHE_BACKEND to pick one, see from_env for the settings each reads
+'''
+
+import fnmatch
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'upstash')
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 32))
+
+# sets KEYS[1] to ARGV[2] for ARGV[3] seconds only if it still holds ARGV[1], '' meaning missing
+COMPARE_AND_SET = '''
+local current = redis.call('GET', KEYS[1])
+if (current or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+'''
+
+
+class Pipeline(ABC):
+    ''' Commands queued and sent to the store in one round-trip
+    '''
+
+    @abstractmethod
+    def set(self, key: str, value: str, ex: Optional[int] = None) -> 'Pipeline':
+        """Queues setting key to value, expiring after ex seconds"""
+
+    @abstractmethod
+    def delete(self, *keys: str) -> 'Pipeline':
+        """Queues deleting keys"""
+
+    @abstractmethod
+    def expire(self, key: str, seconds: int) -> 'Pipeline':
+        """Queues expiring key after seconds"""
+
+    @abstractmethod
+    def exec(self) -> list:
+        """Sends the queued commands and returns their results in order"""
+
+
+class CacheBackend(ABC):
+    ''' The Redis commands the object cache is built on, with string values
+    '''
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Gets the value of key, None if it is missing"""
+
+    @abstractmethod
+    def mget(self, *keys: str) -> list[Optional[str]]:
+        """Gets the values of keys in one round-trip, None for missing ones"""
+
+    @abstractmethod
+    def set(self, key: str, value: str, ex: Optional[int] = None) -> bool:
+        """Sets key to value, expiring after ex seconds"""
+
+    @abstractmethod
+    def delete(self, *keys: str) -> int:
+        """Deletes keys and returns how many existed"""
+
+    @abstractmethod
+    def keys(self, pattern: str = '*') -> list[str]:
+        """Lists the keys matching a glob-style pattern"""
+
+    @abstractmethod
+    def compare_and_set(self, key: str, expected: Optional[str], value: str, ex: int) -> bool:
+        """Atomically sets key to value if it still holds expected
+
+        Args:
+            key (str): key to swap
+            expected (str, optional): value read before, None if the key was missing
+            value (str): new value
+            ex (int): seconds before the new value expires
+
+        Returns:
+            bool: False if another writer changed key first, nothing is written then
+        """
+
+    @abstractmethod
+    def pipeline(self) -> Pipeline:
+        """Starts a pipeline of commands sent in one round-trip"""
+
+
+class UpstashBackend(CacheBackend):
+    ''' Upstash Redis over its REST API, one HTTPS request per command or pipeline
+    '''
+
+    def __init__(self, url: Optional[str], token: Optional[str]) -> None:
+        from upstash_redis import Redis
+        self.client = Redis(url, token)
+
+    def get(self, key: str) -> Optional[str]:
+        return self.client.get(key)
+
+    def mget(self, *keys: str) -> list[Optional[str]]:
+        return self.client.mget(*keys)
+
+    def set(self, key: str, value: str, ex: Optional[int] = None) -> bool:
+        return self.client.set(key, value, ex=ex) is not None
+
+    def delete(self, *keys: str) -> int:
+        return self.client.delete(*keys)
+
+    def keys(self, pattern: str = '*') -> list[str]:
+        return self.client.keys(pattern)
+
+    def compare_and_set(self, key: str, expected: Optional[str], value: str, ex: int) -> bool:
+        return self.client.eval(COMPARE_AND_SET, keys=[key], args=[expected or '', value, str(ex)]) == 1
+
+    def pipeline(self) -> Pipeline:
+        # the client's pipeline already queues set/delete/expire and sends them on exec
+        return self.client.pipeline()
+
+
+class _RedisPipeline(Pipeline):
+    # redis-py pipelines run as MULTI/EXEC transactions and send on execute
+
+    def __init__(self, pipe) -> None:
+        self.pipe = pipe
+
+    def set(self, key: str, value: str, ex: Optional[int] = None) -> Pipeline:
+        self.pipe.set(key, value, ex=ex)
+        return self
+
+    def delete(self, *keys: str) -> Pipeline:
+        self.pipe.delete(*keys)
+        return self
+
+    def expire(self, key: str, seconds: int) -> Pipeline:
+        self.pipe.expire(key, seconds)
+        return self
+
+    def exec(self) -> list:
+        return self.pipe.execute()
+
+
+class RedisBackend(CacheBackend):
+    ''' Native Redis protocol over a pool of TCP connections shared by the process's threads
+    '''
+
+    def __init__(self, url: str = REDIS_URL, max_connections: int = REDIS_MAX_CONNECTIONS) -> None:
+        """Connects lazily, the first command opens the first connection
+
+        Args:
+            url (str, optional): redis:// or rediss:// URL of the server. Defaults to REDIS_URL
+            max_connections (int, optional): size of the connection pool. Defaults to REDIS_MAX_CONNECTIONS
+        """
+        import redis
+        pool = redis.ConnectionPool.from_url(url, max_connections=max_connections, decode_responses=True)
+        self.client = redis.Redis(connection_pool=pool)
+        self._compare_and_set = self.client.register_script(COMPARE_AND_SET)
+
+    def get(self, key: str) -> Optional[str]:
+        return self.client.get(key)
+
+    def mget(self, *keys: str) -> list[Optional[str]]:
+        return self.client.mget(keys)
+
+    def set(self, key: str, value: str, ex: Optional[int] = None) -> bool:
+        return bool(self.client.set(key, value, ex=ex))
+
+    def delete(self, *keys: str) -> int:
+        return self.client.delete(*keys)
+
+    def keys(self, pattern: str = '*') -> list[str]:
+        return self.client.keys(pattern)
+
+    def compare_and_set(self, key: str, expected: Optional[str], value: str, ex: int) -> bool:
+        return self._compare_and_set(keys=[key], args=[expected or '', value, ex]) == 1
+
+    def pipeline(self) -> Pipeline:
+        return _RedisPipeline(self.client.pipeline())
+
+
+class _MemoryPipeline(Pipeline):
+    # queued commands run together under the store's lock, like MULTI/EXEC
+
+    def __init__(self, backend: 'MemoryBackend') -> None:
+        self.backend = backend
+        self.commands = []
+
+    def set(self, key: str, value: str, ex: Optional[int] = None) -> Pipeline:
+        self.commands.append((self.backend._set, (key, value, ex)))
+        return self
+
+    def delete(self, *keys: str) -> Pipeline:
+        self.commands.append((self.backend._delete, keys))
+        return self
+
+    def expire(self, key: str, seconds: int) -> Pipeline:
+        self.commands.append((self.backend._expire, (key, seconds)))
+        return self
+
+    def exec(self) -> list:
+        with self.backend._lock:
+            results = [command(*args) for command, args in self.commands]
+        self.commands = []
+        return results
+
+
+class MemoryBackend(CacheBackend):
+    ''' Process-local store with expiry, for tests and benchmarks without a server
+    '''
+
+    def __init__(self) -> None:
+        self._data = {}  # key -> (value, expiry time or None)
+        self._lock = threading.RLock()
+
+    def _get(self, key: str) -> Optional[str]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires is not None and expires <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def _set(self, key: str, value: str, ex: Optional[int] = None) -> bool:
+        if not isinstance(value, str):
+            raise ValueError(f'Cache values must be strings, got {type(value).__name__}')
+        self._data[key] = (value, None if ex is None else time.monotonic() + ex)
+        return True
+
+    def _delete(self, *keys: str) -> int:
+        deleted = 0
+        for key in keys:
+            if self._get(key) is not None:
+                del self._data[key]
+                deleted += 1
+        return deleted
+
+    def _expire(self, key: str, seconds: int) -> bool:
+        value = self._get(key)
+        if value is None:
+            return False
+        self._data[key] = (value, time.monotonic() + seconds)
+        return True
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._get(key)
+
+    def mget(self, *keys: str) -> list[Optional[str]]:
+        with self._lock:
+            return [self._get(key) for key in keys]
+
+    def set(self, key: str, value: str, ex: Optional[int] = None) -> bool:
+        with self._lock:
+            return self._set(key, value, ex)
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return self._delete(*keys)
+
+    def keys(self, pattern: str = '*') -> list[str]:
+        with self._lock:
+            return [key for key in list(self._data) if fnmatch.fnmatchcase(key, pattern) and self._get(key) is not None]
+
+    def compare_and_set(self, key: str, expected: Optional[str], value: str, ex: int) -> bool:
+        with self._lock:
+            if self._get(key) != expected:
+                return False
+            return self._set(key, value, ex)
+
+    def pipeline(self) -> Pipeline:
+        return _MemoryPipeline(self)
+
+
+def from_env(name: str = CACHE_BACKEND) -> CacheBackend:
+    """Creates the backend named by CACHE_BACKEND
+
+    - upstash reads UPSTASH_REDIS_REST_URL and UPSTASH_REDIS_REST_TOKEN
+    - redis reads REDIS_URL and REDIS_MAX_CONNECTIONS
+    - memory needs no settings
+
+    Args:
+        name (str, optional): 'upstash', 'redis' or 'memory'. Defaults to CACHE_BACKEND
+
+    Returns:
+        CacheBackend: the configured backend
+    """
+    name = name.lower()
+    if name == 'upstash':
+        return UpstashBackend(os.getenv('UPSTASH_REDIS_REST_URL'), os.getenv('UPSTASH_REDIS_REST_TOKEN'))
+    if name == 'redis':
+        return RedisBackend()
+    if name == 'memory':
+        return MemoryBackend()
+    raise ValueError(f'Invalid cache backend: {name}')
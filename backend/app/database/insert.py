@@ -10,6 +10,11 @@ import os
 import json
 import time
 
+try:
+    from app.database import price_store
+except ImportError:  # run as a script by the maintenance workflow
+    import price_store
+
 load_dotenv()
 SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_ROLE')
@@ -106,6 +111,11 @@ def insert_data(table):
             print(f"Inserted chunk {i//chunk_size + 1} ({len(chunk)} rows)")
         
         print(f"Successfully inserted total {total_rows} rows")
+
+        # keep local price files in step with the db
+        key = 'currency_pair' if table == 'daily_forex' else 'ticker'
+        for ticker, rows in clean.groupby(key):
+            price_store.append_prices(ticker, table, rows.set_index('date'))
     
     except Exception as e:
         print(f"Critical error in insert_{table}_data: {str(e)}")
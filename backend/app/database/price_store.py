@@ -0,0 +1,201 @@
+''' Local columnar store for price history
+Keeps one uncompressed Arrow IPC file per ticker and table so assets can
+memory-map their OHLCV columns instead of pulling JSON rows from Supabase
+- read_prices: memory-mapped read, syncing only rows newer than the local copy
+- append_prices: incremental append used by the ingestion script
+- read_metadata: cached ticker metadata
+'''
+
+import json
+import os
+import time
+from typing import Optional
+from urllib.parse import quote
+
+import pandas as pd
+import pyarrow as pa
+from pandas.core.frame import DataFrame
+from supabase import Client
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SUPABASE_KEY = os.getenv('SUPABASE_KEY')
+SUPABASE_URL = os.getenv('SUPABASE_URL')
+
+STORE_DIR = os.getenv('PRICE_STORE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'flapp', 'prices'))
+SYNC_INTERVAL = int(os.getenv('PRICE_STORE_SYNC_INTERVAL', 900))  # seconds before checking db for new rows
+
+COLUMNS = {
+    'daily': ['open', 'high', 'low', 'close', 'adj_close', 'volume'],
+    'five_minute': ['open', 'high', 'low', 'close', 'adj_close', 'volume'],
+    'daily_forex': ['open', 'high', 'low', 'close'],
+}
+KEY_COLUMN = {'daily_forex': 'currency_pair'}
+METADATA_COLUMNS = 'asset_type, currency, sector, timezone'
+
+_client = None
+
+
+def _get_client() -> Client:
+    global _client
+    if _client is None:
+        _client = Client(SUPABASE_URL, SUPABASE_KEY)
+    return _client
+
+
+def _path(ticker: str, name: str) -> str:
+    # tickers and currency pairs can contain '/', '^' or '='
+    return os.path.join(STORE_DIR, quote(ticker, safe=''), name)
+
+
+def _is_stale(path: str) -> bool:
+    return time.time() - os.path.getmtime(path) > SYNC_INTERVAL
+
+
+def _read_file(path: str) -> DataFrame:
+    # split_blocks keeps each column as a zero-copy, read-only view of the mapped file
+    table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+def _write_file(path: str, df: DataFrame) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.Table.from_pandas(df.rename_axis('date'), preserve_index=True)
+
+    # write to a temp file and swap so readers never see a partial file
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with pa.OSFile(tmp, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+
+
+def _to_frame(rows: list[dict], table: str) -> DataFrame:
+    df = pd.DataFrame(rows, columns=['date', *COLUMNS[table]]).set_index('date')
+    df = df.astype(float)
+    df.index = pd.to_datetime(df.index)
+    return df.sort_index()
+
+
+def _align_index(index: pd.DatetimeIndex, like: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    """Matches the timezone of new rows to the rows already stored"""
+    index = pd.DatetimeIndex(index)
+    if like.tz is not None:
+        index = index.tz_localize('UTC') if index.tz is None else index
+        index = index.tz_convert(like.tz)
+    elif index.tz is not None:
+        index = index.tz_localize(None)
+    return index
+
+
+def _merge(old: DataFrame, new: DataFrame) -> DataFrame:
+    new = new.set_axis(_align_index(new.index, old.index))
+    df = pd.concat([old, new[old.columns]])
+    df = df[~df.index.duplicated(keep='last')]
+    return df.sort_index()
+
+
+def _query(table: str, key: str):
+    return _get_client().table(table).select(', '.join(['date', *COLUMNS[table]])).eq(KEY_COLUMN.get(table, 'ticker'), key)
+
+
+def _sync(path: str, key: str, table: str, df: DataFrame) -> DataFrame:
+    """Pulls rows newer than the local copy and drops rows the db has already cleaned up"""
+    last = df.index[-1].isoformat() if not df.empty else None
+    new_rows = (_query(table, key).gt('date', last) if last else _query(table, key)).execute().data
+
+    first = (
+        _get_client().table(table).select('date')
+        .eq(KEY_COLUMN.get(table, 'ticker'), key)
+        .order('date').limit(1).execute()
+    ).data
+
+    changed = False
+    if new_rows:
+        df = _merge(df, _to_frame(new_rows, table))
+        changed = True
+
+    if first:
+        first = _align_index(pd.to_datetime([first[0]['date']]), df.index)[0]
+        if not df.empty and df.index[0] < first:
+            df = df[df.index >= first]
+            changed = True
+
+    if changed:
+        _write_file(path, df)
+    else:
+        os.utime(path)
+
+    return df
+
+
+def read_prices(ticker: str, table: str) -> DataFrame:
+    """Reads price history from the local store, falling back to the database
+
+    - Memory-maps the local file if it exists
+    - Pulls only rows newer than the local copy once the file is older than SYNC_INTERVAL
+    - Pulls the full history from the database the first time a ticker is read
+
+    Args:
+        ticker (str): ticker, or currency pair for daily_forex
+        table (str): one of daily, five_minute or daily_forex
+
+    Returns:
+        pandas.core.frame.DataFrame: date-indexed float columns, sorted by date
+    """
+    path = _path(ticker, f'{table}.arrow')
+    if not os.path.exists(path):
+        df = _to_frame(_query(table, ticker).execute().data, table)
+        df = df[~df.index.duplicated(keep='last')]
+        _write_file(path, df)
+    elif _is_stale(path):
+        _sync(path, ticker, table, _read_file(path))
+
+    return _read_file(path)
+
+
+def append_prices(ticker: str, table: str, df: DataFrame) -> None:
+    """Appends newly ingested rows to a ticker's local file
+
+    Tickers without a local file are skipped since a partial history
+    would shadow the database on the next read
+
+    Args:
+        ticker (str): ticker, or currency pair for daily_forex
+        table (str): one of daily, five_minute or daily_forex
+        df (pandas.core.frame.DataFrame): date-indexed rows with the table's columns
+    """
+    path = _path(ticker, f'{table}.arrow')
+    if df.empty or not os.path.exists(path):
+        return
+
+    new = df[COLUMNS[table]].astype(float)
+    new.index = pd.to_datetime(new.index)
+    _write_file(path, _merge(_read_file(path), new))
+
+
+def read_metadata(ticker: str) -> Optional[dict]:
+    """Gets ticker metadata from the local store or the tickers table
+
+    Args:
+        ticker (str): ticker to look up
+
+    Returns:
+        dict: asset_type, currency, sector and timezone, None if the ticker is not in the db
+    """
+    path = _path(ticker, 'metadata.json')
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+
+    metadata = _get_client().table('tickers').select(METADATA_COLUMNS).eq('ticker', ticker).execute().data
+    if not metadata:
+        return None
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(metadata[0], f)
+    os.replace(tmp, path)
+    return metadata[0]
@@ -1,188 +1,292 @@
 import os
+import copy
+import hashlib
 import pickle
 import json
 import base64
 import logging
 import math
-from upstash_redis import Redis
-import dotenv
+import random
+import secrets
+import threading
+import time
+import zlib
+
+from app.core.cache import LRUCache
+from app.database import cache_backend, price_store
+
+try:
+    import zstandard
+except ImportError:  # zlib is used instead
+    zstandard = None
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Get Redis configuration
-redis_url = os.environ.get("UPSTASH_REDIS_REST_URL")
-redis_token = os.environ.get("UPSTASH_REDIS_REST_TOKEN")
-
-if redis_url is None or redis_token is None:
-    dotenv.load_dotenv()
-    redis_url = os.getenv("UPSTASH_REDIS_REST_URL")
-    redis_token = os.getenv("UPSTASH_REDIS_REST_TOKEN")
-
 # Max chunk size (slightly less than 1MB to be safe)
 MAX_CHUNK_SIZE = 900000  
 
+# Max payload sent or fetched in one pipeline or MGET request
+MAX_REQUEST_SIZE = int(os.getenv("REDIS_MAX_REQUEST_SIZE", 9 * MAX_CHUNK_SIZE))
+
 # Default TTL in seconds (1 hour)
 DEFAULT_TTL = 3600
 
-# Initialize Redis client using environment variables
-redis = Redis(redis_url, redis_token)
+# Seconds the chunks of a replaced version stay readable for requests that already got its head
+GRACE_PERIOD = 60
+
+# Attempts of an update that keeps losing to concurrent writers, and the base of its backoff in seconds
+UPDATE_RETRIES = int(os.getenv("REDIS_UPDATE_RETRIES", 5))
+RETRY_DELAY = 0.05
+
+# Deserialized objects kept per process, validated against their etag in Redis
+# and decoded again once older than the price sync interval
+L1_CACHE_SIZE = int(os.getenv("REDIS_L1_CACHE_SIZE", 32))
+
+# Upstash REST by default, CACHE_BACKEND selects native Redis or an in-memory store
+redis = cache_backend.from_env()
+
+# (key, etag) -> (time kept, object), and the etag each key was last seen with
+_local = LRUCache(L1_CACHE_SIZE, sizeof=lambda _: 1)
+_local_etags = {}
+_local_lock = threading.Lock()
+
+# expected head of an unconditional write
+_ANY = object()
+
+def _keep_local(key, etag, obj):
+    """Remember obj as the current version of key, dropping the version it replaces"""
+    with _local_lock:
+        old = _local_etags.get(key)
+        _local_etags[key] = etag
+    if old is not None and old != etag:
+        _local.pop((key, old))
+    if obj is not None:
+        _local.put((key, etag), (time.monotonic(), obj))
+
+def _forget_local(key):
+    with _local_lock:
+        etag = _local_etags.pop(key, None)
+    if etag is not None:
+        _local.pop((key, etag))
 
 def _chunk_data(data, max_size=MAX_CHUNK_SIZE):
     """Split data into chunks of max_size"""
     return [data[i:i+max_size] for i in range(0, len(data), max_size)]
 
-def cache_portfolio(portfolio_id, portfolio_obj, ttl=DEFAULT_TTL):
-    """Cache a portfolio object with chunking support"""
-    # Serialize the object
-    serialized = pickle.dumps(portfolio_obj)
-    base64_data = base64.b64encode(serialized).decode('utf-8')
-    
-    # Check if we need chunking
-    if len(base64_data) > MAX_CHUNK_SIZE:
-        chunks = _chunk_data(base64_data)
-        chunk_count = len(chunks)
-        
-        # Store chunk metadata
-        redis.set(f"portfolio:{portfolio_id}:meta", json.dumps({
-            "chunked": True,
-            "chunks": chunk_count
-        }), ex=ttl)
-        
-        # Store each chunk
-        for i, chunk in enumerate(chunks):
-            redis.set(f"portfolio:{portfolio_id}:chunk:{i}", chunk, ex=ttl)
-            
-        logger.info(f"Portfolio {portfolio_id} cached in Redis (chunked into {chunk_count} parts)")
+def _batches(items, size, max_size=MAX_REQUEST_SIZE):
+    """Group items into runs whose total size fits in one request"""
+    per_request = max(1, max_size // size)
+    return [items[i:i+per_request] for i in range(0, len(items), per_request)]
+
+def _encode(obj):
+    """Pickle and compress an object into a string the REST API can carry
+
+    The codec name prefixes the payload so readers can tell how to decompress it.
+    """
+    serialized = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    if zstandard is not None:
+        codec, compressed = "zstd", zstandard.ZstdCompressor(level=3).compress(serialized)
     else:
-        # Store as a single value
-        redis.set(f"portfolio:{portfolio_id}", base64_data, ex=ttl)
-        # Delete any potential metadata from previous chunked storage
-        redis.delete(f"portfolio:{portfolio_id}:meta")
-        logger.info(f"Portfolio {portfolio_id} cached in Redis (single chunk)")
+        codec, compressed = "zlib", zlib.compress(serialized, 3)
+    return f"{codec}:{base64.b64encode(compressed).decode('ascii')}"
 
+def _decode(data):
+    """Inverse of _encode, also reading plain base64 pickles written before compression"""
+    codec, sep, payload = data.partition(":")
+    if not sep:
+        return pickle.loads(base64.b64decode(data))
+    compressed = base64.b64decode(payload)
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError("zstandard is needed to read this cache entry")
+        return pickle.loads(zstandard.ZstdDecompressor().decompress(compressed))
+    if codec == "zlib":
+        return pickle.loads(zlib.decompress(compressed))
+    raise ValueError(f"Unknown cache codec: {codec}")
 
-def get_cached_portfolio(portfolio_id):
-    """Get a portfolio from cache with chunking support"""
-    # Check memory cache first
-    memory_key = f"portfolio:{portfolio_id}"
-    
+def _store_object(prefix, object_id, obj, ttl=DEFAULT_TTL, expected=_ANY):
+    """Store a new version of prefix:object_id and point the head at it
+
+    Each version is chunked under its own keys, so readers either see the old
+    head with all of its chunks or the new one. The head swap is a single write,
+    conditional on the head still being expected when expected is given.
+
+    Returns:
+        bool: False if the head changed since expected was read, nothing is stored then
+    """
+    data = _encode(obj)
+    key = f"{prefix}:{object_id}"
+    name = prefix.capitalize()
+    etag = hashlib.blake2b(data.encode("ascii"), digest_size=12).hexdigest()
+    version = secrets.token_hex(8)
+    chunks = _chunk_data(data)
+    head = json.dumps({"version": version, "etag": etag, "chunks": len(chunks)})
+
+    # chunks outlive the head so a reader that got the head can still fetch them
+    batches = _batches(list(enumerate(chunks)), MAX_CHUNK_SIZE)
+    for n, batch in enumerate(batches):
+        pipe = redis.pipeline()
+        for i, chunk in batch:
+            pipe.set(f"{key}:{version}:{i}", chunk, ex=ttl + GRACE_PERIOD)
+        if expected is _ANY and n == len(batches) - 1:
+            pipe.set(f"{key}:head", head, ex=ttl)
+        pipe.exec()
+
+    if expected is not _ANY:
+        if not redis.compare_and_set(f"{key}:head", expected, head, ttl):
+            redis.delete(*(f"{key}:{version}:{i}" for i in range(len(chunks))))
+            return False
+        if expected is not None:
+            # readers holding the replaced head get GRACE_PERIOD to fetch its chunks
+            old = json.loads(expected)
+            pipe = redis.pipeline()
+            for i in range(old["chunks"]):
+                pipe.expire(f"{key}:{old['version']}:{i}", GRACE_PERIOD)
+            pipe.exec()
+
+    logger.info(f"{name} {object_id} cached in Redis ({len(chunks)} chunks)")
+    # the caller keeps using obj, so the process keeps a copy of this version
+    _keep_local(key, etag, copy.copy(obj))
+    return True
+
+def _cache_object(prefix, object_id, obj, ttl=DEFAULT_TTL):
+    """Cache an object under prefix:object_id, replacing whatever version is stored"""
+    _store_object(prefix, object_id, obj, ttl)
+
+def _read_object(prefix, object_id):
+    """Read the current head of prefix:object_id and a copy of the object it points to
+
+    The copy comes from the in-process cache when its etag is still current,
+    so concurrent requests can modify what they get without affecting each other.
+
+    Returns:
+        tuple: (head, object), head is None for a missing object or one stored before heads
+    """
+    key = f"{prefix}:{object_id}"
+    head = redis.get(f"{key}:head")
+    if head is None:
+        _forget_local(key)
+        return None, copy.copy(_load_legacy(prefix, object_id))
+
+    info = json.loads(head)
+    local_key = (key, info["etag"])
+    load = lambda: (time.monotonic(), _load_version(prefix, object_id, info))
+    # concurrent misses on the same version share one fetch and decode
+    kept, result = _local.get_or_load(local_key, load)
+    if time.monotonic() - kept > price_store.SYNC_INTERVAL:
+        # decoding re-attaches assets from the registry, picking up newer prices
+        _local.pop(local_key)
+        kept, result = _local.get_or_load(local_key, load)
+    _keep_local(key, info["etag"], None)
+    return head, copy.copy(result)
+
+def _get_cached_object(prefix, object_id):
+    """Get an object cached by _cache_object, None if it is missing or unreadable"""
     if redis is None:
         return None
-    
+
     try:
-        # Check if we have metadata indicating chunked storage
-        meta_key = f"portfolio:{portfolio_id}:meta"
-        meta = redis.get(meta_key)
-        
-        if meta:
-            # We have chunked data
-            meta_data = json.loads(meta)
-            chunk_count = meta_data.get("chunks", 0)
-            
-            # Retrieve all chunks
-            combined_data = ""
-            for i in range(chunk_count):
-                chunk = redis.get(f"portfolio:{portfolio_id}:chunk:{i}")
-                if chunk is None:
-                    logger.error(f"Missing chunk {i} for portfolio {portfolio_id}")
-                    return None
-                combined_data += chunk
-                
-            # Decode and deserialize
-            binary_data = base64.b64decode(combined_data)
-            result = pickle.loads(binary_data)
-            logger.info(f"Retrieved chunked portfolio {portfolio_id} from Redis ({chunk_count} chunks)")
-            return result
-        else:
-            # Try to get as a single value
-            cached = redis.get(f"portfolio:{portfolio_id}")
-            if cached:
-                binary_data = base64.b64decode(cached)
-                result = pickle.loads(binary_data)
-                logger.info(f"Retrieved portfolio {portfolio_id} from Redis")
-                return result
-            
+        return _read_object(prefix, object_id)[1]
     except Exception as e:
-        logger.error(f"Error retrieving portfolio {portfolio_id} from Redis: {e}")
-    
+        logger.error(f"Error retrieving {prefix} {object_id} from Redis: {e}")
+
     return None
 
+def _update_cached_object(prefix, object_id, update, ttl=DEFAULT_TTL, retries=UPDATE_RETRIES):
+    """Apply update to a cached object and store the result if no other writer got there first
+
+    A conflicting write makes update run again on the newer version, so it
+    must only change the object it is given.
+
+    Args:
+        update: function modifying the object in place, its return value is passed on
+        retries: attempts before giving up on a contended object
+
+    Returns:
+        the return value of update
+    """
+    name = prefix.capitalize()
+    for attempt in range(retries):
+        head, obj = _read_object(prefix, object_id)
+        if obj is None:
+            raise ValueError(f"{name} {object_id} is not cached")
+        result = update(obj)
+        if _store_object(prefix, object_id, obj, ttl, expected=head):
+            return result
+        logger.info(f"{name} {object_id} changed during update, retrying")
+        time.sleep(random.uniform(0, RETRY_DELAY * 2 ** attempt))
+    raise ValueError(f"{name} {object_id} kept changing, update abandoned after {retries} attempts")
+
+def _load_version(prefix, object_id, info):
+    """Fetch and decode the version of an object a head points to"""
+    key = f"{prefix}:{object_id}"
+    chunk_keys = [f"{key}:{info['version']}:{i}" for i in range(info["chunks"])]
+    chunks = []
+    for batch in _batches(chunk_keys, MAX_CHUNK_SIZE):
+        chunks.extend(redis.mget(*batch))
+
+    missing = [i for i, chunk in enumerate(chunks) if chunk is None]
+    if missing:
+        raise ValueError(f"Missing chunk {missing[0]} for {prefix} {object_id}")
+
+    result = _decode("".join(chunks))
+    logger.info(f"Retrieved {prefix} {object_id} from Redis ({len(chunks)} chunks)")
+    return result
+
+def _load_legacy(prefix, object_id):
+    """Fetch an object stored before versioned chunks, None if there is none"""
+    key = f"{prefix}:{object_id}"
+    cached, meta = redis.mget(key, f"{key}:meta")
+    if meta:
+        chunk_count = json.loads(meta).get("chunks", 0)
+        chunks = redis.mget(*(f"{key}:chunk:{i}" for i in range(chunk_count)))
+        if any(chunk is None for chunk in chunks):
+            return None
+        return _decode("".join(chunks))
+    if not cached:
+        return None
+    return _decode(cached)
+
+def _delete_cached_object(prefix, object_id):
+    """Delete an object's head, its current chunks and any keys of the layout before heads"""
+    key = f"{prefix}:{object_id}"
+    keys = [f"{key}:head", key, f"{key}:meta", f"{key}:etag"]
+    head = redis.get(f"{key}:head")
+    if head is not None:
+        info = json.loads(head)
+        keys.extend(f"{key}:{info['version']}:{i}" for i in range(info["chunks"]))
+    redis.delete(*keys)
+    _forget_local(key)
+
+def cache_portfolio(portfolio_id, portfolio_obj, ttl=DEFAULT_TTL):
+    """Cache a portfolio object with chunking support"""
+    _cache_object("portfolio", portfolio_id, portfolio_obj, ttl)
+
+def get_cached_portfolio(portfolio_id):
+    """Get a portfolio from cache with chunking support"""
+    return _get_cached_object("portfolio", portfolio_id)
+
+def update_cached_portfolio(portfolio_id, update, ttl=DEFAULT_TTL):
+    """Apply update to a cached portfolio without losing concurrent updates, see _update_cached_object"""
+    return _update_cached_object("portfolio", portfolio_id, update, ttl)
+
 def cache_strategy(strategy_key, strategy_obj, ttl=DEFAULT_TTL):
     """Cache a strategy object with chunking support"""
-    # Serialize the object
-    serialized = pickle.dumps(strategy_obj)
-    base64_data = base64.b64encode(serialized).decode('utf-8')
-    
-    # Check if we need chunking
-    if len(base64_data) > MAX_CHUNK_SIZE:
-        chunks = _chunk_data(base64_data)
-        chunk_count = len(chunks)
-        
-        # Store chunk metadata
-        redis.set(f"strategy:{strategy_key}:meta", json.dumps({
-            "chunked": True,
-            "chunks": chunk_count
-        }), ex=ttl)
-        
-        # Store each chunk
-        for i, chunk in enumerate(chunks):
-            redis.set(f"strategy:{strategy_key}:chunk:{i}", chunk, ex=ttl)
-            
-        logger.info(f"Strategy {strategy_key} cached in Redis (chunked into {chunk_count} parts)")
-    else:
-        # Store as a single value
-        redis.set(f"strategy:{strategy_key}", base64_data, ex=ttl)
-        # Delete any potential metadata from previous chunked storage
-        redis.delete(f"strategy:{strategy_key}:meta")
-        logger.info(f"Strategy {strategy_key} cached in Redis (single chunk)")
+    _cache_object("strategy", strategy_key, strategy_obj, ttl)
 
 def get_cached_strategy(strategy_key):
     """Get a strategy from cache with chunking support"""
-    if redis is None:
-        return None
-    
-    try:
-        # Check if we have metadata indicating chunked storage
-        meta_key = f"strategy:{strategy_key}:meta"
-        meta = redis.get(meta_key)
-        
-        if meta:
-            # We have chunked data
-            meta_data = json.loads(meta)
-            chunk_count = meta_data.get("chunks", 0)
-            
-            # Retrieve all chunks
-            combined_data = ""
-            for i in range(chunk_count):
-                chunk = redis.get(f"strategy:{strategy_key}:chunk:{i}")
-                if chunk is None:
-                    logger.error(f"Missing chunk {i} for strategy {strategy_key}")
-                    return None
-                combined_data += chunk
-                
-            # Decode and deserialize
-            binary_data = base64.b64decode(combined_data)
-            result = pickle.loads(binary_data)
-            logger.info(f"Retrieved chunked strategy {strategy_key} from Redis ({chunk_count} chunks)")
-            return result
-        else:
-            # Try to get as a single value
-            cached = redis.get(f"strategy:{strategy_key}")
-            if cached:
-                binary_data = base64.b64decode(cached)
-                result = pickle.loads(binary_data)
-                logger.info(f"Retrieved strategy {strategy_key} from Redis")
-                return result
-            
-    except Exception as e:
-        logger.error(f"Error retrieving strategy {strategy_key} from Redis: {e}")
-    
-    return None
+    return _get_cached_object("strategy", strategy_key)
+
+def delete_cached_strategy(strategy_key):
+    """Delete a cached strategy with all of its keys"""
+    _delete_cached_object("strategy", strategy_key)
 
 def clear_cache(pattern="*"):
     """Clear cache matching pattern"""
+    cleared = 0
     if redis is not None:
         try:
             # For chunked data, we need to find all related keys
@@ -1,11 +1,22 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.routers.asset import router as asset_router
 from app.routers.strategy import router as strategy_router
 from app.routers.portfolio import router as portfolio_router
+from app.core import shared_data, workers
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    workers.shutdown()
+    shared_data.clear()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 app.include_router(asset_router)
 app.include_router(strategy_router)
 app.include_router(portfolio_router)
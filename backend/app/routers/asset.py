@@ -1,16 +1,12 @@
 from fastapi import APIRouter, Depends
 from app.core.asset import Asset
 from app.models.asset import AssetResponse, AssetPlot, AssetStats
-from functools import lru_cache
+from app.core.asset_registry import get_asset
 import json
 from plotly.utils import PlotlyJSONEncoder
 
 router = APIRouter(prefix='/api/assets')
 
-@lru_cache(maxsize=30)
-def get_asset(asset_ticker: str):
-    return Asset(asset_ticker)
-
 @router.get("/{asset_ticker}", response_model=AssetResponse)
 def read_asset(asset: Asset = Depends(get_asset)):
     return {
@@ -5,7 +5,7 @@ import tempfile
 from app.core.portfolio import Portfolio, transaction
 from app.core.portfolio_optimizer import PortfolioOptimizer
 from app.core.asset import Asset
-from functools import lru_cache
+from app.core.asset_registry import get_asset
 from plotly.utils import PlotlyJSONEncoder
 import json
 from typing import Dict
@@ -14,14 +14,10 @@ from app.models.portfolio import (PortfolioCreate, PortfolioCreatePost, Transact
                                   PortfolioTransactions, PortfolioOptimize,
                                   PortfolioSave)
 import urllib.parse
-from app.database.redis_client import cache_portfolio, get_cached_portfolio
+from app.database.redis_client import cache_portfolio, get_cached_portfolio, update_cached_portfolio
 
 router = APIRouter(prefix='/api/portfolio')
 
-@lru_cache(maxsize=30)
-def get_asset(asset_ticker: str):
-    return Asset(asset_ticker)
-
 # Helper function to decode portfolio IDs
 def decode_portfolio_id(portfolio_id: str) -> str:
     """Decode URL-encoded portfolio ID to ensure proper lookup in the cache."""
@@ -104,14 +100,15 @@ async def upload_portfolio(portfolio_id: str, file: UploadFile = File(...), sour
         tmp.write(content)
         tmp_name = tmp.name
 
-    portfolio: Portfolio = get_cached_portfolio(decoded_id)
-    if source == 'trading212':
-        transactions = portfolio.from_212(tmp_name)
-    else:
-        transactions = portfolio.from_vanguard(tmp_name)
+    def parse(portfolio: Portfolio):
+        if source == 'trading212':
+            return portfolio.from_212(tmp_name)
+        return portfolio.from_vanguard(tmp_name)
 
-    os.unlink(tmp_name)
-    cache_portfolio(portfolio_id, portfolio)
+    try:
+        transactions = update_cached_portfolio(decoded_id, parse)
+    finally:
+        os.unlink(tmp_name)
 
     return {
         'transactions': [
@@ -131,9 +128,7 @@ async def upload_portfolio(portfolio_id: str, file: UploadFile = File(...), sour
 @router.patch('/{portfolio_id}/deposit', response_model=TransactionResponse)
 def deposit(portfolio_id: str, value: float, currency: str = None, date: str = None):
     decoded_id = decode_portfolio_id(portfolio_id)
-    portfolio: Portfolio = get_cached_portfolio(decoded_id)
-    t, cash = portfolio.deposit(value, currency, date)
-    cache_portfolio(portfolio_id, portfolio)
+    t, cash = update_cached_portfolio(decoded_id, lambda portfolio: portfolio.deposit(value, currency, date))
     return {
         'type': t.type,
         'asset': t.asset,
@@ -148,9 +143,7 @@ def deposit(portfolio_id: str, value: float, currency: str = None, date: str = N
 @router.patch('/{portfolio_id}/withdraw', response_model=TransactionResponse)
 def withdraw(portfolio_id: str, value: float, currency: str = None, date: str = None):
     decoded_id = decode_portfolio_id(portfolio_id)
-    portfolio: Portfolio = get_cached_portfolio(decoded_id)
-    t, cash = portfolio.withdraw(value, currency, date)
-    cache_portfolio(portfolio_id, portfolio)
+    t, cash = update_cached_portfolio(decoded_id, lambda portfolio: portfolio.withdraw(value, currency, date))
     return {
         'type': t.type,
         'asset': t.asset,
@@ -165,9 +158,8 @@ def withdraw(portfolio_id: str, value: float, currency: str = None, date: str =
 @router.patch('/{portfolio_id}/buy', response_model=TransactionResponse)
 def buy(portfolio_id: str, shares: float = None, value: float = None, date: str = None, currency: str = None, asset: Asset = Depends(get_asset)):
     decoded_id = decode_portfolio_id(portfolio_id)
-    portfolio: Portfolio = get_cached_portfolio(decoded_id)
-    t, cash = portfolio.buy(asset=asset, shares=shares, value=value, date=date, currency=currency)
-    cache_portfolio(portfolio_id, portfolio)
+    t, cash = update_cached_portfolio(
+        decoded_id, lambda portfolio: portfolio.buy(asset=asset, shares=shares, value=value, date=date, currency=currency))
     return {
         'type': t.type,
         'asset': t.asset.ticker,
@@ -182,9 +174,8 @@ def buy(portfolio_id: str, shares: float = None, value: float = None, date: str
 @router.patch('/{portfolio_id}/sell', response_model=TransactionResponse)
 def sell(portfolio_id: str, shares: float = None, value: float = None, date: str = None, currency: str = None, asset: Asset = Depends(get_asset)):
     decoded_id = decode_portfolio_id(portfolio_id)
-    portfolio: Portfolio = get_cached_portfolio(decoded_id)
-    t, cash = portfolio.sell(asset=asset, shares=shares, value=value, date=date, currency=currency)
-    cache_portfolio(portfolio_id, portfolio)
+    t, cash = update_cached_portfolio(
+        decoded_id, lambda portfolio: portfolio.sell(asset=asset, shares=shares, value=value, date=date, currency=currency))
     return {
         'type': t.type,
         'asset': t.asset.ticker,
@@ -321,22 +312,22 @@ def rebalance(portfolio_id: str, target_weights: Dict[str, float]):
 @router.patch('/{portfolio_id}/parse_transactions', response_model=Dict[str, str])
 def parse_transactions(portfolio_id: str, transactions: PortfolioTransactions):
     decoded_id = decode_portfolio_id(portfolio_id)
-    portfolio: Portfolio = get_cached_portfolio(decoded_id)
-    asset_mapping = {a.ticker: a for a in portfolio.cost_bases}  # use cost bases bcs the method is only for rebalancing
-    t_list = [
-        transaction(
-            t.type,
-            asset_mapping.get(t.asset, 'Cash'),
-            t.shares,
-            t.value,
-            t.profit,
-            t.date,
-            t.id
-        ) for t in transactions.transactions
-    ]
-
-    portfolio.from_transactions(t_list)
-    cache_portfolio(portfolio_id, portfolio)
+    def parse(portfolio: Portfolio):
+        asset_mapping = {a.ticker: a for a in portfolio.cost_bases}  # use cost bases bcs the method is only for rebalancing
+        t_list = [
+            transaction(
+                t.type,
+                asset_mapping.get(t.asset, 'Cash'),
+                t.shares,
+                t.value,
+                t.profit,
+                t.date,
+                t.id
+            ) for t in transactions.transactions
+        ]
+        portfolio.from_transactions(t_list)
+
+    update_cached_portfolio(decoded_id, parse)
     return {
         'status': 'success',
         'message': 'Transactions parsed successfully',
@@ -6,16 +6,12 @@ from app.models.strategy import (StrategyBase, StrategyCreate, StrategyPlot, Str
 import json
 from plotly.utils import PlotlyJSONEncoder
 from app.core.asset import Asset
-from functools import lru_cache
+from app.core.asset_registry import get_asset, registry
 from enum import Enum
-from app.database.redis_client import cache_strategy, get_cached_strategy, redis
+from app.database.redis_client import cache_strategy, get_cached_strategy, delete_cached_strategy
 
 router = APIRouter(prefix='/api/strategies')
 
-@lru_cache(maxsize=30)
-def get_asset(asset_ticker: str):
-    return Asset(asset_ticker)
-
 _id = 0
 
 @router.post('/{asset_ticker}/{strategy_name}', response_model=StrategyCreate)
@@ -48,7 +44,7 @@ def delete_strategy(strategy_key: str):
         'strategy': strategy.__class__.__name__,
     }
 
-    redis.delete(f'strategy:{strategy_key}')
+    delete_cached_strategy(strategy_key)
     return strategy_info
 
 @router.get('/{strategy_key}/indicator', response_model=StrategyPlot)
@@ -77,6 +73,9 @@ def get_strategy_params(strategy_key: str):
 @router.get('/{strategy_key}/signals', response_model=StrategySignal)
 def get_strategy_signals(strategy_key: str, timeframe: str = '1d', start_date: str = None, end_date: str = None):
     strategy: Strategy = get_cached_strategy(strategy_key)
+    # bring in bars stored since the strategy was cached, only they need new indicator values
+    if strategy.refresh(registry.refresh(strategy.asset.ticker)):
+        cache_strategy(strategy_key, strategy)
     if timeframe == '1d':
         signal = strategy.daily['signal']
     elif timeframe == '5m':
@@ -174,7 +173,7 @@ def save_combined_strategy(combined_key: str):
 def load_combined_strategy(request: StrategyLoad):
     params = request.model_dump(exclude_none=True)
     global _id
-    asset = Asset(params['asset'])
+    asset = get_asset(params['asset'])
     combined = CombinedStrategy(asset)
     indicators = []
     for indicator in params['params']['indicators']:
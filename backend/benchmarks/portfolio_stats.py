@@ -0,0 +1,82 @@
+''' Benchmark of the portfolio statistics
+Times each metric computed the way Portfolio.stats used to, with separate
+pandas and scipy calls, against one call of the fused return_stats kernel
+
+Run from the backend directory:
+    python -m benchmarks.portfolio_stats [n_days] [repeats]
+'''
+
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from app.core.portfolio_stats import return_stats
+
+
+def make_returns(n_days: int, seed: int = 0) -> tuple[pd.Series, pd.Series]:
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2015-01-01', periods=n_days, freq='B')
+    returns = pd.Series(rng.normal(0.0004, 0.012, n_days), index=index)
+    market = pd.Series(rng.normal(0.0003, 0.01, n_days), index=index)
+    market.iloc[rng.choice(n_days, n_days // 50, replace=False)] = np.nan  # missing benchmark days
+    return returns, market
+
+
+def pandas_metrics(returns: pd.Series, market: pd.Series) -> dict:
+    def max_drawdown():
+        cum_rets = (1 + returns).cumprod()
+        return (cum_rets / cum_rets.cummax() - 1).min()
+
+    def average_drawdown():
+        cum_rets = (1 + returns).cumprod()
+        drawdowns = (cum_rets / cum_rets.cummax() - 1).dropna()
+        return drawdowns[drawdowns < 0].mean()
+
+    return {
+        'total_returns': lambda: np.exp(np.log1p(returns).sum()) - 1,
+        'mean': returns.mean,
+        'median': returns.median,
+        'std': returns.std,
+        'skewness': lambda: stats.skew(returns),
+        'kurtosis': lambda: stats.kurtosis(returns),
+        'best_day': returns.max,
+        'worst_day': returns.min,
+        'positive_days': lambda: (returns > 0).sum() / len(returns),
+        'downside_deviation': lambda: np.sqrt(np.mean(np.minimum(returns, 0) ** 2)),
+        'var_quantile': lambda: returns.quantile(0.05),
+        'tracking_error': lambda: np.std(returns - market),
+        'active_mean': lambda: np.mean(returns - market),
+        'max_drawdown': max_drawdown,
+        'average_drawdown': average_drawdown,
+    }
+
+
+def main(n_days: int = 2500, repeats: int = 200) -> None:
+    returns, market = make_returns(n_days)
+    metrics = pandas_metrics(returns, market)
+
+    fused = return_stats(returns.to_numpy(), market.to_numpy())
+    for name, fn in metrics.items():
+        assert np.isclose(float(fn()), getattr(fused, name), rtol=1e-9, atol=1e-12), name
+
+    print(f'{n_days} days, best of 5 x {repeats} runs, microseconds per call\n')
+    print(f'{"metric":<20}{"pandas/scipy":>14}')
+    total = 0.
+    for name, fn in metrics.items():
+        t = min(timeit.repeat(fn, number=repeats, repeat=5)) / repeats * 1e6
+        total += t
+        print(f'{name:<20}{t:>14.1f}')
+
+    kernel = min(timeit.repeat(
+        lambda: return_stats(returns.to_numpy(), market.reindex(returns.index).to_numpy()),
+        number=repeats, repeat=5,
+    )) / repeats * 1e6
+    print(f'\n{"all metrics":<20}{total:>14.1f}')
+    print(f'{"return_stats":<20}{kernel:>14.1f}  ({total / kernel:.1f}x faster)')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:3]))